@@ -0,0 +1,113 @@
+# STRATEGIES/engine.py
+# NumPy backed portfolio simulator shared by the strategies.
+# Strategies describe what they want to hold (a signal per bar, or a list of trades)
+# and the engine works out the trade log and equity curve in one vectorized pass.
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+LONG: int = 1
+FLAT: int = 0
+SHORT: int = -1
+
+
+@dataclass
+class TradeLog:
+    entry_idx: np.ndarray   # bar index the trade was opened on
+    exit_idx: np.ndarray    # bar index the trade was closed on
+    side: np.ndarray        # LONG / SHORT
+    entry_px: np.ndarray
+    exit_px: np.ndarray
+    pct_move: np.ndarray    # signed % move in the direction of the trade
+    pnl: np.ndarray         # cash P&L of each trade
+    balance: np.ndarray     # account balance after each trade
+    halted_at: Optional[int] = None  # index (into the candidate trades) of the first trade rejected for balance
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+
+@dataclass
+class SimulationResult:
+    trades: TradeLog
+    equity: np.ndarray      # account balance at the close of every bar
+
+
+def trades_from_signals(signals: np.ndarray):
+    # A trade is a run of identical non-flat signals.
+    # Returns (entry_idx, exit_idx, side) for every run.
+    signals = np.asarray(signals, dtype=np.int8)
+    n = len(signals)
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.int8)
+    change = np.flatnonzero(np.diff(signals)) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change - 1, [n - 1]))
+    side = signals[starts]
+    held = side != FLAT
+    return starts[held], ends[held], side[held]
+
+
+def settle_trades(pct_move: np.ndarray, trade_size: float, leverage: float, starting_balance: float):
+    # Apply each trade's % move to the account in order.
+    # A trade is only taken while the balance covers trade_size; once one is rejected the
+    # balance can no longer change, so every later trade is rejected as well.
+    # Returns (pnl, balance, halted_at) for the trades that were taken.
+    pnl = (trade_size * leverage) * (np.asarray(pct_move, dtype=np.float64) / 100)
+    # accumulate from the starting balance so the rounding matches a running "balance += pnl"
+    running = np.add.accumulate(np.concatenate(([starting_balance], pnl)))
+    accepted = running[:-1] >= trade_size
+    halted_at = None
+    if not accepted.all():
+        halted_at = int(np.argmin(accepted))
+        pnl = pnl[:halted_at]
+    return pnl, running[1:len(pnl) + 1], halted_at
+
+
+def build_trade_log(entry_idx, exit_idx, side, entry_px, exit_px, pct_move,
+                    trade_size: float, leverage: float, starting_balance: float) -> TradeLog:
+    pnl, balance, halted_at = settle_trades(pct_move, trade_size, leverage, starting_balance)
+    n = len(pnl)
+    return TradeLog(
+        entry_idx=np.asarray(entry_idx)[:n],
+        exit_idx=np.asarray(exit_idx)[:n],
+        side=np.asarray(side)[:n],
+        entry_px=np.asarray(entry_px)[:n],
+        exit_px=np.asarray(exit_px)[:n],
+        pct_move=np.asarray(pct_move)[:n],
+        pnl=pnl,
+        balance=balance,
+        halted_at=halted_at,
+    )
+
+
+def equity_curve(trades: TradeLog, length: int, starting_balance: float) -> np.ndarray:
+    # Step function of the balance, updated on each trade's exit bar
+    equity = np.full(length, starting_balance, dtype=np.float64)
+    if len(trades) == 0:
+        return equity
+    marker = np.full(length, -1, dtype=np.int64)
+    marker[trades.exit_idx] = np.arange(len(trades))  # last trade wins if several close on one bar
+    marker = np.maximum.accumulate(marker)
+    has_trade = marker >= 0
+    equity[has_trade] = trades.balance[marker[has_trade]]
+    return equity
+
+
+def simulate_signals(signals: np.ndarray, open_: np.ndarray, close: np.ndarray,
+                     trade_size: float = 1000.0, leverage: float = 10.0,
+                     starting_balance: float = 100000.0) -> SimulationResult:
+    # signals[i] is the position held over bar i: enter at open[i], exit at close[i].
+    # Consecutive identical signals are held as one trade.
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    entry_idx, exit_idx, side = trades_from_signals(signals)
+    entry_px = open_[entry_idx]
+    exit_px = close[exit_idx]
+    pct_move = (exit_px - entry_px) / entry_px * 100
+    pct_move = np.where(side == LONG, pct_move, 0 - pct_move)
+
+    trades = build_trade_log(entry_idx, exit_idx, side, entry_px, exit_px, pct_move,
+                             trade_size, leverage, starting_balance)
+    return SimulationResult(trades=trades, equity=equity_curve(trades, len(close), starting_balance))
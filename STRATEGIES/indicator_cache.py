@@ -0,0 +1,89 @@
+# STRATEGIES/indicator_cache.py
+# Process-wide LRU cache of indicator columns, keyed on (dataset fingerprint, indicator, params).
+# The chart and the strategies ask for the same EMA; whoever asks first computes it, everyone
+# else (and every later run or period toggle back) gets the cached array.
+# Datasets are identified by df.attrs["fingerprint"], set by data.cache and data.resample.
+import copy
+import threading
+from collections import OrderedDict
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from data.cache import dataset_key
+
+DEFAULT_BUDGET_MB = 256
+
+
+class IndicatorCache:
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 2**20):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (values, primed indicator)
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()  # the chart (main thread) and backtests (worker thread) share it
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def _evict(self):
+        while self.used_bytes > self.budget_bytes and self._entries:
+            _, (values, _) = self._entries.popitem(last=False)
+            self.used_bytes -= values.nbytes
+
+    def get(self, key: Tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, values: np.ndarray, indicator):
+        if values.nbytes > self.budget_bytes:
+            return
+        values.setflags(write=False)  # shared between callers
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old[0].nbytes
+            self._entries[key] = (values, copy.deepcopy(indicator))
+            self.used_bytes += values.nbytes
+            self._evict()
+
+
+_cache = IndicatorCache()
+
+
+def get_indicator_cache() -> IndicatorCache:
+    return _cache
+
+
+def indicator_key(fingerprint: str, indicator) -> Tuple:
+    return (fingerprint, type(indicator).__name__, indicator.period, getattr(indicator, "column", None))
+
+
+def indicator_series(df: pd.DataFrame, indicator) -> pd.Series:
+    # indicator.batch(df) through the cache; indicator is left primed for update(bar) either way
+    fp = dataset_key(df)
+    if fp is None:
+        return indicator.batch(df)
+    key = indicator_key(fp, indicator)
+    entry = _cache.get(key)
+    if entry is not None:
+        values, primed = entry
+        indicator.__dict__.update(copy.deepcopy(primed.__dict__))
+        return pd.Series(values, index=df.index, name=getattr(indicator, "column", None))
+    series = indicator.batch(df)
+    _cache.put(key, series.to_numpy(dtype=float, copy=True), indicator)
+    return series
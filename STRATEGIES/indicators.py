@@ -0,0 +1,253 @@
+# STRATEGIES/indicators.py
+# Indicators that keep their running state.
+# batch(df) computes the whole history at once (vectorized, same numbers as the pandas
+# expressions used elsewhere) and leaves the indicator ready for update(bar), which folds in
+# one new bar in O(1) - new bars and live data never recompute the full column.
+# bar is anything indexable by column name: a dict, a DataFrame row, a namedtuple's _asdict().
+import copy
+from collections import deque
+from typing import Mapping
+import numpy as np
+import pandas as pd
+
+NaN = float("nan")
+
+
+class _EwmState:
+    # pandas ewm(..., adjust=False).mean() one value at a time, including its handling of
+    # NaNs: the previous weight decays over missing values and is renormalised on the next one
+    def __init__(self, alpha: float, min_periods: int = 1):
+        self.alpha = alpha
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NaN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def seed(self, values: np.ndarray, result: np.ndarray):
+        # Running state after values, given pandas' result for them
+        observed = ~np.isnan(values)
+        self.nobs = int(observed.sum())
+        if not self.nobs:
+            return
+        last = int(np.flatnonzero(observed)[-1])
+        trailing_missing = len(values) - 1 - last
+        self.weighted = float(result[last]) if self.nobs >= self.min_periods else self._replay(values)
+        self.old_wt = (1.0 - self.alpha) ** trailing_missing
+
+    def _replay(self, values: np.ndarray) -> float:
+        # Only reached while still short of min_periods, so values holds few observations
+        state = _EwmState(self.alpha)
+        for v in values:
+            state.update(float(v))
+        return state.weighted
+
+    def update(self, value: float) -> float:
+        observed = value == value
+        self.nobs += observed
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if observed:
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * value) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif observed:
+            self.weighted = value
+        return self.weighted if self.nobs >= self.min_periods else NaN
+
+
+class EMA:
+    # Same values as df["Close"].ewm(span=period, adjust=False).mean()
+    def __init__(self, period: int, column: str = "Close"):
+        self.period = period
+        self.column = column
+        self.value = NaN
+        self._ewm = _EwmState(2.0 / (period + 1.0))
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        close = df[self.column].astype(float)
+        out = close.ewm(span=self.period, adjust=False).mean()
+        self._ewm = _EwmState(2.0 / (self.period + 1.0))
+        self._ewm.seed(close.to_numpy(), out.to_numpy())
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
+
+    def update(self, bar: Mapping) -> float:
+        self.value = self._ewm.update(float(bar[self.column]))
+        return self.value
+
+    def peek(self, bar: Mapping) -> float:
+        # What update(bar) would return, without taking the bar in (a candle that is still open)
+        return copy.copy(self._ewm).update(float(bar[self.column]))
+
+
+class SMA:
+    # Same values as df["Close"].rolling(period).mean() (to float rounding)
+    def __init__(self, period: int, column: str = "Close"):
+        self.period = period
+        self.column = column
+        self.value = NaN
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._count = 0  # non-NaN values in the window
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        close = df[self.column].astype(float)
+        out = close.rolling(self.period).mean()
+        tail = close.to_numpy()[-self.period:]
+        self._window = deque(tail.tolist(), maxlen=self.period)
+        self._sum = float(np.nansum(tail))
+        self._count = int((~np.isnan(tail)).sum())
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
+
+    def update(self, bar: Mapping) -> float:
+        value = float(bar[self.column])
+        if len(self._window) == self.period:
+            dropped = self._window[0]
+            if dropped == dropped:
+                self._sum -= dropped
+                self._count -= 1
+        self._window.append(value)
+        if value == value:
+            self._sum += value
+            self._count += 1
+        self.value = self._sum / self._count if self._count >= self.period else NaN
+        return self.value
+
+
+class RSI:
+    # Wilder's RSI: gains and losses smoothed with alpha = 1/period
+    def __init__(self, period: int = 14, column: str = "Close"):
+        self.period = period
+        self.column = column
+        self.value = NaN
+        self._prev = NaN
+        self._gain = _EwmState(1.0 / period, period)
+        self._loss = _EwmState(1.0 / period, period)
+
+    @staticmethod
+    def _rsi(gain, loss):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + gain / loss))
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        close = df[self.column].astype(float)
+        delta = close.diff()
+        gain, loss = delta.clip(lower=0), (-delta).clip(lower=0)
+        avg_gain = gain.ewm(alpha=1.0 / self.period, adjust=False, min_periods=self.period).mean()
+        avg_loss = loss.ewm(alpha=1.0 / self.period, adjust=False, min_periods=self.period).mean()
+        out = pd.Series(self._rsi(avg_gain.to_numpy(), avg_loss.to_numpy()), index=df.index)
+        self._gain = _EwmState(1.0 / self.period, self.period)
+        self._loss = _EwmState(1.0 / self.period, self.period)
+        self._gain.seed(gain.to_numpy(), avg_gain.to_numpy())
+        self._loss.seed(loss.to_numpy(), avg_loss.to_numpy())
+        self._prev = float(close.iloc[-1]) if len(close) else NaN
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
+
+    def update(self, bar: Mapping) -> float:
+        close = float(bar[self.column])
+        delta = close - self._prev
+        self._prev = close
+        gain = self._gain.update(max(delta, 0.0) if delta == delta else NaN)
+        loss = self._loss.update(max(-delta, 0.0) if delta == delta else NaN)
+        self.value = float(self._rsi(gain, loss))
+        return self.value
+
+
+class ATR:
+    # Wilder's average true range; the first bar's true range is its high - low
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.value = NaN
+        self._prev_close = NaN
+        self._ewm = _EwmState(1.0 / period, period)
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        high, low, close = (df[c].astype(float) for c in ("High", "Low", "Close"))
+        prev = close.shift(1)
+        tr = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1).max(axis=1)
+        out = tr.ewm(alpha=1.0 / self.period, adjust=False, min_periods=self.period).mean()
+        self._ewm = _EwmState(1.0 / self.period, self.period)
+        self._ewm.seed(tr.to_numpy(), out.to_numpy())
+        self._prev_close = float(close.iloc[-1]) if len(close) else NaN
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
+
+    def update(self, bar: Mapping) -> float:
+        high, low, close = float(bar["High"]), float(bar["Low"]), float(bar["Close"])
+        prev = self._prev_close
+        # like pandas' max(axis=1): NaN legs are skipped
+        legs = [v for v in (high - low, abs(high - prev), abs(low - prev)) if v == v]
+        tr = max(legs) if legs else NaN
+        self._prev_close = close
+        self.value = self._ewm.update(tr)
+        return self.value
+
+
+class _RollingExtreme:
+    # Monotonic deque of (bar number, value): amortised O(1) per bar
+    def __init__(self, period: int, column: str, keep_if):
+        self.period = period
+        self.column = column
+        self.value = NaN
+        self._keep_if = keep_if   # keep_if(old, new): True if old can still be the extreme once new arrives
+        self._deque = deque()
+        self._seen = deque(maxlen=period)  # non-NaN flags of the window, pandas needs period real values
+        self._valid = 0
+        self._n = 0
+
+    def _push(self, value: float):
+        if value == value:
+            while self._deque and not self._keep_if(self._deque[-1][1], value):
+                self._deque.pop()
+            self._deque.append((self._n, value))
+        if len(self._seen) == self.period:
+            self._valid -= self._seen[0]
+        self._seen.append(value == value)
+        self._valid += value == value
+        while self._deque and self._deque[0][0] <= self._n - self.period:
+            self._deque.popleft()
+        self._n += 1
+
+    def _current(self) -> float:
+        return self._deque[0][1] if self._deque and self._valid >= self.period else NaN
+
+    def _seed(self, values: np.ndarray):
+        self._deque.clear()
+        self._seen.clear()
+        self._valid = 0
+        self._n = len(values) - len(values[-self.period:])
+        for v in values[-self.period:]:
+            self._push(float(v))
+
+    def update(self, bar: Mapping) -> float:
+        self._push(float(bar[self.column]))
+        self.value = self._current()
+        return self.value
+
+
+class RollingHigh(_RollingExtreme):
+    # Same values as df["High"].rolling(period).max()
+    def __init__(self, period: int, column: str = "High"):
+        super().__init__(period, column, lambda old, new: old > new)
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        values = df[self.column].astype(float)
+        out = values.rolling(self.period).max()
+        self._seed(values.to_numpy())
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
+
+
+class RollingLow(_RollingExtreme):
+    # Same values as df["Low"].rolling(period).min()
+    def __init__(self, period: int, column: str = "Low"):
+        super().__init__(period, column, lambda old, new: old < new)
+
+    def batch(self, df: pd.DataFrame) -> pd.Series:
+        values = df[self.column].astype(float)
+        out = values.rolling(self.period).min()
+        self._seed(values.to_numpy())
+        self.value = float(out.iloc[-1]) if len(out) else NaN
+        return out
@@ -0,0 +1,121 @@
+# STRATEGIES/kernels.py
+# Path-dependent scans of the confluence strategy: "first bar from here on where ...".
+# They depend on where the previous phase ended, so they can't be one vectorized pass over the data.
+# With Numba installed each scan is a compiled loop over contiguous float64 arrays that stops at the
+# hit; without it (or with BACKTEST_NO_JIT=1) the same scans run as NumPy comparisons on doubling
+# blocks. Both return the same index: the comparisons are identical, NaN never counts as a hit.
+# Every scan returns -1 when nothing is found before the end of the data.
+import os
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # optional dependency
+    HAVE_NUMBA = False
+
+USE_JIT = HAVE_NUMBA and os.environ.get("BACKTEST_NO_JIT", "") not in ("1", "true", "yes")
+
+
+def as_kernel_array(a) -> np.ndarray:
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+# ----- plain loops, compiled by Numba -----
+
+def _inside_loop(close, low, high, start):
+    for n in range(start, close.shape[0]):
+        c = close[n]
+        if low < c and c < high:
+            return n
+    return -1
+
+
+def _outside_loop(close, low, high, start):
+    for n in range(start, close.shape[0]):
+        c = close[n]
+        if c <= low or c >= high:
+            return n
+    return -1
+
+
+def _exit_loop(high, low, start, tp_px, stop_px, is_long):
+    # TP is checked before SL on the same candle; returns (bar, hit_tp)
+    for n in range(start, high.shape[0]):
+        if is_long:
+            hit_tp = high[n] >= tp_px
+            hit_sl = low[n] <= stop_px
+        else:
+            hit_tp = low[n] <= tp_px
+            hit_sl = high[n] >= stop_px
+        if hit_tp:
+            return n, True
+        if hit_sl:
+            return n, False
+    return -1, False
+
+
+# ----- NumPy fallback -----
+
+def first_index(hits_in, start: int, stop: int, chunk: int = 256) -> int:
+    # First bar in [start, stop) where hits_in(lo, hi) is True, or -1.
+    # Scans in doubling blocks so each step is one vectorized comparison,
+    # cost is proportional to how far away the hit is rather than the length of the data.
+    lo = start
+    while lo < stop:
+        hi = min(stop, lo + chunk)
+        hits = hits_in(lo, hi)
+        first = int(hits.argmax())
+        if hits[first]:
+            return lo + first
+        lo = hi
+        chunk = min(chunk * 2, 1 << 16)
+    return -1
+
+
+def _inside_numpy(close, low, high, start):
+    return first_index(lambda a, b: (low < close[a:b]) & (close[a:b] < high), start, len(close))
+
+
+def _outside_numpy(close, low, high, start):
+    return first_index(lambda a, b: (close[a:b] <= low) | (close[a:b] >= high), start, len(close))
+
+
+def _exit_numpy(high, low, start, tp_px, stop_px, is_long):
+    if is_long:
+        hit_tp = lambda a, b: high[a:b] >= tp_px
+        hit_sl = lambda a, b: low[a:b] <= stop_px
+    else:
+        hit_tp = lambda a, b: low[a:b] <= tp_px
+        hit_sl = lambda a, b: high[a:b] >= stop_px
+    m = first_index(lambda a, b: hit_tp(a, b) | hit_sl(a, b), start, len(high))
+    return (m, bool(hit_tp(m, m + 1)[0])) if m >= 0 else (-1, False)
+
+
+if HAVE_NUMBA:
+    _inside_jit = njit(cache=True, nogil=True)(_inside_loop)
+    _outside_jit = njit(cache=True, nogil=True)(_outside_loop)
+    _exit_jit = njit(cache=True, nogil=True)(_exit_loop)
+
+
+def scan_inside(close: np.ndarray, low: float, high: float, start: int, jit: bool = USE_JIT) -> int:
+    # First close strictly inside (low, high): the retrace into the gap
+    if jit and HAVE_NUMBA:
+        return int(_inside_jit(close, float(low), float(high), int(start)))
+    return _inside_numpy(close, low, high, start)
+
+
+def scan_outside(close: np.ndarray, low: float, high: float, start: int, jit: bool = USE_JIT) -> int:
+    # First close at or beyond either edge: the confirmation
+    if jit and HAVE_NUMBA:
+        return int(_outside_jit(close, float(low), float(high), int(start)))
+    return _outside_numpy(close, low, high, start)
+
+
+def scan_exit(high: np.ndarray, low: np.ndarray, start: int, tp_px: float, stop_px: float, is_long: bool,
+              jit: bool = USE_JIT):
+    # First bar that reaches TP or SL -> (bar, hit_tp), (-1, False) if the trade is still open at the end
+    if jit and HAVE_NUMBA:
+        m, tp = _exit_jit(high, low, int(start), float(tp_px), float(stop_px), bool(is_long))
+        return int(m), bool(tp)
+    return _exit_numpy(high, low, start, tp_px, stop_px, is_long)
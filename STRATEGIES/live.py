@@ -0,0 +1,155 @@
+# STRATEGIES/live.py
+# The strategies as state machines that take one closed bar at a time, for live mode.
+# on_bar(bar) does O(1) work (plus the open trades) and returns the events it produced:
+#   {"kind": "setup", "bar": n, "side": LONG/SHORT}
+#   {"kind": "trade", "side", "entry_bar", "exit_bar", "entry_px", "exit_px", "pnl", "balance", "time"}
+#   {"kind": "rejected", "side", "time"}  - balance below the trade size, trading stops
+# Fed the bars of a file one by one they produce the same trades, P&L and balances as the
+# batch versions in strategy_pt.py.
+from collections import deque
+from typing import List, Mapping, Optional
+import numpy as np
+from STRATEGIES.engine import LONG, SHORT
+from STRATEGIES.indicators import EMA
+from STRATEGIES.strategy_pt import ConfluenceParams
+
+
+class _Account:
+    # Same rule as engine.settle_trades: a trade is taken while the balance covers trade_size,
+    # after the first rejection nothing changes any more
+    def __init__(self, trade_size: float, leverage: float, starting_balance: float):
+        self.trade_size = trade_size
+        self.leverage = leverage
+        self.balance = starting_balance
+        self.halted = False
+        self.trades = 0
+
+    def settle(self, side: int, pct_move: float, event: dict) -> dict:
+        if self.halted or not self.balance >= self.trade_size:
+            self.halted = True
+            return {"kind": "rejected", "side": side, "time": event.get("time")}
+        pnl = (self.trade_size * self.leverage) * (pct_move / 100)  # NaN moves poison the balance, as in the batch run
+        self.balance = self.balance + pnl
+        self.trades += 1
+        return dict(event, kind="trade", side=side, pnl=pnl, balance=self.balance)
+
+
+class SimpleStrategyLive:
+    # Even bars give the direction, the following odd bar is held from open to close
+    def __init__(self, trade_size: float = 1000.0, leverage: float = 10.0, starting_balance: float = 100000.0):
+        self.account = _Account(trade_size, leverage, starting_balance)
+        self.n = 0
+        self._signal = 0
+
+    def on_bar(self, bar: Mapping) -> List[dict]:
+        n = self.n
+        self.n += 1
+        o, c = np.float64(bar["Open"]), np.float64(bar["Close"])
+        if n % 2 == 0:
+            self._signal = LONG if o - c < 0 else SHORT
+            return []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (c - o) / o * 100
+        if self._signal != LONG:
+            pct = 0 - pct
+        event = {"entry_bar": n, "exit_bar": n, "entry_px": o, "exit_px": c, "time": bar.get("Date")}
+        return [self.account.settle(self._signal, pct, event)]
+
+
+class ConfluenceLive:
+    # Same phases as resolve_confluence_trades, each setup advanced by every new bar:
+    # FVG found -> retrace into the gap -> confirmation close outside it -> TP/SL.
+    # The next FVG is only looked for from the retrace bar of the previous one on, and trades are
+    # settled in setup order (a later setup can close first, its P&L waits for the earlier one).
+    # One difference at the end of the data: the batch version stops looking for new setups once a
+    # setup never confirms, live mode can't know "never" and keeps going.
+    def __init__(self, params: Optional[ConfluenceParams] = None):
+        self.params = params or ConfluenceParams()
+        self.account = _Account(self.params.trade_risk_cash, self.params.leverage, self.params.starting_balance)
+        self.ema = EMA(self.params.ema_period)
+        self.n = 0
+        self._recent = deque(maxlen=3)   # (open, high, low, close, ema) of the last three bars
+        self._scan_from = self.params.ema_period
+        self._retracing: Optional[dict] = None  # the newest setup, until its retrace bar
+        self._setups: deque = deque()           # every unsettled setup, in the order found
+
+    def _candidate(self) -> Optional[dict]:
+        # Does the bar two back start an FVG in the trend direction, 1% away from the EMA?
+        (o0, h0, l0, c0, e0), (o1, _, _, c1, _), (o2, h2, l2, c2, _) = self._recent
+        i = self.n - 2
+        below = c0 < e0
+        if below and (e0 / c0 - 1.0) * 100.0 >= 1.0 and c0 > o0 and c1 > o1 and c2 > o2 and h0 < l2:
+            return {"i": i, "side": LONG, "low": h0, "high": l2, "phase": "retrace"}
+        if not below and (c0 / e0 - 1.0) * 100.0 >= 1.0 and c0 < o0 and c1 < o1 and c2 < o2 and l0 > h2:
+            return {"i": i, "side": SHORT, "low": h2, "high": l0, "phase": "retrace"}
+        return None
+
+    def _advance(self, s: dict, n: int, h: float, l: float, c: float, time) -> bool:
+        # Move one setup forward by bar n, True once it is resolved (trade closed or no trade)
+        if s["phase"] == "retrace":
+            if n >= s["i"] + 3 and s["low"] < c < s["high"]:
+                s["phase"] = "confirm"
+                self._scan_from = max(s["i"] + 1, n)
+                self._retracing = None
+            return False
+        if s["phase"] == "confirm":
+            if c <= s["low"] or c >= s["high"]:
+                rr = self.params.reward_ratio
+                if s["side"] == LONG and c >= s["high"]:
+                    risk = (c - s["low"]) / c
+                    s.update(stop=s["low"], tp=c * (1 + rr * risk))
+                elif s["side"] == SHORT and c <= s["low"]:
+                    risk = (s["high"] - c) / c
+                    s.update(stop=s["high"], tp=c * (1 - rr * risk))
+                else:
+                    risk = 0.0
+                if not risk * 100.0 > 0:
+                    s["phase"] = "done"
+                    return True
+                s.update(phase="open", entry_bar=n, entry_px=c)
+            return False
+        if s["phase"] == "open":
+            # TP is checked before SL on the same candle
+            if s["side"] == LONG:
+                hit_tp, hit_sl = h >= s["tp"], l <= s["stop"]
+            else:
+                hit_tp, hit_sl = l <= s["tp"], h >= s["stop"]
+            if hit_tp or hit_sl:
+                s.update(phase="closed", exit_bar=n, exit_px=s["tp"] if hit_tp else s["stop"], time=time)
+                return True
+        return s["phase"] in ("done", "closed")
+
+    def on_bar(self, bar: Mapping) -> List[dict]:
+        n = self.n
+        o, h, l, c = (np.float64(bar[k]) for k in ("Open", "High", "Low", "Close"))
+        e = np.float64(self.ema.update(bar))
+        events = []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._step(n, o, h, l, c, e, bar.get("Date"), events)
+        self.n += 1
+        return events
+
+    def _step(self, n: int, o, h, l, c, e, time, events: List[dict]):
+        for s in list(self._setups):
+            self._advance(s, n, h, l, c, time)
+
+        self._recent.append((o, h, l, c, e))
+        if self._retracing is None and len(self._recent) == 3 and n - 2 >= self._scan_from:
+            s = self._candidate()
+            if s is not None:
+                self._retracing = s
+                self._setups.append(s)
+                events.append({"kind": "setup", "bar": s["i"], "side": s["side"]})
+
+        # settle finished setups from the front, in the order they were found
+        while self._setups and self._setups[0]["phase"] in ("done", "closed"):
+            s = self._setups.popleft()
+            if s["phase"] == "closed":
+                direction = 100.0 if s["side"] == LONG else -100.0
+                pct = (s["exit_px"] / s["entry_px"] - 1.0) * direction
+                events.append(self.account.settle(s["side"], pct, {
+                    "entry_bar": s["entry_bar"], "exit_bar": s["exit_bar"], "entry_px": s["entry_px"],
+                    "exit_px": s["exit_px"], "time": s["time"]}))
+
+    def open_trades(self) -> List[dict]:
+        return [s for s in self._setups if s["phase"] == "open"]
@@ -0,0 +1,277 @@
+# STRATEGIES/metrics.py
+# Performance metrics of a backtest, vectorized over NumPy arrays (no Python loop over bars or trades).
+# Return based figures use the per-bar equity curve (engine.equity_curve), annualised for a market
+# that trades around the clock; trade based figures use the trade log's P&L.
+# The strategies attach performance_metrics(...) to their results frame as results.attrs["metrics"],
+# and the rolling versions with the time of every value as results.attrs["rolling"].
+import warnings
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from STRATEGIES.engine import TradeLog, equity_curve
+
+YEAR_SECONDS = 365 * 86_400
+METRIC_COLUMNS = ("Total Return %", "CAGR %", "Sharpe", "Sortino", "Calmar", "Max Drawdown %",
+                  "Max DD Duration (bars)", "Max DD Duration (days)", "Trades", "Win Rate %", "Profit Factor",
+                  "Expectancy", "Avg Win", "Avg Loss", "Exposure %")
+
+
+def bar_seconds(dates) -> float:
+    # Typical bar length from the first bars' timestamps (text or datetime), 0 if unknown
+    head = pd.to_datetime(pd.Series(np.asarray(dates)[:1000]), errors="coerce").dropna()
+    if len(head) < 2:
+        return 0.0
+    step = np.diff(head.to_numpy(dtype="datetime64[ns]").view("int64"))
+    step = step[step > 0]
+    return float(np.median(step)) / 1e9 if len(step) else 0.0
+
+
+def bar_returns(equity: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(equity) / equity[:-1]
+
+
+def drawdown(equity: np.ndarray) -> np.ndarray:
+    # Fraction below the running peak (0 at a new high, negative below it)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return equity / np.maximum.accumulate(equity) - 1.0
+
+
+def longest_underwater(equity: np.ndarray) -> int:
+    # Longest run of bars spent below an earlier peak
+    under = equity < np.maximum.accumulate(equity)
+    if not under.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.r_[0, under.astype(np.int8), 0]))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def exposure(entry_idx: np.ndarray, exit_idx: np.ndarray, length: int) -> float:
+    # Share of bars with at least one open trade (entry to exit bar inclusive, overlaps counted once)
+    if length == 0 or len(entry_idx) == 0:
+        return 0.0
+    marks = np.zeros(length + 1, dtype=np.int64)
+    np.add.at(marks, np.asarray(entry_idx, dtype=np.int64), 1)
+    np.add.at(marks, np.asarray(exit_idx, dtype=np.int64) + 1, -1)
+    return float((np.cumsum(marks[:-1]) > 0).mean())
+
+
+def _annualised(mean: float, scale: float, periods: float) -> float:
+    return float(mean / scale * np.sqrt(periods)) if scale > 0 and periods > 0 else float("nan")
+
+
+def performance_metrics(trades: TradeLog, length: int, starting_balance: float, bar_secs: float = 0.0) -> Dict[str, float]:
+    # Headline numbers of one run; length is the number of bars the strategy ran over
+    equity = equity_curve(trades, length, starting_balance)
+    periods = YEAR_SECONDS / bar_secs if bar_secs > 0 else 0.0
+    r = bar_returns(equity) if length > 1 else np.empty(0)
+    r = r[np.isfinite(r)]
+    final = float(equity[-1]) if length else starting_balance
+    total = final / starting_balance - 1.0
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        years = (length - 1) / periods if periods else 0.0
+        cagr = float((final / starting_balance) ** (1.0 / years) - 1.0) if years > 0 and final > 0 else float("nan")
+        dd = drawdown(equity) if length else np.zeros(1)
+        max_dd = float(np.nanmin(dd)) if np.isfinite(dd).any() else 0.0
+        downside = float(np.sqrt(np.mean(np.minimum(r, 0.0) ** 2))) if len(r) else 0.0
+        pnl = trades.pnl
+        wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+        gross_loss = -losses.sum()
+
+        under = longest_underwater(equity) if length else 0
+        return {
+            "Total Return %": total * 100.0,
+            "CAGR %": cagr * 100.0,
+            "Sharpe": _annualised(r.mean(), r.std(), periods) if len(r) else float("nan"),
+            "Sortino": _annualised(r.mean(), downside, periods) if len(r) else float("nan"),
+            "Calmar": cagr / -max_dd if max_dd < 0 else float("nan"),
+            "Max Drawdown %": max_dd * 100.0,
+            "Max DD Duration (bars)": under,
+            "Max DD Duration (days)": under * bar_secs / 86_400,
+            "Trades": len(pnl),
+            "Win Rate %": float(len(wins) / len(pnl) * 100.0) if len(pnl) else 0.0,
+            "Profit Factor": float(wins.sum() / gross_loss) if gross_loss > 0 else (float("inf") if len(wins) else float("nan")),
+            "Expectancy": float(pnl.mean()) if len(pnl) else 0.0,
+            "Avg Win": float(wins.mean()) if len(wins) else 0.0,
+            "Avg Loss": float(losses.mean()) if len(losses) else 0.0,
+            "Exposure %": exposure(trades.entry_idx, trades.exit_idx, length) * 100.0,
+        }
+
+
+# ----- rolling versions -----
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    # Sum of the last window values at every position, NaN until the window is full
+    out = np.full(len(x), np.nan)
+    if window <= len(x):
+        c = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+        out[window - 1:] = c[window:] - c[:-window]
+    return out
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    # Max of the last window values, O(n) for any window (van Herk / Gil-Werman blocks)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window < 1 or window > n:
+        return out
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, -np.inf)
+    padded[:n] = x
+    grid = padded.reshape(blocks, window)
+    prefix = np.maximum.accumulate(grid, axis=1).ravel()
+    suffix = np.maximum.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def rolling_metrics(trades: TradeLog, length: int, starting_balance: float, bar_secs: float = 0.0,
+                    window_bars: int = 2016, window_trades: int = 50) -> Dict[str, np.ndarray]:
+    # The same figures over a moving window. Bar based ones ("Sharpe", "Sortino", "Return %",
+    # "Drawdown %", "Max Drawdown %", "Calmar", "Exposure %") have one value per bar, trade based
+    # ones ("Win Rate %", "Profit Factor", "Expectancy") one per trade; NaN until the window is full.
+    # Drawdown is measured from the highest balance inside the window.
+    equity = equity_curve(trades, length, starting_balance)
+    periods = YEAR_SECONDS / bar_secs if bar_secs > 0 else 0.0
+    r = np.r_[0.0, bar_returns(equity)] if length else np.empty(0)
+    r = np.where(np.isfinite(r), r, 0.0)
+    w = max(2, int(window_bars))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        mean = _rolling_sum(r, w) / w
+        var = np.maximum(_rolling_sum(r * r, w) / w - mean * mean, 0.0)
+        down = np.sqrt(_rolling_sum(np.minimum(r, 0.0) ** 2, w) / w)
+        scale = np.sqrt(periods) if periods else np.nan
+        window_dd = equity / rolling_max(equity, w) - 1.0
+        worst_dd = -rolling_max(-window_dd, w)
+        ret = np.full(length, np.nan)
+        ret[w - 1:] = equity[w - 1:] / equity[:length - w + 1] - 1.0 if w <= length else np.nan
+        annual = (1.0 + ret) ** (periods / (w - 1)) - 1.0 if periods else np.full(length, np.nan)
+
+        held = np.zeros(length + 1, dtype=np.int64)
+        if len(trades):
+            np.add.at(held, trades.entry_idx.astype(np.int64), 1)
+            np.add.at(held, trades.exit_idx.astype(np.int64) + 1, -1)
+        in_market = (np.cumsum(held[:-1]) > 0).astype(np.float64)
+
+        pnl = trades.pnl
+        k = max(1, int(window_trades))
+        gains = _rolling_sum(np.maximum(pnl, 0.0), k)
+        losses = -_rolling_sum(np.minimum(pnl, 0.0), k)
+        return {
+            "Sharpe": mean / np.sqrt(var) * scale,
+            "Sortino": mean / down * scale,
+            "Return %": ret * 100.0,
+            "Drawdown %": window_dd * 100.0,
+            "Max Drawdown %": worst_dd * 100.0,
+            "Calmar": annual / -worst_dd,
+            "Exposure %": _rolling_sum(in_market, w) / w * 100.0,
+            "Win Rate %": _rolling_sum((pnl > 0).astype(np.float64), k) / k * 100.0,
+            "Profit Factor": gains / losses,
+            "Expectancy": _rolling_sum(pnl, k) / k,
+        }
+
+
+ROLLING_TRADE_COLUMNS = ("Win Rate %", "Profit Factor", "Expectancy")
+ROLLING_COLUMNS = ("Sharpe", "Sortino", "Return %", "Drawdown %", "Max Drawdown %", "Calmar",
+                   "Exposure %") + ROLLING_TRADE_COLUMNS
+
+
+@dataclass(frozen=True)
+class RollingMetrics:
+    bar_ns: np.ndarray              # int64 epoch ns of every bar (NaT as int64 min)
+    trade_ns: np.ndarray            # time of the exit bar of every trade
+    values: Dict[str, np.ndarray]   # rolling_metrics(...)
+
+    def series(self, name: str):
+        # (times, values) of one of ROLLING_COLUMNS, only the points with a value
+        times = self.trade_ns if name in ROLLING_TRADE_COLUMNS else self.bar_ns
+        values = self.values[name]
+        ok = np.isfinite(values) & (times != np.iinfo(np.int64).min)
+        return times[ok], values[ok]
+
+    def __deepcopy__(self, memo):
+        # Never modified once built; pandas deep-copies attrs into every frame derived from the results
+        return self
+
+
+def rolling_series(trades: TradeLog, length: int, starting_balance: float, dates) -> RollingMetrics:
+    # rolling_metrics over the bars of dates (one per bar the strategy ran over)
+    bar_ns = pd.to_datetime(pd.Series(np.asarray(dates)), errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+    values = rolling_metrics(trades, length, starting_balance, bar_seconds(dates))
+    return RollingMetrics(bar_ns, bar_ns[trades.exit_idx.astype(np.int64)], values)
+
+
+# ----- against benchmarks -----
+
+RELATIVE_COLUMNS = ("Benchmark Return %", "Excess Return %", "Alpha % (ann.)", "Beta", "Correlation",
+                    "Tracking Error %", "Information Ratio")
+
+
+def relative_metrics(equity: np.ndarray, benchmarks: Dict[str, np.ndarray], bar_secs: float = 0.0) -> pd.DataFrame:
+    # The run against each benchmark, all benchmarks in one pass: equity and every benchmark are
+    # prices on the same bar grid (NaN where a benchmark has no value yet). Returns one row per
+    # benchmark (index = name), columns RELATIVE_COLUMNS; alpha and tracking error are annualised.
+    names = list(benchmarks)
+    if not names or len(equity) < 2:
+        return pd.DataFrame(columns=RELATIVE_COLUMNS, index=pd.Index(names, name="Benchmark"), dtype=float)
+    periods = YEAR_SECONDS / bar_secs if bar_secs > 0 else np.nan
+    prices = np.column_stack([np.asarray(benchmarks[n], dtype=np.float64) for n in names])
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # a benchmark with no overlap is all NaN
+        rb = np.diff(prices, axis=0) / prices[:-1]
+        rs = np.broadcast_to(bar_returns(np.asarray(equity, dtype=np.float64))[:, None], rb.shape).copy()
+        both = np.isfinite(rb) & np.isfinite(rs)
+        rb[~both] = np.nan
+        rs[~both] = np.nan
+        mean_b, mean_s = np.nanmean(rb, axis=0), np.nanmean(rs, axis=0)
+        cov = np.nanmean((rs - mean_s) * (rb - mean_b), axis=0)
+        var_b, var_s = np.nanvar(rb, axis=0), np.nanvar(rs, axis=0)
+        beta = cov / var_b
+        active = rs - rb
+        te = np.nanstd(active, axis=0)
+        # growth over the bars where both exist, compounded from the returns
+        growth_b = np.exp(np.nansum(np.log1p(rb), axis=0)) - 1.0
+        growth_s = np.exp(np.nansum(np.log1p(rs), axis=0)) - 1.0
+        table = pd.DataFrame({
+            "Benchmark Return %": growth_b * 100.0,
+            "Excess Return %": (growth_s - growth_b) * 100.0,
+            "Alpha % (ann.)": (mean_s - beta * mean_b) * periods * 100.0,
+            "Beta": beta,
+            "Correlation": cov / np.sqrt(var_b * var_s),
+            "Tracking Error %": te * np.sqrt(periods) * 100.0,
+            "Information Ratio": np.nanmean(active, axis=0) / te * np.sqrt(periods),
+        }, index=pd.Index(names, name="Benchmark"))
+    table.loc[~both.any(axis=0)] = np.nan
+    return table
+
+
+def results_starting_balance(results: pd.DataFrame) -> float:
+    # Balance before the first trade, from the first row of a results frame
+    cum_pct = float(results["Cumulative Percentage Returns"].iloc[0])
+    return float(results["Account Balance"].iloc[0] / (1.0 + cum_pct / 100.0))
+
+
+def results_equity(results: pd.DataFrame):
+    # (exit times as int64 ns, sorted; balance from each exit on) of a results frame. Overlapping trades
+    # can close out of the order they were taken in; the balance at an exit is the one after the latest
+    # trade (in results order) closed so far, the step function engine.equity_curve draws per bar
+    done = results.dropna(subset=["Date", "Account Balance"])
+    times = done["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+    order = np.argsort(times, kind="stable")
+    latest = np.maximum.accumulate(order) if len(order) else order
+    return times[order], done["Account Balance"].to_numpy(dtype=np.float64)[latest]
+
+
+def attach_metrics(results: pd.DataFrame, trades: TradeLog, length: int, starting_balance: float,
+                   dates=None) -> pd.DataFrame:
+    results.attrs["metrics"] = performance_metrics(trades, length, starting_balance,
+                                                   bar_seconds(dates) if dates is not None else 0.0)
+    if dates is not None:
+        results.attrs["rolling"] = rolling_series(trades, length, starting_balance, dates)
+    return results
+
+
+def results_metrics(results: Optional[pd.DataFrame]) -> Optional[Dict[str, float]]:
+    return None if results is None else results.attrs.get("metrics")
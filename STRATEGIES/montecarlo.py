@@ -0,0 +1,194 @@
+# STRATEGIES/montecarlo.py
+# Monte Carlo robustness check of a finished run: the same trades in a different order.
+# "shuffle" reorders the trade P&Ls (same trades, same final balance, different path and drawdown),
+# "bootstrap" draws the trades with replacement (final balance varies too). Paths are built a
+# batch at a time as one (paths x trades) cumsum, batches are spread over a process pool.
+# Each path is kept only at FAN_POINTS evenly spaced trades, which is all the fan chart needs.
+# With Numba (see kernels.py) a batch is one compiled pass per path instead of NumPy temporaries;
+# a seed gives the same paths on every run, but not the same ones with and without Numba.
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+from STRATEGIES.kernels import HAVE_NUMBA, USE_JIT
+from STRATEGIES.metrics import results_starting_balance
+from STRATEGIES.progress import ProgressFn, report
+
+MC_METHODS = ("shuffle", "bootstrap")
+FAN_POINTS = 200                        # trades each path is sampled at for the bands
+BATCH_CELLS = 4_000_000                 # paths x trades built at once (~32 MB of float64)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Pool processes are spawned, not forked: the pool is started from a job's worker thread while
+# the app's other threads (DearPyGui, the render and tooltip threads) are running
+_mp = mp.get_context("spawn")
+
+# trade P&L for the worker processes, set once per worker by _init_worker
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    paths: int
+    starting_balance: float
+    steps: np.ndarray               # trade numbers (1-based) the bands are sampled at
+    bands: Dict[int, np.ndarray]    # percentile -> balance at each of steps
+    final: np.ndarray               # final balance of every path
+    max_drawdown: np.ndarray        # max drawdown % of every path (negative)
+
+    def summary(self) -> pd.DataFrame:
+        # Percentiles of final balance / return / drawdown, one row per percentile
+        final = np.percentile(self.final, PERCENTILES)
+        dd = np.percentile(self.max_drawdown, PERCENTILES)
+        return pd.DataFrame({"Percentile": PERCENTILES, "Final Balance": final,
+                             "Return %": (final / self.starting_balance - 1.0) * 100.0,
+                             "Max Drawdown %": dd})
+
+    def loss_probability(self) -> float:
+        return float((self.final < self.starting_balance).mean() * 100.0)
+
+
+def trade_pnl(results: pd.DataFrame):
+    # (starting balance, P&L of every trade) from a results frame in the usual backtest format
+    balance = results["Account Balance"].to_numpy(dtype=np.float64)
+    if not len(balance):
+        raise ValueError("The run has no trades to resample")
+    start = results_starting_balance(results)
+    return start, np.diff(np.concatenate(([start], balance)))
+
+
+def fan_steps(trades: int, points: int = FAN_POINTS) -> np.ndarray:
+    return np.unique(np.linspace(0, trades, min(points, trades) + 1).round().astype(np.int64))
+
+
+def _path_stats_loop(pnl, order, shuffle, starting_balance, steps, final, max_dd, sampled):
+    # One pass per path: running balance, peak and worst drawdown, balance at each of steps.
+    # order is (paths, trades): trade indexes to draw, or with shuffle uniform [0, 1) draws that
+    # drive a Fisher-Yates shuffle of the trades.
+    paths, n = order.shape
+    buf = np.empty(n)
+    for j in range(paths):
+        if shuffle:
+            buf[:] = pnl
+            for i in range(n - 1, 0, -1):
+                k = int(order[j, i] * (i + 1))
+                buf[i], buf[k] = buf[k], buf[i]
+        else:
+            for i in range(n):
+                buf[i] = pnl[int(order[j, i])]
+        bal = starting_balance
+        peak = starting_balance
+        worst = 0.0
+        s = 0
+        if steps[0] == 0:
+            sampled[0, j] = bal
+            s = 1
+        for i in range(n):
+            bal += buf[i]
+            if bal > peak:
+                peak = bal
+            elif bal / peak - 1.0 < worst:
+                worst = bal / peak - 1.0
+            if s < steps.shape[0] and steps[s] == i + 1:
+                sampled[s, j] = bal
+                s += 1
+        final[j] = bal
+        max_dd[j] = worst * 100.0
+
+
+if HAVE_NUMBA:
+    from numba import njit
+    _path_stats_jit = njit(cache=True, nogil=True)(_path_stats_loop)
+
+
+def _path_stats_numpy(pnl, order, starting_balance, steps):
+    # Same figures with trades down the rows: cumsum and running max then work on whole rows of paths
+    equity = pnl[order.T]
+    np.cumsum(equity, axis=0, out=equity)
+    equity += starting_balance
+    peak = equity.copy()
+    np.maximum(peak[0], starting_balance, out=peak[0])  # the starting balance is the first peak
+    for i in range(1, len(peak)):
+        np.maximum(peak[i - 1], peak[i], out=peak[i])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_dd = (np.divide(equity, peak, out=peak).min(axis=0) - 1.0) * 100.0
+    sampled = np.concatenate((np.full((1, equity.shape[1]), starting_balance), equity))[steps]
+    return equity[-1].copy(), np.minimum(max_dd, 0.0), sampled.astype(np.float32)
+
+
+def simulate_batch(pnl: np.ndarray, starting_balance: float, paths: int, method: str, seed,
+                   steps: np.ndarray, jit: bool = USE_JIT):
+    # (final balance, max drawdown % per path, balance at steps as (len(steps), paths) float32)
+    rng = np.random.default_rng(seed)
+    n = len(pnl)
+    if method not in MC_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method: {method}")
+    if jit and HAVE_NUMBA:
+        shuffle = method == "shuffle"
+        order = rng.random((paths, n)) if shuffle else rng.integers(0, n, size=(paths, n))
+        final, max_dd = np.empty(paths), np.empty(paths)
+        sampled = np.empty((len(steps), paths), dtype=np.float32)
+        _path_stats_jit(pnl, order, shuffle, float(starting_balance), steps, final, max_dd, sampled)
+        return final, max_dd, sampled
+    if method == "shuffle":
+        order = rng.permuted(np.broadcast_to(np.arange(n), (paths, n)), axis=1)
+    else:
+        order = rng.integers(0, n, size=(paths, n))
+    return _path_stats_numpy(pnl, order, starting_balance, steps)
+
+
+def _init_worker(data: Dict[str, np.ndarray]):
+    _worker_data.update(data)
+
+
+def _batch_in_worker(starting_balance, paths, method, seed, steps):
+    return simulate_batch(_worker_data["pnl"], starting_balance, paths, method, seed, steps)
+
+
+def monte_carlo(pnl: Sequence[float], starting_balance: float, paths: int = 10_000, method: str = "shuffle",
+                seed: Optional[int] = None, max_workers: Optional[int] = None,
+                progress: Optional[ProgressFn] = None) -> MonteCarloResult:
+    # progress is called with the number of paths finished after each batch.
+    # The result depends on seed, not on how many workers ran it.
+    if method not in MC_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method: {method}")
+    pnl = np.ascontiguousarray(pnl, dtype=np.float64)
+    if not len(pnl):
+        raise ValueError("The run has no trades to resample")
+    if paths < 1:
+        raise ValueError("Monte Carlo needs at least one path")
+
+    steps = fan_steps(len(pnl))
+    batch = max(1, min(paths, BATCH_CELLS // len(pnl)))
+    sizes = [min(batch, paths - a) for a in range(0, paths, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = min(max_workers or os.cpu_count() or 1, len(sizes))
+    parts = []
+    if workers <= 1:
+        for size, s in zip(sizes, seeds):
+            parts.append(simulate_batch(pnl, starting_balance, size, method, s, steps))
+            report(progress, sum(len(p[0]) for p in parts), paths)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp, initializer=_init_worker,
+                                   initargs=({"pnl": pnl},))
+        try:
+            futures = [pool.submit(_batch_in_worker, starting_balance, size, method, s, steps)
+                       for size, s in zip(sizes, seeds)]
+            for f in futures:
+                parts.append(f.result())
+                report(progress, sum(len(p[0]) for p in parts), paths)
+        finally:
+            # on cancel, drop the batches that haven't started
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    sampled = np.concatenate([p[2] for p in parts], axis=1)
+    levels = np.percentile(sampled, PERCENTILES, axis=1)
+    return MonteCarloResult(method=method, paths=paths, starting_balance=starting_balance, steps=steps,
+                            bands={q: levels[k].astype(np.float64) for k, q in enumerate(PERCENTILES)},
+                            final=np.concatenate([p[0] for p in parts]),
+                            max_drawdown=np.concatenate([p[1] for p in parts]))
@@ -0,0 +1,169 @@
+# STRATEGIES/portfolio.py
+# One strategy over many symbols with one account (shared capital).
+# Each symbol's trades come from the same pure cores as a single run (simple signals, confluence
+# setups), on that symbol's own bars of a data.panel.Panel. The trades are then replayed in time
+# order against one cash balance: opening a trade sets trade_risk_cash aside as margin, closing it
+# returns the margin plus its P&L. A trade that finds less free cash than that is skipped; later
+# trades (on any symbol) are still taken once enough cash is free again.
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from STRATEGIES.engine import LONG, TradeLog, trades_from_signals
+from STRATEGIES.kernels import HAVE_NUMBA, USE_JIT
+from STRATEGIES.metrics import attach_metrics
+from STRATEGIES.progress import ProgressFn, report
+from STRATEGIES.reporting import Reporter, reporter_or_null
+from STRATEGIES.strategy_pt import ConfluenceParams, compute_ema, resolve_confluence_trades, simple_signals
+from data.panel import Panel
+
+PORTFOLIO_STRATEGIES = ("simple", "confluence")
+
+# When inside a bar an order fills, for ordering entries and exits that share a bar
+AT_OPEN, INTRABAR, AT_CLOSE = 0, 1, 2
+
+
+def simple_trades(cols: Dict[str, np.ndarray], params: ConfluenceParams) -> dict:
+    # Enter at the open, exit at the close of the same bar
+    open_, close = cols["open"], cols["close"]
+    entry_idx, exit_idx, side = trades_from_signals(simple_signals(open_, close))
+    n = len(entry_idx)
+    return {"entry_idx": entry_idx, "exit_idx": exit_idx, "side": side,
+            "entry_px": open_[entry_idx], "exit_px": close[exit_idx],
+            "entry_at": np.full(n, AT_OPEN, dtype=np.int8), "exit_at": np.full(n, AT_CLOSE, dtype=np.int8)}
+
+
+def confluence_trades(cols: Dict[str, np.ndarray], params: ConfluenceParams) -> dict:
+    # Enter at the confirmation close, exit when TP/SL is touched (at the last close if never)
+    close = cols["close"]
+    found = {}
+    if len(close) >= params.ema_period + 3:
+        ema = compute_ema(close, params.ema_period)
+        _, found = resolve_confluence_trades(cols["open"], cols["high"], cols["low"], close, ema,
+                                             params.ema_period, params.reward_ratio)
+    if not found:
+        empty = np.empty(0, dtype=np.int64)
+        found = {"entry_idx": empty, "exit_idx": empty, "side": np.empty(0, dtype=np.int8),
+                 "entry_px": np.empty(0), "exit_px": np.empty(0)}
+    n = len(found["entry_idx"])
+    at_end = found["exit_idx"] == len(close) - 1
+    found["entry_at"] = np.full(n, AT_CLOSE, dtype=np.int8)
+    found["exit_at"] = np.where(at_end, AT_CLOSE, INTRABAR).astype(np.int8)
+    return found
+
+
+TRADE_SOURCES = {"simple": simple_trades, "confluence": confluence_trades}
+
+
+# ----- shared-capital allocation -----
+
+def _allocate_loop(order, is_exit, trade, pnl, trade_size, starting_balance):
+    # Walk the entry/exit events in time order, returns which trades were taken
+    taken = np.zeros(pnl.shape[0], dtype=np.bool_)
+    free = starting_balance
+    for q in range(order.shape[0]):
+        e = order[q]
+        t = trade[e]
+        if is_exit[e]:
+            if taken[t]:
+                free += trade_size + pnl[t]
+        elif free >= trade_size:
+            taken[t] = True
+            free -= trade_size
+    return taken
+
+
+if HAVE_NUMBA:
+    from numba import njit
+    _allocate_jit = njit(cache=True, nogil=True)(_allocate_loop)
+
+
+def allocate_capital(entry_key: np.ndarray, exit_key: np.ndarray, pnl: np.ndarray, trade_size: float,
+                     starting_balance: float, jit: bool = USE_JIT) -> np.ndarray:
+    # Keys order the events in time (bar * 4 + fill point); on a tie exits go first so their cash
+    # can be reused. Every trade's exit key must be after its entry key.
+    n = len(pnl)
+    key = np.concatenate((entry_key, exit_key))
+    is_exit = np.r_[np.zeros(n, dtype=np.bool_), np.ones(n, dtype=np.bool_)]
+    trade = np.r_[np.arange(n), np.arange(n)]
+    order = np.lexsort((~is_exit, key))
+    args = (order, is_exit, trade, np.ascontiguousarray(pnl, dtype=np.float64),
+            float(trade_size), float(starting_balance))
+    return _allocate_jit(*args) if jit and HAVE_NUMBA else _allocate_loop(*args)
+
+
+# ----- run -----
+
+def run_portfolio(panel: Panel, strategy: str = "confluence", params: Optional[ConfluenceParams] = None,
+                  reporter: Optional[Reporter] = None,
+                  progress: Optional[ProgressFn] = None) -> Optional[pd.DataFrame]:
+    # Results frame in the usual backtest columns (one row per trade taken, in exit order) plus
+    # "Symbol"; attrs["metrics"] covers the combined account over every bar of the panel and
+    # attrs["assets"] has one row per symbol. progress counts symbols.
+    reporter = reporter_or_null(reporter)
+    params = params or ConfluenceParams()
+    source = TRADE_SOURCES.get(strategy)
+    if source is None:
+        reporter.status(f"Unknown portfolio strategy: {strategy}")
+        return None
+    if len(panel) == 0:
+        reporter.status("The panel has no bars.")
+        return None
+    reporter.status(f"Portfolio: {strategy} on {len(panel.symbols)} symbols, {len(panel):,} bars "
+                    f"({panel.nbytes / 2**20:,.1f} MB)")
+
+    parts: List[dict] = []
+    bars = []
+    for i, sym in enumerate(panel.symbols):
+        rows, cols = panel.asset(i)
+        found = source(cols, params)
+        found["asset"] = np.full(len(found["entry_idx"]), i, dtype=np.int64)
+        # bar numbers of the symbol's own series -> rows of the panel
+        found["entry_row"], found["exit_row"] = rows[found["entry_idx"]], rows[found["exit_idx"]]
+        parts.append(found)
+        bars.append(len(rows))
+        report(progress, i + 1, len(panel.symbols), sum(len(p["asset"]) for p in parts))
+
+    fields = ("asset", "entry_row", "exit_row", "side", "entry_px", "exit_px", "entry_at", "exit_at")
+    t = {f: np.concatenate([p[f] for p in parts]) for f in fields}
+    direction = np.where(t["side"] == LONG, 100.0, -100.0)
+    pct_move = (t["exit_px"] / t["entry_px"] - 1.0) * direction
+    pnl = (params.trade_risk_cash * params.leverage) * (pct_move / 100)
+
+    entry_key = t["entry_row"] * 4 + t["entry_at"]
+    exit_key = t["exit_row"] * 4 + t["exit_at"]
+    taken = allocate_capital(entry_key, exit_key, pnl, params.trade_risk_cash, params.starting_balance)
+
+    # Taken trades in the order they closed, so the running balance is the account's realised balance
+    order = np.flatnonzero(taken)
+    order = order[np.argsort(exit_key[order], kind="stable")]
+    balance = params.starting_balance + np.cumsum(pnl[order])
+    log = TradeLog(entry_idx=t["entry_row"][order], exit_idx=t["exit_row"][order], side=t["side"][order],
+                   entry_px=t["entry_px"][order], exit_px=t["exit_px"][order], pct_move=pct_move[order],
+                   pnl=pnl[order], balance=balance)
+
+    symbols = np.asarray(panel.symbols, dtype=object)
+    dates = panel.times.view("datetime64[ns]")
+    results = pd.DataFrame({
+        "Date": dates[log.exit_idx],
+        "Symbol": symbols[t["asset"][order]],
+        "Cumulative Percentage Returns": (balance - params.starting_balance) / params.starting_balance * 100.0,
+        "Account Balance": balance,
+        "Short/Long": np.where(log.side == LONG, "Long", "Short"),
+    })
+
+    n_assets = len(panel.symbols)
+    counts = np.bincount(t["asset"], minlength=n_assets)
+    taken_counts = np.bincount(t["asset"][order], minlength=n_assets)
+    asset_pnl = np.bincount(t["asset"][order], weights=pnl[order], minlength=n_assets)
+    results.attrs["assets"] = pd.DataFrame({
+        "Symbol": panel.symbols, "Bars": bars, "Trades": taken_counts, "Skipped": counts - taken_counts,
+        "PnL": asset_pnl, "Return %": asset_pnl / params.starting_balance * 100.0,
+    })
+    attach_metrics(results, log, len(panel), params.starting_balance, dates)
+
+    for sym, n, skipped, cash in zip(panel.symbols, taken_counts, counts - taken_counts, asset_pnl):
+        reporter.log(f"{sym}: {n} trades ({skipped} skipped for cash) | PnL {cash:+.2f} "
+                     f"({cash / params.starting_balance * 100.0:+.2f}%)")
+    final = float(balance[-1]) if len(balance) else params.starting_balance
+    reporter.log(f"Portfolio completed. {len(order)} of {len(pnl)} trades taken. Final balance: {final:.2f}")
+    return results
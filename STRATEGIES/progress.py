@@ -0,0 +1,17 @@
+# STRATEGIES/progress.py
+# Progress / cancellation hook the strategies call while they run.
+# The UI passes BacktestJob.progress (actions/worker.py), which raises BacktestCancelled once cancel is pressed.
+from typing import Callable, Optional
+
+
+class BacktestCancelled(Exception):
+    pass
+
+
+# progress(done, total, trades): done/total are bars for a backtest (runs for a sweep), trades so far
+ProgressFn = Callable[[int, int, int], None]
+
+
+def report(progress: Optional[ProgressFn], done: int, total: int, trades: int = 0):
+    if progress is not None:
+        progress(done, total, trades)
@@ -0,0 +1,46 @@
+# STRATEGIES/reporting.py
+# How the strategies report what they are doing, without knowing who is listening.
+# status(text) is for one-off messages (the status bar in the app), log(text) for the running
+# backtest log (every trade). The app passes ui.statusbar.UIReporter; headless runs (batch.py,
+# the strategy worker, benchmarks) pass one of the reporters below, or None for silence.
+from typing import List, Optional, TextIO
+
+
+class Reporter:
+    # Base class, reports nothing
+    def status(self, text: str):
+        pass
+
+    def log(self, text: str):
+        pass
+
+
+class ListReporter(Reporter):
+    # Keeps every line, in order, per channel
+    def __init__(self):
+        self.status_lines: List[str] = []
+        self.log_lines: List[str] = []
+
+    def status(self, text: str):
+        self.status_lines.append(text)
+
+    def log(self, text: str):
+        self.log_lines.append(text)
+
+
+class StreamReporter(Reporter):
+    # Writes both channels to a text stream (a log file, stdout); status lines are marked
+    def __init__(self, stream: TextIO, log: bool = True):
+        self.stream = stream
+        self.write_log = log
+
+    def status(self, text: str):
+        self.stream.write(f"[status] {text}\n")
+
+    def log(self, text: str):
+        if self.write_log:
+            self.stream.write(text + "\n")
+
+
+def reporter_or_null(reporter: Optional[Reporter]) -> Reporter:
+    return reporter if reporter is not None else Reporter()
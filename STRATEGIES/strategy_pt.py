@@ -1,31 +1,33 @@
+import numpy as np
 import pandas as pd
-from state import AppState
-from ui.statusbar import add_text_status, add_text_status_backtest
-import time as t
-import dearpygui.dearpygui as dpg 
+from dataclasses import dataclass
+from typing import Optional
+from STRATEGIES.engine import LONG, SHORT, TradeLog, build_trade_log, simulate_signals
+from STRATEGIES.progress import ProgressFn, report
+from STRATEGIES.reporting import Reporter, reporter_or_null
+from STRATEGIES.kernels import as_kernel_array, scan_exit, scan_inside, scan_outside
+from STRATEGIES.indicators import EMA
+from STRATEGIES.metrics import attach_metrics
+from STRATEGIES.indicator_cache import indicator_series
 
 
 
-def simple_strategy(state: AppState):
-
-    # Load CSV data (eth), using uploaded data 1
-    # Ensure it is loaded into pandas
-    # Perform simple algo on it
-    # output results into a seperate CSV file using pandas
-    # pass it through into UI -> table and chart
-    # eventually incorporate everything into UI incliding variabnles
+def simple_strategy(data: Optional[pd.DataFrame], reporter: Optional[Reporter] = None,
+                    progress: Optional[ProgressFn] = None) -> Optional[pd.DataFrame]:
+    # Returns the results frame, the caller stores it (state.backtest_results in the app, a file in batch.py)
+    reporter = reporter_or_null(reporter)
 
     # ----- 1 -----
     try:
-        if state.csv_data is None:
-            add_text_status(state, "No CSV data loaded for strategy.")
+        if data is None:
+            reporter.status("No CSV data loaded for strategy.")
             return
         # Should already be in a dataframe
-        backtest_data = state.csv_data
-        add_text_status(state, "Backtesting working...")
+        backtest_data = data
+        reporter.status("Backtesting working...")
     
     except Exception as e:
-        add_text_status(state, f"Error loading CSV data: {e}")
+        reporter.status(f"Error loading CSV data: {e}")
         return
     # ----- 1 -----
 
@@ -33,104 +35,59 @@ def simple_strategy(state: AppState):
     # ----- 2 -----
     # Perform a simple strategy
     # Define necessary colums in seperate variables
-    open_col = backtest_data["Open"]
-    close_col = backtest_data["Close"]
+    open_col = backtest_data["Open"].to_numpy(dtype=float)
+    close_col = backtest_data["Close"].to_numpy(dtype=float)
     # Date should not need to be reformatted via pandas into datetime
-    date_col = backtest_data["Date"]
+    date_col = backtest_data["Date"].to_numpy()
 
     # Check length of CSV data
     length = len(backtest_data) # On test data -> 2880
-    add_text_status(state, f"CSV data length: {length}")
-    add_text_status(state, "Performing simple strategy...")
+    reporter.status(f"CSV data length: {length}")
+    reporter.status("Performing simple strategy...")
+    report(progress, 0, length)
 
     # Set up paper trading variables
 
-    account_balance: float = 100000.0 # Starting balance
+    starting_balance: float = 100000.0 # Starting balance
     trade_size: float = 1000.0 # Amount to risk per trade
     leverage: float = 10.0 # Leverage factor
-    position: bool = False # Whether we are in a position
-    bullish: bool = False # Whether the last candle was bullish
-
-    # Create arrays for new dataframe 
-    # They must synergise
-    cumulative_percentage_returns = []
-    account_balance_array = []
-    time = []
-    short_long = []
-
-
-    # Count-controlled loop
-    count = 0
-    max_count = length # adjust as needed
-    while count < max_count:
-        # Strategy logic here:
-        # Check whether bullish or bearish candle
-        # If bullish, buy and hold for one candle
-        # Vice versa for bearish
-        # Risk 1000 dollars at 10x leverage
-        if position == False:
-            # Open Position
-            position = True
-            # Determine if bullish or bearish
-            if open_col[count] - close_col[count] < 0:
-                # Bullish candle
-                bullish = True
-                short_long.append("Long")
-            else:
-                bullish = False
-                short_long.append("Short")
 
-            # Add one to count
-            count += 1
+    # Strategy logic:
+    # Check whether each candle is bullish or bearish,
+    # then hold the next candle in that direction (open -> close).
+    # Candles alternate between signal candle and trade candle, so signals sit on the odd bars.
+    # Risk 1000 dollars at 10x leverage
+    signals = simple_signals(open_col, close_col)
+    signal_bars = np.arange(0, length - 1, 2)
 
+    result = simulate_signals(signals, open_col, close_col, trade_size, leverage, starting_balance)
+    trades = result.trades
 
-        else:
-            # Close position
-            position = False
-            # Complete the one candle trade
-            # Calcualte the percentage movement
-            # Calculate position size and CHECK if there is enough balance to complete the trade
-            # Append everything to the arrays 
-            if bullish == True:
-                # Bullish candle logic
-                percentage_movement = (close_col[count] - open_col[count]) / open_col[count] * 100
-                if account_balance >= (trade_size):
-                    account_balance += (trade_size * leverage) * (percentage_movement / 100)
-                    time.append(date_col[count])
-                    percentage_change = (account_balance - 100000.0) / 100000.0 * 100
-                    cumulative_percentage_returns.append(percentage_change)
-                    account_balance_array.append(account_balance)
-
-                    # Add text status for successful trade alongside data
-                    add_text_status_backtest(state, f"Trade successful: {short_long[-1]} on {date_col[count]} | New Balance: {account_balance:.2f} | Percentage Change: {percentage_change:.2f}%")
-
-                
-                else:
-                    add_text_status_backtest(state, "Not enough balance to complete trade.")
-                    break
-
-            
-            else:
-                # Bearish candle logic
-                percentage_movement = 0 - ((close_col[count] - open_col[count]) / open_col[count] * 100)
-                if account_balance >= (trade_size):
-                    account_balance += (trade_size * leverage) * (percentage_movement / 100)
-                    time.append(date_col[count])
-                    percentage_change = (account_balance - 100000.0) / 100000.0 * 100
-                    cumulative_percentage_returns.append(percentage_change)
-                    account_balance_array.append(account_balance)
-
-                    # Add text status for successful trade alongside data
-                    add_text_status_backtest(state, f"Trade successful: {short_long[-1]} on {date_col[count]} | New Balance: {account_balance:.2f} | Percentage Change: {percentage_change:.2f}%")
-
-            # Add one to count
-            count += 1
-    
+    time = date_col[trades.exit_idx]
+    short_long = side_labels(trades.side)
+    cumulative_percentage_returns = (trades.balance - starting_balance) / starting_balance * 100
+    account_balance_array = trades.balance
+
+    # dates print the same whether the column is still text or already parsed datetimes
+    log_dates = pd.Index(time).astype(str)
+    for n, (side, date, balance, percentage_change) in enumerate(zip(short_long, log_dates, account_balance_array, cumulative_percentage_returns)):
+        if n % 10000 == 0:
+            report(progress, int(trades.exit_idx[n]), length, n)
+        # Add text status for successful trade alongside data
+        reporter.log(f"Trade successful: {side} on {date} | New Balance: {balance:.2f} | Percentage Change: {percentage_change:.2f}%")
+
+    # Once the balance can't cover a trade every later trade is refused, the run stops at the first long
+    if trades.halted_at is not None:
+        rejected_sides = signals[signal_bars + 1][trades.halted_at:]
+        if (rejected_sides == LONG).any():
+            reporter.log("Not enough balance to complete trade.")
+
+    account_balance = account_balance_array[-1] if len(trades) else starting_balance
 
-    t.sleep(1) # Allow time for UI to update
+    report(progress, length, length, len(trades))
 
-    add_text_status_backtest(state, "Strategy completed.")
-    add_text_status_backtest(state, f"Final account balance: {account_balance:.2f}")
+    reporter.log("Strategy completed.")
+    reporter.log(f"Final account balance: {account_balance:.2f}")
 
     final_data = {
         "Date": time,
@@ -141,286 +98,244 @@ def simple_strategy(state: AppState):
 
     final_results_df = pd.DataFrame(final_data)
     final_results_df["Date"] = pd.to_datetime(final_results_df["Date"], errors="coerce")
-    state.backtest_results = final_results_df
+    return attach_metrics(final_results_df, trades, length, starting_balance, date_col)
+
+
+def side_labels(side: np.ndarray) -> np.ndarray:
+    # "Long"/"Short" per trade; with no trades an empty float64 column, as the row-by-row version gave
+    if not len(side):
+        return np.empty(0, dtype=np.float64)
+    return np.where(side == LONG, "Long", "Short")
+
+
+def simple_signals(open_: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # Position per bar of the simple strategy: each even bar's direction is held over the next bar
+    signals = np.zeros(len(close), dtype=np.int8)
+    signal_bars = np.arange(0, len(close) - 1, 2)
+    signals[signal_bars + 1] = np.where(open_[signal_bars] - close[signal_bars] < 0, LONG, SHORT)
+    return signals
+
+
+def find_fvg_setups(open_, high, low, close, ema, start: int):
+    # Vectorized candidate scan: boolean masks of the bars that start a bullish / bearish
+    # 3-candle FVG in the direction of the trend and at least 1% away from the EMA.
+    length = len(close)
+    bull = np.zeros(length, dtype=bool)
+    bear = np.zeros(length, dtype=bool)
+    if length - 2 <= start:
+        return bull, bear
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        below = close < ema
+        gap_below = (ema / close - 1.0) * 100.0 >= 1.0
+        gap_above = (close / ema - 1.0) * 100.0 >= 1.0
+    up = close > open_
+    down = close < open_
+
+    c0 = slice(0, length - 2)
+    c1 = slice(1, length - 1)
+    c2 = slice(2, length)
+    bull[c0] = below[c0] & gap_below[c0] & up[c0] & up[c1] & up[c2] & (high[c0] < low[c2])
+    bear[c0] = ~below[c0] & gap_above[c0] & down[c0] & down[c1] & down[c2] & (low[c0] > high[c2])
+    bull[:start] = False
+    bear[:start] = False
+    return bull, bear
+
+
+def resolve_confluence_trades(open_, high, low, close, ema, start: int, reward_ratio: float = 2.0,
+                              progress: Optional[ProgressFn] = None):
+    # Walk the FVG setups in order and resolve each one's retrace, confirmation and SL/TP exit.
+    # Returns (setups, trades): setups is a list of (bar, side, trade number or -1),
+    # trades holds entry/exit bar, side and prices for every trade that was entered.
+    length = len(close)
+    bull, bear = find_fvg_setups(open_, high, low, close, ema, start)
+    candidates = np.flatnonzero(bull | bear)
+    high, low, close = as_kernel_array(high), as_kernel_array(low), as_kernel_array(close)
+
+    setups = []
+    entry_idx, exit_idx, sides, entry_pxs, exit_pxs = [], [], [], [], []
+
+    i = start
+    while True:
+        report(progress, i, length, len(entry_idx))
+        pos = np.searchsorted(candidates, i)
+        if pos == len(candidates):
+            break
+        i = int(candidates[pos])
+
+        if bull[i]:
+            side = LONG
+            fvg_low, fvg_high = high[i], low[i + 2]  # first high < third low
+        else:
+            side = SHORT
+            fvg_low, fvg_high = high[i + 2], low[i]  # first low > third high
+        setups.append([i, side, -1])
+
+        # Retrace: first close back inside the gap
+        j = scan_inside(close, fvg_low, fvg_high, i + 3)
+        if j < 0:
+            break
+
+        # Confirmation: first close that leaves the gap after the retrace.
+        # If price never leaves the gap every later retrace fails the same way, so the scan is over.
+        k = scan_outside(close, fvg_low, fvg_high, j + 1)
+        if k < 0:
+            break
+
+        entry_px = close[k]
+        if side == LONG and entry_px >= fvg_high:
+            # SL at fvg_low, TP at RR 1:reward_ratio
+            stop_px = fvg_low
+            risk = (entry_px - stop_px) / entry_px
+            tp_px = entry_px * (1 + reward_ratio * risk)
+        elif side == SHORT and entry_px <= fvg_low:
+            # SL at fvg_high, TP at RR 1:reward_ratio
+            stop_px = fvg_high
+            risk = (stop_px - entry_px) / entry_px
+            tp_px = entry_px * (1 - reward_ratio * risk)
+        else:
+            risk = 0.0  # gap broken before confirmation
+
+        if risk * 100.0 > 0:
+            # Manage trade forward, TP is checked before SL on the same candle
+            m, hit_tp = scan_exit(high, low, k + 1, tp_px, stop_px, side == LONG)
+            if m < 0:
+                # Close at last close
+                m = length - 1
+                exit_px = close[m]
+            else:
+                exit_px = tp_px if hit_tp else stop_px
+            setups[-1][2] = len(entry_idx)
+            entry_idx.append(k)
+            exit_idx.append(m)
+            sides.append(side)
+            entry_pxs.append(entry_px)
+            exit_pxs.append(exit_px)
+
+        # next scan starts from the retrace candle
+        i = max(i + 1, j)
+
+    trades = {
+        "entry_idx": np.asarray(entry_idx, dtype=np.int64),
+        "exit_idx": np.asarray(exit_idx, dtype=np.int64),
+        "side": np.asarray(sides, dtype=np.int8),
+        "entry_px": np.asarray(entry_pxs, dtype=np.float64),
+        "exit_px": np.asarray(exit_pxs, dtype=np.float64),
+    }
+    return setups, trades
 
 
-def confluence_based_strategy(state: AppState):
+@dataclass
+class ConfluenceParams:
+    leverage: float = 10.0
+    starting_balance: float = 100000.0
+    trade_risk_cash: float = 1000.0   # risk per trade (cash, not %)
+    ema_period: int = 200
+    reward_ratio: float = 2.0         # TP distance as a multiple of the SL distance (1:2)
+
+
+def compute_ema(close: np.ndarray, ema_period: int) -> np.ndarray:
+    # use pandas ewm for correctness (through the indicator, so chart and strategy agree)
+    return EMA(ema_period).batch(pd.DataFrame({"Close": close})).to_numpy()
+
+
+def settle_confluence_trades(found: dict, params: ConfluenceParams) -> TradeLog:
+    # PnL from entry and exit prices in the direction of the trade
+    direction = np.where(found["side"] == LONG, 100.0, -100.0)
+    pct_move = (found["exit_px"] / found["entry_px"] - 1.0) * direction
+    return build_trade_log(found["entry_idx"], found["exit_idx"], found["side"],
+                           found["entry_px"], found["exit_px"], pct_move,
+                           params.trade_risk_cash, params.leverage, params.starting_balance)
+
+
+def run_confluence(open_, high, low, close, params: ConfluenceParams, progress: Optional[ProgressFn] = None,
+                   ema: Optional[np.ndarray] = None):
+    # Pure core of the confluence strategy (no UI), returns (setups, trade log)
+    if ema is None:
+        ema = compute_ema(close, params.ema_period)
+    # start after EMA is meaningful
+    setups, found = resolve_confluence_trades(open_, high, low, close, ema, params.ema_period, params.reward_ratio,
+                                              progress)
+    return setups, settle_confluence_trades(found, params)
+
+
+def confluence_based_strategy(data: Optional[pd.DataFrame], params: Optional[ConfluenceParams] = None,
+                              reporter: Optional[Reporter] = None,
+                              progress: Optional[ProgressFn] = None) -> Optional[pd.DataFrame]:
+    # Returns the results frame, the caller stores it (state.backtest_results in the app, a file in batch.py)
+    reporter = reporter_or_null(reporter)
     # ---------- 0) Load & validate ----------
     try:
-        if state.csv_data is None:
-            add_text_status(state, "There is no CSV loaded currently.")
+        if data is None:
+            reporter.status("There is no CSV loaded currently.")
             return
-        trading_data = state.csv_data
+        trading_data = data
     except Exception as e:
-        add_text_status(state, f"Error: {e}")
+        reporter.status(f"Error: {e}")
         return
 
     # column safety (support either 'Date' or 'Time')
     time_col_name = "Date" if "Date" in trading_data.columns else ("Time" if "Time" in trading_data.columns else None)
     if time_col_name is None:
-        add_text_status(state, "CSV must include a 'Date' or 'Time' column.")
+        reporter.status("CSV must include a 'Date' or 'Time' column.")
         return
 
     # required OHLC columns
     for c in ["Open", "High", "Low", "Close"]:
         if c not in trading_data.columns:
-            add_text_status(state, f"CSV is missing required column: {c}")
+            reporter.status(f"CSV is missing required column: {c}")
             return
 
-    # ---------- 1) Extract series ----------
-    df_open  = trading_data["Open"].reset_index(drop=True)
-    df_high  = trading_data["High"].reset_index(drop=True)
-    df_low   = trading_data["Low"].reset_index(drop=True)
-    df_close = trading_data["Close"].reset_index(drop=True)
+    # ---------- 1) Extract arrays ----------
+    df_open  = trading_data["Open"].to_numpy(dtype=float)
+    df_high  = trading_data["High"].to_numpy(dtype=float)
+    df_low   = trading_data["Low"].to_numpy(dtype=float)
+    df_close = trading_data["Close"].to_numpy(dtype=float)
     df_time  = pd.to_datetime(trading_data[time_col_name], errors="coerce").reset_index(drop=True)
 
     length: int = len(trading_data)
-    add_text_status(state, f"CSV data length: {length}")
-    add_text_status(state, "Performing confluence-based strategy...")
+    reporter.status(f"CSV data length: {length}")
+    reporter.status("Performing confluence-based strategy...")
 
     # ---------- 2) Params ----------
-    leverage: float = 10.0
-    starting_balance: float = 100000.0
-    trade_risk_cash: float = 1000.0   # risk per trade (cash, not %)
-    ema_period: int = 200
+    if params is None:
+        params = ConfluenceParams()
+    starting_balance = params.starting_balance
 
-    if length < ema_period + 3:
-        add_text_status(state, f"Not enough rows for EMA({ema_period}) and pattern detection.")
+    if length < params.ema_period + 3:
+        reporter.status(f"Not enough rows for EMA({params.ema_period}) and pattern detection.")
         return
 
-    # ---------- 3) Compute EMA (use pandas ewm for correctness) ----------
-    ema = df_close.ewm(span=ema_period, adjust=False).mean()
-
-    # ---------- 4) State & outputs ----------
-    position_open: bool = False
-    trend_bull: bool = False   # True when looking for bullish setup (price below EMA), False for bearish
-    pct_gap_ok: bool = False   # true if price is >= 1% away from EMA in the trend direction
-
-    # outputs
-    side_array = []                 # "Long"/"Short"
-    balance_array = []              # account balance after each closed trade
-    time_array = []                 # time of trade close
-    cum_pct_array = []              # cumulative % vs starting_balance
-
-    balance = starting_balance
-
-    # ---------- 5) Helpers ----------
-    def pct_away_below(price, ema_val) -> float:
-        # price below ema; positive % if at least 1% below
-        return (ema_val / price - 1.0) * 100.0
-
-    def pct_away_above(price, ema_val) -> float:
-        # price above ema; positive % if at least 1% above
-        return (price / ema_val - 1.0) * 100.0
-
-    # Risk/Reward 1:2 helper: compute PnL given entry and exit prices and direction
-    def pnl_cash(entry, exit_, side):
-        pct_move = (exit_ / entry - 1.0) * (100.0 if side == "Long" else -100.0)
-        return (trade_risk_cash * leverage) * (pct_move / 100.0)
-
-    # ---------- 6) Scan ----------
-    i = ema_period  # start after EMA is meaningful
-    # we need lookahead of 2 candles for the 3-candle formation
-    while i < length - 2:
-
-        price = df_close.iloc[i]
-        ema_now = ema.iloc[i]
-
-        if not position_open:
-            # Decide trend context & 1% distance from EMA
-            if price < ema_now:
-                trend_bull = True
-                pct_gap_ok = pct_away_below(price, ema_now) >= 1.0
-            else:
-                trend_bull = False
-                pct_gap_ok = pct_away_above(price, ema_now) >= 1.0
-
-            if not pct_gap_ok:
-                i += 1
-                continue
-
-            # Look for 3-candle formation in direction of trend
-            c0_o, c0_h, c0_l, c0_c = df_open.iloc[i],   df_high.iloc[i],   df_low.iloc[i],   df_close.iloc[i]
-            c1_o, c1_h, c1_l, c1_c = df_open.iloc[i+1], df_high.iloc[i+1], df_low.iloc[i+1], df_close.iloc[i+1]
-            c2_o, c2_h, c2_l, c2_c = df_open.iloc[i+2], df_high.iloc[i+2], df_low.iloc[i+2], df_close.iloc[i+2]
-
-            if trend_bull:
-                # Need three bullish candles
-                if (c0_c > c0_o) and (c1_c > c1_o) and (c2_c > c2_o):
-                    # Bullish FVG: first high < third low
-                    if c0_h < c2_l:
-                        add_text_status_backtest(state, "BULLISH FVG FOUND")
-                        # Define FVG bounds
-                        fvg_low  = c0_h   # bottom of the gap
-                        fvg_high = c2_l   # top of the gap
-
-                        # Search forward for either: (a) EMA violation (price closes above EMA → cancel)
-                        # or (b) retrace into FVG and then close back above fvg_high → enter long
-                        j = i + 3
-                        entered = False
-                        while j < length:
-                            # cancel if price flips context (closes above EMA before entry)
-                            if df_close.iloc[j] > ema.iloc[j]:
-                                # still okay for bull; crossing ABOVE EMA is actually fine for bulls
-                                # but we only cancel if it *crosses below* EMA before entry (anti-trend)
-                                pass
-
-                            # For bulls we invalidate if we CLOSE *below* EMA while preparing? No; initial context is below EMA.
-                            # Keep it simple: do not invalidate on EMA during setup; we’ll invalidate only if FVG breaks.
-                            # Check retrace into FVG
-                            if fvg_low < df_close.iloc[j] < fvg_high:
-                                # Wait for close back above fvg_high to confirm continuation
-                                k = j + 1
-                                invalid = False
-                                while k < length:
-                                    # Invalidate setup if candle closes below fvg_low (gap broken)
-                                    if df_close.iloc[k] <= fvg_low:
-                                        invalid = True
-                                        break
-                                    if df_close.iloc[k] >= fvg_high:
-                                        # Enter long at close of this confirming candle
-                                        entry_idx = k
-                                        entry_px  = df_close.iloc[entry_idx]
-                                        side      = "Long"
-                                        # SL at fvg_low, TP at RR 1:2
-                                        stop_px = fvg_low
-                                        risk_perc = (entry_px - stop_px) / entry_px * 100.0
-                                        if risk_perc <= 0:
-                                            invalid = True
-                                            break
-                                        tp_px = entry_px * (1 + 2 * ((entry_px - stop_px) / entry_px))
-                                        # Manage trade forward
-                                        m = entry_idx + 1
-                                        exit_px = None
-                                        exit_time = None
-                                        while m < length:
-                                            hi = df_high.iloc[m]
-                                            lo = df_low.iloc[m]
-                                            # Hit TP?
-                                            if hi >= tp_px:
-                                                exit_px = tp_px
-                                                exit_time = df_time.iloc[m]
-                                                break
-                                            # Hit SL?
-                                            if lo <= stop_px:
-                                                exit_px = stop_px
-                                                exit_time = df_time.iloc[m]
-                                                break
-                                            m += 1
-                                        if exit_px is None:
-                                            # Close at last close
-                                            exit_px = df_close.iloc[length - 1]
-                                            exit_time = df_time.iloc[length - 1]
-                                        # Update P&L
-                                        pnl = pnl_cash(entry_px, exit_px, side)
-                                        if balance >= trade_risk_cash:
-                                            balance += pnl
-                                            time_array.append(exit_time)
-                                            side_array.append(side)
-                                            balance_array.append(balance)
-                                            cum_pct_array.append((balance - starting_balance) / starting_balance * 100.0)
-                                            add_text_status_backtest(
-                                                state,
-                                                f"Trade {side} closed @ {exit_time} | Δ: {pnl:+.2f} | Bal: {balance:.2f}"
-                                            )
-                                        else:
-                                            add_text_status_backtest(state, "Not enough balance to take trade.")
-                                        entered = True
-                                        break
-                                    k += 1
-                                # end while k
-                                if invalid or entered:
-                                    break
-                            # advance j
-                            j += 1
-                        # end while j
-                        i = max(i + 1, j if 'j' in locals() else i + 1)
-                        continue
-            else:
-                # Bearish trend: three bearish candles
-                if (c0_c < c0_o) and (c1_c < c1_o) and (c2_c < c2_o):
-                    # Bearish FVG: first low > third high
-                    if c0_l > c2_h:
-                        add_text_status_backtest(state, "BEARISH FVG FOUND")
-                        fvg_high = c0_l  # top of gap
-                        fvg_low  = c2_h  # bottom of gap
-
-                        j = i + 3
-                        entered = False
-                        while j < length:
-                            # Check retrace into FVG
-                            if fvg_low < df_close.iloc[j] < fvg_high:
-                                # Wait for close back below fvg_low to confirm continuation
-                                k = j + 1
-                                invalid = False
-                                while k < length:
-                                    # Invalidate if candle closes above fvg_high
-                                    if df_close.iloc[k] >= fvg_high:
-                                        invalid = True
-                                        break
-                                    if df_close.iloc[k] <= fvg_low:
-                                        # Enter short at close of this confirming candle
-                                        entry_idx = k
-                                        entry_px  = df_close.iloc[entry_idx]
-                                        side      = "Short"
-                                        # SL at fvg_high, TP at RR 1:2
-                                        stop_px = fvg_high
-                                        risk_perc = (stop_px - entry_px) / entry_px * 100.0
-                                        if risk_perc <= 0:
-                                            invalid = True
-                                            break
-                                        tp_px = entry_px * (1 - 2 * ((stop_px - entry_px) / entry_px))
-                                        # Manage trade forward
-                                        m = entry_idx + 1
-                                        exit_px = None
-                                        exit_time = None
-                                        while m < length:
-                                            hi = df_high.iloc[m]
-                                            lo = df_low.iloc[m]
-                                            # Hit TP?
-                                            if lo <= tp_px:
-                                                exit_px = tp_px
-                                                exit_time = df_time.iloc[m]
-                                                break
-                                            # Hit SL?
-                                            if hi >= stop_px:
-                                                exit_px = stop_px
-                                                exit_time = df_time.iloc[m]
-                                                break
-                                            m += 1
-                                        if exit_px is None:
-                                            exit_px = df_close.iloc[length - 1]
-                                            exit_time = df_time.iloc[length - 1]
-                                        pnl = pnl_cash(entry_px, exit_px, side)
-                                        if balance >= trade_risk_cash:
-                                            balance += pnl
-                                            time_array.append(exit_time)
-                                            side_array.append(side)
-                                            balance_array.append(balance)
-                                            cum_pct_array.append((balance - starting_balance) / starting_balance * 100.0)
-                                            add_text_status_backtest(
-                                                state,
-                                                f"Trade {side} closed @ {exit_time} | Δ: {pnl:+.2f} | Bal: {balance:.2f}"
-                                            )
-                                        else:
-                                            add_text_status_backtest(state, "Not enough balance to take trade.")
-                                        entered = True
-                                        break
-                                    k += 1
-                                if invalid or entered:
-                                    break
-                            j += 1
-                        i = max(i + 1, j if 'j' in locals() else i + 1)
-                        continue
-
-        # advance scanner when nothing else triggered
-        i += 1
-
-    # ---------- 7) Finalize ----------
+    # ---------- 3) Find setups and resolve trades ----------
+    # Shared with the chart's EMA line and earlier runs on the same data
+    ema = indicator_series(trading_data, EMA(params.ema_period)).to_numpy(dtype=float)
+    setups, trades = run_confluence(df_open, df_high, df_low, df_close, params, progress, ema)
+
+    # ---------- 4) Outputs ----------
+    side_array = side_labels(trades.side)
+    time_array = df_time.to_numpy()[trades.exit_idx]
+    balance_array = trades.balance
+    cum_pct_array = (balance_array - starting_balance) / starting_balance * 100.0
+
+    exit_times = df_time.iloc[trades.exit_idx].tolist()
+    for _, side, trade_no in setups:
+        reporter.log("BULLISH FVG FOUND" if side == LONG else "BEARISH FVG FOUND")
+        if trade_no < 0:
+            continue
+        if trade_no < len(trades):
+            reporter.log(
+                f"Trade {side_array[trade_no]} closed @ {exit_times[trade_no]} | Δ: {trades.pnl[trade_no]:+.2f} | Bal: {balance_array[trade_no]:.2f}"
+            )
+        else:
+            reporter.log("Not enough balance to take trade.")
+
+    balance = balance_array[-1] if len(trades) else starting_balance
+
+    # ---------- 5) Finalize ----------
     if len(time_array) == 0:
-        add_text_status_backtest(state, "No qualifying trades found.")
+        reporter.log("No qualifying trades found.")
     else:
-        add_text_status_backtest(state, f"Strategy completed. Final balance: {balance:.2f}")
+        reporter.log(f"Strategy completed. Final balance: {balance:.2f}")
 
     results = pd.DataFrame({
         "Date": time_array,
@@ -428,37 +343,6 @@ def confluence_based_strategy(state: AppState):
         "Account Balance": balance_array,
         "Short/Long": side_array
     })
+    report(progress, length, length, len(trades))
     results["Date"] = pd.to_datetime(results["Date"], errors="coerce")
-    state.backtest_results = results
-
-
-            
-
-
-
-
-            
-
-
-
-
-
-
-
-
-
-
-    
-
-
-
-
-
-
-                
-
-
-
-
-
-
+    return attach_metrics(results, trades, length, starting_balance, df_time)
@@ -0,0 +1,147 @@
+# STRATEGIES/sweep.py
+# Parameter sweep for the confluence strategy, fanned out over a process pool.
+import itertools
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from STRATEGIES.engine import TradeLog
+from STRATEGIES.progress import ProgressFn, report
+from STRATEGIES.strategy_pt import (
+    ConfluenceParams, compute_ema, resolve_confluence_trades, settle_confluence_trades
+)
+
+SWEEP_PARAMS = ("leverage", "starting_balance", "trade_risk_cash", "ema_period", "reward_ratio")
+RANK_COLUMNS = ("Total Return %", "Final Balance", "Win Rate %", "Max Drawdown %", "Trades")
+
+# Spawned like the Monte Carlo pool, the sweep is started from a job's worker thread in the app
+_mp = mp.get_context("spawn")
+
+# OHLC arrays (open/high/low/close) for the worker processes, set once per worker by _init_worker
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def parse_range(text: str, cast=float) -> List:
+    # "10" -> [10], "5,10,20" -> [5, 10, 20], "100:300:50" -> [100, 150, 200, 250, 300] (stop inclusive)
+    text = text.strip()
+    if ":" in text:
+        parts = [cast(p) for p in text.split(":")]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError(f"Range must be start:stop:step with a positive step, got '{text}'")
+        start, stop, step = parts
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [cast(start + n * step) for n in range(max(count, 0))]
+    return [cast(p) for p in text.split(",") if p.strip()]
+
+
+def parameter_grid(ranges: Dict[str, Sequence], base: Optional[ConfluenceParams] = None) -> List[ConfluenceParams]:
+    # Cartesian product of the given ranges, anything not given keeps the base value
+    base = base or ConfluenceParams()
+    for name in ranges:
+        if name not in SWEEP_PARAMS:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+    names = [n for n in SWEEP_PARAMS if n in ranges]
+    values = [list(ranges[n]) for n in names]
+    return [replace(base, **dict(zip(names, combo))) for combo in itertools.product(*values)]
+
+
+def summarise(trades: TradeLog, params: ConfluenceParams) -> dict:
+    start = params.starting_balance
+    final = trades.balance[-1] if len(trades) else start
+    path = np.concatenate(([start], trades.balance))
+    peak = np.maximum.accumulate(path)
+    drawdown = (path / peak - 1.0) * 100.0
+    row = asdict(params)
+    row.update({
+        "Trades": len(trades),
+        "Final Balance": final,
+        "Total Return %": (final - start) / start * 100.0,
+        "Win Rate %": float((trades.pnl > 0).mean() * 100.0) if len(trades) else 0.0,
+        "Max Drawdown %": float(drawdown.min()),
+    })
+    return row
+
+
+def _no_trades() -> dict:
+    empty_i = np.empty(0, dtype=np.int64)
+    empty_f = np.empty(0, dtype=np.float64)
+    return {"entry_idx": empty_i, "exit_idx": empty_i, "side": np.empty(0, dtype=np.int8),
+            "entry_px": empty_f, "exit_px": empty_f}
+
+
+def ohlc_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {c.lower(): df[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close")}
+
+
+def _init_worker(data: Dict[str, np.ndarray]):
+    _worker_data.update(data)
+
+
+def _run_group(data: Dict[str, np.ndarray], ema_period: int, reward_ratio: float,
+               group: List[ConfluenceParams]) -> List[dict]:
+    # Trade entries and exits only depend on the EMA period and reward ratio,
+    # so resolve them once and only redo the accounting for the rest of the group.
+    if len(data["close"]) < ema_period + 3:
+        return [summarise(settle_confluence_trades(_no_trades(), p), p) for p in group]
+    ema = compute_ema(data["close"], ema_period)
+    _, found = resolve_confluence_trades(data["open"], data["high"], data["low"], data["close"],
+                                         ema, ema_period, reward_ratio)
+    return [summarise(settle_confluence_trades(found, p), p) for p in group]
+
+
+def _run_group_in_worker(ema_period: int, reward_ratio: float, group: List[ConfluenceParams]) -> List[dict]:
+    return _run_group(_worker_data, ema_period, reward_ratio, group)
+
+
+def sweep_arrays(data: Dict[str, np.ndarray], grid: List[ConfluenceParams], max_workers: Optional[int] = None,
+                 rank_by: str = "Total Return %", progress: Optional[ProgressFn] = None) -> pd.DataFrame:
+    # Run every parameter set in grid over the OHLC arrays and return the results ranked best first.
+    # max_workers=1 runs in this process (used when already inside a worker).
+    # progress is called with the number of parameter sets finished after each group.
+    if rank_by not in RANK_COLUMNS:
+        raise ValueError(f"Cannot rank by '{rank_by}'")
+
+    groups: Dict[tuple, List[ConfluenceParams]] = {}
+    for p in grid:
+        groups.setdefault((int(p.ema_period), float(p.reward_ratio)), []).append(p)
+
+    workers = max_workers or os.cpu_count() or 1
+    workers = min(workers, len(groups)) if groups else 1
+    rows: List[dict] = []
+    if workers <= 1:
+        for (ema_period, rr), group in groups.items():
+            rows.extend(_run_group(data, ema_period, rr, group))
+            report(progress, len(rows), len(grid))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp, initializer=_init_worker, initargs=(data,))
+        try:
+            futures = [pool.submit(_run_group_in_worker, ema_period, rr, group)
+                       for (ema_period, rr), group in groups.items()]
+            for f in futures:
+                rows.extend(f.result())
+                report(progress, len(rows), len(grid))
+        finally:
+            # on cancel, drop the groups that haven't started
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    table = pd.DataFrame(rows, columns=list(SWEEP_PARAMS) + ["Trades", "Final Balance", "Total Return %",
+                                                            "Win Rate %", "Max Drawdown %"])
+    # higher is better for every rank column (drawdown is stored as a negative %)
+    table = table.sort_values(rank_by, ascending=False, kind="stable").reset_index(drop=True)
+    table.insert(0, "Rank", np.arange(1, len(table) + 1))
+    return table
+
+
+def sweep_confluence(df: pd.DataFrame, grid: List[ConfluenceParams], max_workers: Optional[int] = None,
+                     rank_by: str = "Total Return %", progress: Optional[ProgressFn] = None) -> pd.DataFrame:
+    return sweep_arrays(ohlc_arrays(df), grid, max_workers, rank_by, progress)
+
+
+def params_from_row(row) -> ConfluenceParams:
+    # Turn a row of a sweep table back into ConfluenceParams
+    params = {name: row[name] for name in SWEEP_PARAMS}
+    params["ema_period"] = int(params["ema_period"])
+    return ConfluenceParams(**params)
@@ -0,0 +1,149 @@
+# STRATEGIES/walkforward.py
+# Walk-forward optimisation: optimise on a rolling in-sample window, trade the next out-of-sample window.
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from STRATEGIES.engine import LONG, TradeLog
+from STRATEGIES.metrics import attach_metrics
+from STRATEGIES.progress import ProgressFn, report
+from STRATEGIES.strategy_pt import (
+    ConfluenceParams, compute_ema, resolve_confluence_trades, settle_confluence_trades
+)
+from STRATEGIES.sweep import ohlc_arrays, params_from_row, sweep_arrays
+
+# Spawned like the Monte Carlo pool, walk-forward is started from a job's worker thread in the app
+_mp = mp.get_context("spawn")
+
+# OHLC arrays for the worker processes, set once per worker by _init_worker
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def walk_forward_windows(length: int, train_bars: int, test_bars: int,
+                         step: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+    # (train_start, train_end, test_start, test_end) for each rolling window, ends exclusive.
+    # step defaults to test_bars so the test windows tile the data without overlap.
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("Train and test windows must be at least one bar")
+    step = step or test_bars
+    windows = []
+    train_start = 0
+    while train_start + train_bars < length:
+        train_end = train_start + train_bars
+        test_end = min(train_end + test_bars, length)
+        windows.append((train_start, train_end, train_end, test_end))
+        train_start += step
+    return windows
+
+
+def evaluate_window(data: Dict[str, np.ndarray], params: ConfluenceParams, test_start: int, test_end: int) -> dict:
+    # Resolve trades inside [test_start, test_end) only.
+    # The bars before test_start are used to warm up the EMA, trades still open at test_end close there.
+    lo = max(0, test_start - params.ema_period)
+    window = {k: v[lo:test_end] for k, v in data.items()}
+    ema = compute_ema(window["close"], params.ema_period)
+    _, found = resolve_confluence_trades(window["open"], window["high"], window["low"], window["close"],
+                                         ema, test_start - lo, params.reward_ratio)
+    found["entry_idx"] = found["entry_idx"] + lo
+    found["exit_idx"] = found["exit_idx"] + lo
+    return found
+
+
+def run_window(data: Dict[str, np.ndarray], window: Tuple[int, int, int, int],
+               grid: List[ConfluenceParams], rank_by: str) -> dict:
+    train_start, train_end, test_start, test_end = window
+    train = {k: v[train_start:train_end] for k, v in data.items()}
+    table = sweep_arrays(train, grid, max_workers=1, rank_by=rank_by)
+    best = params_from_row(table.iloc[0])
+    return {
+        "window": window,
+        "params": best,
+        "in_sample": float(table.iloc[0][rank_by]),
+        "found": evaluate_window(data, best, test_start, test_end),
+    }
+
+
+def _init_worker(data: Dict[str, np.ndarray]):
+    _worker_data.update(data)
+
+
+def _run_window_in_worker(window, grid, rank_by) -> dict:
+    return run_window(_worker_data, window, grid, rank_by)
+
+
+def stitch_windows(results: List[dict], dates: np.ndarray, starting_balance: float):
+    # Settle each window's out-of-sample trades in order, carrying the balance forward,
+    # and return (results frame in the usual backtest format, per-window summary).
+    balance = starting_balance
+    frames, summary, logs = [], [], []
+    for res in results:
+        params = replace(res["params"], starting_balance=balance)
+        trades = settle_confluence_trades(res["found"], params)
+        logs.append(trades)
+        window_start_balance = balance
+        if len(trades):
+            balance = float(trades.balance[-1])
+        frames.append(pd.DataFrame({
+            "Date": dates[trades.exit_idx],
+            "Cumulative Percentage Returns": (trades.balance - starting_balance) / starting_balance * 100.0,
+            "Account Balance": trades.balance,
+            "Short/Long": np.where(trades.side == LONG, "Long", "Short"),
+        }))
+        train_start, train_end, test_start, test_end = res["window"]
+        row = {
+            "Train Start": dates[train_start], "Train End": dates[train_end - 1],
+            "Test Start": dates[test_start], "Test End": dates[test_end - 1],
+        }
+        row.update({k: v for k, v in asdict(res["params"]).items() if k != "starting_balance"})
+        row.update({
+            "In-Sample Score": res["in_sample"],
+            "OOS Trades": len(trades),
+            "OOS Return %": (balance - window_start_balance) / window_start_balance * 100.0,
+        })
+        summary.append(row)
+
+    columns = ["Date", "Cumulative Percentage Returns", "Account Balance", "Short/Long"]
+    oos = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    oos["Date"] = pd.to_datetime(oos["Date"], errors="coerce")
+    # metrics of the stitched out-of-sample run, over every bar of the data
+    fields = ("entry_idx", "exit_idx", "side", "entry_px", "exit_px", "pct_move", "pnl", "balance")
+    stitched = TradeLog(**{f: np.concatenate([getattr(t, f) for t in logs]) if logs else np.empty(0) for f in fields})
+    attach_metrics(oos, stitched, len(dates), starting_balance, dates)
+    return oos, pd.DataFrame(summary)
+
+
+def walk_forward_confluence(df: pd.DataFrame, grid: List[ConfluenceParams], train_bars: int, test_bars: int,
+                            step: Optional[int] = None, rank_by: str = "Total Return %",
+                            max_workers: Optional[int] = None, starting_balance: Optional[float] = None,
+                            progress: Optional[ProgressFn] = None):
+    # Optimise grid on each train window, trade the best parameters on the following test window.
+    # Windows are independent so they run in parallel, only the final stitching is sequential.
+    # progress is called with the number of windows finished.
+    time_col = "Date" if "Date" in df.columns else "Time"
+    dates = pd.to_datetime(df[time_col], errors="coerce").to_numpy()
+    data = ohlc_arrays(df)
+    windows = walk_forward_windows(len(df), train_bars, test_bars, step)
+    if starting_balance is None:
+        starting_balance = grid[0].starting_balance if grid else ConfluenceParams().starting_balance
+
+    workers = min(max_workers or os.cpu_count() or 1, len(windows)) if windows else 1
+    results = []
+    if workers <= 1:
+        for w in windows:
+            results.append(run_window(data, w, grid, rank_by))
+            report(progress, len(results), len(windows))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp, initializer=_init_worker, initargs=(data,))
+        try:
+            futures = [pool.submit(_run_window_in_worker, w, grid, rank_by) for w in windows]
+            for f in futures:
+                results.append(f.result())
+                report(progress, len(results), len(windows))
+        finally:
+            # on cancel, drop the windows that haven't started
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return stitch_windows(results, dates, starting_balance)
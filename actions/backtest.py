@@ -1,104 +1,189 @@
 # actions/backtest.py
-import sys, json, subprocess, pathlib, pandas as pd, dearpygui.dearpygui as dpg
+import time
+import numpy as np, dearpygui.dearpygui as dpg
+from dataclasses import asdict
 from state import AppState
-from ui.statusbar import add_text_status
-from STRATEGIES.strategy_pt import simple_strategy, confluence_based_strategy
+from ui.statusbar import UIReporter, add_text_status
+from STRATEGIES.progress import BacktestCancelled
+from STRATEGIES.strategy_pt import ConfluenceParams
 from ui.charts import generate_chart
+from actions.worker import submit_job
+from actions.strategy_worker import get_worker
+from actions.dataflow import dataset_job
+from data.benchmarks import BENCHMARK_FILES, BUY_AND_HOLD, align, asof, buy_and_hold, equal_weight, load_benchmark
+from actions.timing import RunMetrics, phase_timer, timed
+from STRATEGIES.metrics import (
+    METRIC_COLUMNS, ROLLING_COLUMNS, bar_seconds, relative_metrics, results_equity, results_metrics,
+    results_starting_balance
+)
+from actions.history import record_run
+
+BENCHMARK_TAGS = ("equity_series", "benchmark_series_1", "benchmark_series_2", "benchmark_series_3")
+EQUITY_PLOT_POINTS = 5000  # benchmark lines are drawn at most this many points
+
+STRATEGIES_BY_NAME = {  # strategy combo -> strats.STRATEGY_NAMES
+    "Simple Strategy": "simple",
+    "Confluence Based Strategy": "confluence",
+}
+
+def run_strats_script(state: AppState, strategy: str, params: dict, job, profile: bool = False) -> dict:
+    # Backtest job on the persistent strats.py worker, the dataset is already loaded there after the
+    # first run. What the strategy reports on the way comes back as events and is replayed here;
+    # profile has the worker run its load and strategy under cProfile
+    reporter = UIReporter(state)
+
+    def on_event(event):
+        for text in event["status"]:
+            reporter.status(text)
+        for text in event["log"]:
+            reporter.log(text)
+        if event["progress"] is not None:
+            job.progress(*event["progress"])
+
+    return get_worker().request({"op": "backtest", **dataset_job(state), "interval": state.chart_interval or None,
+                                 "strategy": strategy, "params": params, "profile": profile}, on_event=on_event)
 
 def backtest_strategy(state: AppState, strategy_name: str):
-    if state.csv_data is None or state.csv_path is None:
+    if state.csv_data is None or (state.csv_path is None and state.store_query is None):
         add_text_status(state, "No CSV loaded for backtesting.")
         return
-
-    script_path = pathlib.Path("clean_up\strats.py")
-    if not script_path.exists():
-        # Fallback: your uploaded script sits at project root
-        script_path = pathlib.Path("clean_up\strats.py")
-
-    proc = subprocess.Popen(
-        [sys.executable, str(script_path)],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-    )
-    payload = json.dumps({"csv_path": str(state.csv_path)})
-    stdout_data, stderr_data = proc.communicate(payload)
-
-    if proc.returncode != 0:
-        add_text_status(state, f"Strategy error: {stderr_data or stdout_data}")
-        return
-
-    add_text_status(state, f"stdout received from strategy: {stdout_data}")
-    try:
-        results = json.loads(stdout_data)
-        add_text_status(state, f"Backtest Results: {results}")
-    except Exception as e:
-        add_text_status(state, f"Failed to parse strategy output: {e}")
-    if strategy_name == "Simple Strategy":
-        simple_strategy(state)
-    elif strategy_name == "Confluence Based Strategy":
-        confluence_based_strategy(state)
-    elif strategy_name == "Please Select":
+    if strategy_name == "Please Select":
         add_text_status(state, "Please select a valid strategy.")
         return
-    else:
+    strategy = STRATEGIES_BY_NAME.get(strategy_name)
+    if strategy is None:
         add_text_status(state, "Error")
         return
-    
+
+    run = RunMetrics(name=strategy_name, rows=len(state.csv_data), profile=state.profile_runs)
+    params = asdict(ConfluenceParams()) if strategy == "confluence" else {}
+
+    # Runs on the worker thread: the strategy runs in the strats.py worker and its results come back here
+    def work(job):
+        t0 = time.perf_counter()
+        out = run_strats_script(state, strategy, params, job, profile=run.profile)
+        run.add_worker("strats.py worker", time.perf_counter() - t0, out.get("timings", {}), out.get("profiles", {}))
+        if out.get("cancelled"):
+            raise BacktestCancelled()
+        if "error" in out:
+            add_text_status(state, f"Strategy error: {out['error']}")
+            return None
+        results = out["results"]
+        run.trades = len(results) if results is not None else 0
+        return results
+
+    submit_job(state, strategy_name, work, metrics=run,
+               on_done=lambda state, results: show_backtest_results(state, results, strategy_name, params))
+
+def show_backtest_results(state: AppState, results, strategy_name: str = "", params: dict = None):
+    # Main thread, once the worker has finished
+    if results is None:
+        return
+    state.backtest_results = results
+    show_metrics_table(results_metrics(results))
+    if strategy_name:
+        record_run(state, results, strategy_name, params=params)
 
     # If main chart is not shown then show the main chart
 
     if not dpg.is_item_shown("chart"):
-        generate_chart(state)
+        with phase_timer(state.current_run, "chart"):
+            generate_chart(state)
 
 
     equity_plot(state)
 
-def equity_plot(state: AppState):
-    try:
-        df = pd.read_csv("sp500.csv")
-    except Exception as e:
-        add_text_status(state, f"No S&P 500 data: {e}")
+def show_metrics_table(metrics, relative=None):
+    # "Performance Metrics" section of the Backtesting Config window, relative is
+    # STRATEGIES.metrics.relative_metrics (one row per benchmark) once the equity plot is drawn
+    dpg.delete_item("metrics_table", children_only=True)
+    dpg.add_table_column(label="Metric", parent="metrics_table")
+    dpg.add_table_column(label="Value", parent="metrics_table")
+    rows = [(name, metrics.get(name)) for name in METRIC_COLUMNS] if metrics else []
+    if relative is not None:
+        rows += [(f"{col} vs {bench}", float(value)) for bench, row in relative.iterrows() for col, value in row.items()]
+    for name, value in rows:
+        with dpg.table_row(parent="metrics_table"):
+            dpg.add_text(name)
+            dpg.add_text(f"{value:,.2f}" if isinstance(value, float) else str(value))
+
+def show_rolling_metric(state: AppState, sender=None, app_data=None):
+    # Rolling plot of the Performance Metrics section: the metric picked in the combo, for the run on screen.
+    # Left empty for a run without attrs["rolling"]
+    if dpg.does_item_exist("rolling_series"):
+        dpg.delete_item("rolling_series")
+    name = dpg.get_value("rolling_metric_combo") or ROLLING_COLUMNS[0]
+    dpg.configure_item("y_axis_rolling", label=name)
+    results = state.backtest_results
+    rolling = results.attrs.get("rolling") if results is not None else None
+    if rolling is None:
+        return
+    x, y = _thin(*rolling.series(name))
+    dpg.add_line_series(x, y, parent="y_axis_rolling", tag="rolling_series", label=name)
+    dpg.fit_axis_data("x_axis_rolling"); dpg.fit_axis_data("y_axis_rolling")
+
+def benchmark_grid(state: AppState, results):
+    # (bar times the run traded on as int64 ns, buy-and-hold of what it traded)
+    if "Symbol" in results.columns and state.portfolio is not None:
+        panel = state.portfolio[1]
+        return panel.times, equal_weight(panel.times, panel.field("Close"))
+    if state.csv_data is not None and len(state.csv_data):
+        hold = buy_and_hold(state.csv_data)
+        return hold.times, hold
+    return results["Date"].to_numpy(dtype="datetime64[ns]").view("int64"), None
+
+
+def _thin(x: np.ndarray, y: np.ndarray):
+    # Every k-th point (and the last), plenty for a line over the whole run
+    step = max(1, len(x) // EQUITY_PLOT_POINTS)
+    keep = np.r_[np.arange(0, len(x), step), len(x) - 1] if len(x) else np.empty(0, dtype=np.int64)
+    return (x[keep] / 1e9).tolist(), y[keep].tolist()
+
+
+@timed("equity_plot")
+def equity_plot(state: AppState, label: str = ""):
+    # The run and its benchmarks (data/benchmarks.py), all rebased to 0% at the first bar of the run
+    for tag in ("backtest_equity_series", "mc_band_outer", "mc_band_inner", "mc_median") + BENCHMARK_TAGS:
+        if dpg.does_item_exist(tag):  # previous run, its benchmarks and its Monte Carlo fan
+            dpg.delete_item(tag)
+    dpg.show_item("equity_plot")
+    results = state.backtest_results
+    show_rolling_metric(state)
+    if results is None or results.empty:
         return
 
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date", "Return_%"])
-
-    # Remove any previous series
-    if dpg.does_item_exist("equity_series"):
-        dpg.delete_item("equity_series")
-    if dpg.does_item_exist("backtest_equity_series"):
-        dpg.delete_item("backtest_equity_series")
-
-    # --- S&P 500 line: ensure float lists ---
-    x = ((df["Date"].astype("int64") / 1e9).astype(float)).tolist()
-    y = (df["Return_%"].astype(float)).tolist()
+    grid, hold = benchmark_grid(state, results)
+    series = {}
+    for name in BENCHMARK_FILES:
+        try:
+            series[name] = load_benchmark(name)
+        except Exception as e:
+            add_text_status(state, f"No {name} data: {e}")
+    series[BUY_AND_HOLD] = hold
+    aligned = align(series, grid)
+
+    # Exits in time order (trades can overlap), so the as-of join and the line both run forwards
+    trade_ns, balance = results_equity(results)
+    start = results_starting_balance(results)
+    equity = asof(trade_ns, balance, grid, fill=start)
+    relative = relative_metrics(equity, aligned, bar_seconds(grid.view("datetime64[ns]")))
+    show_metrics_table(results_metrics(results), relative)
+
+    for tag, (name, prices) in zip(BENCHMARK_TAGS, aligned.items()):
+        known = np.flatnonzero(np.isfinite(prices))
+        if not len(known):
+            continue
+        x, y = _thin(grid[known], (prices[known] / prices[known[0]] - 1.0) * 100.0)
+        dpg.add_line_series(x, y, parent="y_axis_equity", tag=tag, label=f"{name} %", skip_nan=True)
 
-    dpg.show_item("equity_plot")
     dpg.add_line_series(
-        x, y,
+        (trade_ns / 1e9).tolist(), ((balance - start) / start * 100.0).tolist(),
         parent="y_axis_equity",
-        tag="equity_series",
-        label="S&P 500 %", 
+        tag="backtest_equity_series",
+        label=label or f'{dpg.get_value("strategy_combo")} Equity',
         skip_nan=True
     )
 
-    # --- Backtest line: ensure float lists ---
-    if state.backtest_results is not None and not state.backtest_results.empty:
-        br = state.backtest_results.dropna(subset=["Date", "Cumulative Percentage Returns"]).copy()
-        backtest_x = ((br["Date"].astype("int64") / 1e9).astype(float)).tolist()
-        backtest_y = (br["Cumulative Percentage Returns"].astype(float)).tolist()
-
-        # lengths must match
-        n = min(len(backtest_x), len(backtest_y))
-        backtest_x, backtest_y = backtest_x[:n], backtest_y[:n]
-
-        dpg.add_line_series(
-            backtest_x, backtest_y,
-            parent="y_axis_equity",
-            tag="backtest_equity_series",
-            label=f'{dpg.get_value("strategy_combo")} Equity',
-            skip_nan=True
-        )
-
 def reload_equity_plot(state: AppState):
     if not dpg.is_item_shown("equity_plot"):
         if dpg.does_item_exist("equity_series") or dpg.does_item_exist("backtest_equity_series"):
@@ -1,13 +1,86 @@
 # actions/dataflow.py
-import sys, subprocess, pathlib, pandas as pd, dearpygui.dearpygui as dpg
+import sys, subprocess, pathlib, dearpygui.dearpygui as dpg
 from state import AppState
 from ui.statusbar import add_text_status
+from actions.strategy_worker import get_worker
+from typing import Optional
+from data.cache import read_csv_cached
+from data import store
+from data.resample import IntervalCache, interval_label
+from STRATEGIES.indicators import EMA
+from STRATEGIES.indicator_cache import indicator_series
 
-INTERVAL_MAP = {"1H":"1h","2H":"2h","4H":"4h"}
+INTERVAL_MAP = {"1H":"1h","2H":"2h","4H":"4h","1D":"1d"}
 
 def set_ema_values(state: AppState, df):
+    # Batch pass over the history; state.ema_indicator then takes new bars with update(bar)
     if len(df) > state.ema_period + 3:
-            state.ema_data_values = df["Close"].ewm(span=state.ema_period, adjust=False).mean() # EMA ADDED
+        state.ema_indicator = EMA(state.ema_period)
+        state.ema_data_values = indicator_series(df, state.ema_indicator) # EMA ADDED (cached per dataset and period)
+    else:
+        state.ema_indicator = None
+        state.ema_data_values = None
+
+def set_base_data(state: AppState, path: Optional[pathlib.Path], df, store_query: Optional[dict] = None):
+    # The loaded file (or store range) is the finest series, every other interval on the chart is derived from it
+    state.csv_path = path
+    state.store_query = store_query
+    state.base_data = df
+    state.intervals = IntervalCache(df)
+    state.chart_interval = interval_label(state.intervals.base_seconds)
+    state.csv_data = df
+    if dpg.does_item_exist("chart_interval_combo"):
+        dpg.configure_item("chart_interval_combo", items=state.intervals.intervals())
+        dpg.set_value("chart_interval_combo", state.chart_interval)
+
+def dataset_job(state: AppState) -> dict:
+    # How a strategy worker job names the loaded data
+    if state.store_query is not None:
+        return {"store": state.store_query}
+    return {"csv_path": str(state.csv_path)}
+
+def open_store_window(state: AppState):
+    symbols = store.symbols()
+    dpg.configure_item("store_symbol", items=symbols)
+    if symbols and dpg.get_value("store_symbol") not in symbols:
+        dpg.set_value("store_symbol", symbols[0])
+    store_symbol_cb(state)
+    dpg.show_item("store_window")
+
+def store_symbol_cb(state: AppState, sender=None, app_data=None):
+    intervals = store.intervals(dpg.get_value("store_symbol")) if dpg.get_value("store_symbol") else []
+    dpg.configure_item("store_interval", items=intervals)
+    if intervals and dpg.get_value("store_interval") not in intervals:
+        dpg.set_value("store_interval", intervals[0])
+    store_interval_cb(state)
+
+def store_interval_cb(state: AppState, sender=None, app_data=None):
+    symbol, interval = dpg.get_value("store_symbol"), dpg.get_value("store_interval")
+    span = store.date_range(symbol, interval) if symbol and interval else None
+    dpg.set_value("store_range_text", f"Stored: {span[0]} → {span[1]}" if span else "Stored: nothing")
+
+def on_load_store(state: AppState):
+    # Only the days between start and end are read (memory-mapped), not the whole history
+    query = {"symbol": dpg.get_value("store_symbol"), "interval": dpg.get_value("store_interval"),
+             "start": dpg.get_value("store_start") or None, "end": dpg.get_value("store_end") or None}
+    if not query["symbol"] or not query["interval"]:
+        add_text_status(state, "Nothing in the store yet, download data first.")
+        return
+    try:
+        df = store.load(**query)
+    except Exception as e:
+        add_text_status(state, f"Error loading from store: {e}")
+        return
+    if df.empty:
+        add_text_status(state, "No bars in that range.")
+        return
+    set_base_data(state, None, df, query)
+    set_ema_values(state, df)
+    get_worker().preload(dataset_job(state))
+    label = f"{query['symbol']} {query['interval']} {df['Date'].iloc[0]} → {df['Date'].iloc[-1]}"
+    add_text_status(state, f"Loaded {len(df)} bars from store: {label}")
+    dpg.set_value("CSV_CURRENT", f"Current data: {label}")
+    dpg.hide_item("store_window")
 
 def on_load_csv(state: AppState, sender, app_data):
     path = pathlib.Path(app_data["file_path_name"])
@@ -15,10 +88,10 @@ def on_load_csv(state: AppState, sender, app_data):
         add_text_status(state, "Please select a CSV file.")
         return
     try:
-        df = pd.read_csv(path)
-        state.csv_path = path
-        state.csv_data = df
+        df = read_csv_cached(path)
+        set_base_data(state, path, df)
         set_ema_values(state, df)  # Set EMA values when loading CSV
+        get_worker().preload(str(path))  # warm the strategy worker while the user picks a strategy
         add_text_status(state, f"CSV loaded: {path.name}")
         dpg.set_value("CSV_CURRENT", f"Current CSV: {str(path.name)}")
     except Exception as e:
@@ -32,7 +105,10 @@ def fetch_eth_via_binance(state: AppState, days: int, out: str, script_path: pat
             dpg.delete_item(tag)
 
     interval = INTERVAL_MAP.get(interval_ui, interval_ui)  # normalise
-    cmd = [sys.executable, str(script_path), "--days", str(days), "--out", out, "--interval", interval]
+    # --incremental: an existing file is only topped up (missing bars and gaps), not re-downloaded;
+    # --store: the new bars also go into the market-data store
+    cmd = [sys.executable, str(script_path), "--days", str(days), "--out", out, "--interval", interval, "--incremental",
+           "--store", str(store.STORE_DIR)]
     add_text_status(state, f"Running: {' '.join(cmd)}")
 
     subprocess.run(cmd, check=True)  # will raise on error
@@ -43,9 +119,9 @@ def fetch_eth_via_binance(state: AppState, days: int, out: str, script_path: pat
         return
 
     try:
-        df = pd.read_csv(csv_file)
-        state.csv_path = csv_file            # ← important: keep path in sync
-        state.csv_data = df
+        df = read_csv_cached(csv_file)
+        set_base_data(state, csv_file, df)   # ← important: keep path in sync
+        get_worker().preload(str(csv_file))
         add_text_status(state, f"Auto-loaded CSV ({len(df)} rows) → {out}")
         dpg.set_value("CSV_CURRENT", f"Current CSV: {str(csv_file)}")
         if dpg.is_item_shown("data_entry"):
@@ -0,0 +1,106 @@
+# actions/history.py
+# Run History window: every finished run is saved to the run store (data/runs.py) and can be
+# listed, filtered and overlaid on the equity plot later without running it again.
+import sqlite3
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status
+from STRATEGIES.metrics import results_equity, results_starting_balance
+
+ALL = "All"
+
+
+def dataset_label(state: AppState) -> str:
+    # How the run history names the data a run used
+    if state.store_query is not None:
+        return f"{state.store_query['symbol']}/{state.store_query['interval']}"
+    return state.csv_path.name if state.csv_path is not None else ""
+
+
+def record_run(state: AppState, results, strategy: str, dataset: str = "", interval: str = "",
+               params: dict = None):
+    # Main thread, once the results are on screen. A run that can't be saved is still shown
+    if results is None:
+        return
+    try:
+        run_id = state.run_store.save(results, strategy, dataset or dataset_label(state),
+                                      interval or state.chart_interval, params)
+    except (OSError, sqlite3.Error) as e:
+        add_text_status(state, f"Could not save the run to {state.run_store.root}: {e}")
+        return
+    results.attrs["run_id"] = run_id
+    refresh_run_history(state)
+
+
+def _filter_value(tag: str):
+    value = dpg.get_value(tag)
+    return None if not value or value == ALL else value
+
+
+def refresh_run_history(state: AppState, sender=None, app_data=None):
+    if not dpg.is_item_shown("run_history_window"):
+        return
+    store = state.run_store
+    dpg.configure_item("history_strategy", items=[ALL] + store.strategies())
+    dpg.configure_item("history_dataset", items=[ALL] + store.datasets())
+    try:
+        table = store.list(_filter_value("history_strategy"), _filter_value("history_dataset"),
+                           _filter_value("history_start"), _filter_value("history_end"))
+    except (ValueError, sqlite3.Error) as e:
+        add_text_status(state, f"Run history: {e}")
+        return
+    dpg.set_value("history_count", f"{len(table)} runs")
+
+    dpg.delete_item("run_history_table", children_only=True)
+    dpg.add_table_column(label="Overlay", parent="run_history_table")
+    for col in table.columns:
+        dpg.add_table_column(label=col, parent="run_history_table")
+    for row in table.itertuples(index=False):
+        with dpg.table_row(parent="run_history_table"):
+            dpg.add_checkbox(default_value=row.ID in state.run_overlays, user_data=int(row.ID),
+                             callback=lambda s, a, u: overlay_run_cb(state, s, a, u))
+            for value in row:
+                dpg.add_text(f"{value:,.2f}" if isinstance(value, float) else str(value))
+
+
+def show_run_history(state: AppState):
+    dpg.show_item("run_history_window")
+    refresh_run_history(state)
+
+
+def _overlay_tag(run_id: int) -> str:
+    return f"run_overlay_{run_id}"
+
+
+def overlay_run_cb(state: AppState, sender, app_data, run_id: int):
+    # Draw (or remove) a stored run's equity curve on the equity plot
+    tag = _overlay_tag(run_id)
+    if dpg.does_item_exist(tag):
+        dpg.delete_item(tag)
+    if run_id in state.run_overlays:
+        state.run_overlays.remove(run_id)
+    if not app_data:
+        return
+    try:
+        results = state.run_store.load(run_id)
+    except (KeyError, OSError, sqlite3.Error) as e:
+        add_text_status(state, f"Could not load run {run_id}: {e}")
+        return
+    if results.empty:
+        add_text_status(state, f"Run {run_id} has no trades to draw.")
+        return
+    # Same line as equity_plot draws for the run on screen: exits in time order, rebased to 0%
+    trade_ns, balance = results_equity(results)
+    start = results_starting_balance(results)
+    dpg.show_item("equity_plot")
+    dpg.add_line_series((trade_ns / 1e9).tolist(), ((balance - start) / start * 100.0).tolist(),
+                        parent="y_axis_equity", tag=tag, label=f"Run #{run_id}", skip_nan=True)
+    state.run_overlays.append(run_id)
+
+
+def clear_run_overlays_cb(state: AppState):
+    for run_id in state.run_overlays:
+        if dpg.does_item_exist(_overlay_tag(run_id)):
+            dpg.delete_item(_overlay_tag(run_id))
+    state.run_overlays.clear()
+    refresh_run_history(state)
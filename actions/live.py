@@ -0,0 +1,172 @@
+# actions/live.py
+# Live mode: a kline feed (Binance websocket, or a replay of the loaded data) runs on a background
+# asyncio loop. Each bar is pushed into a ring buffer together with its EMA, and closed bars are
+# handed to the selected strategy's state machine on that same thread. poll_live (every frame,
+# main thread) only copies the ring buffer into the existing chart series with set_value.
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status, add_text_status_backtest
+from data.live import LiveFeed, RingBuffer, binance_kline_feed, replay_feed, seed_mismatch
+from STRATEGIES.engine import LONG
+from STRATEGIES.indicators import EMA
+from STRATEGIES.indicator_cache import indicator_series
+from STRATEGIES.live import ConfluenceLive, SimpleStrategyLive
+from STRATEGIES.strategy_pt import ConfluenceParams
+
+LIVE_SOURCES = ("Replay loaded data", "Binance WebSocket")
+LIVE_STRATEGIES = ("None", "Simple Strategy", "Confluence Based Strategy")
+
+
+@dataclass
+class LiveSession:
+    state: AppState
+    buffer: RingBuffer
+    ema: EMA
+    strategy: Any = None
+    feed: Optional[LiveFeed] = None
+    drawn_version: int = -1
+    bar_time_sum: float = 0.0   # seconds spent handling bars on the feed thread
+    bar_time_max: float = 0.0
+    closed_bars: int = 0
+
+    def on_bar(self, bar: dict):
+        # Feed thread: indicator, strategy and ring buffer update for one bar
+        t0 = time.perf_counter()
+        ema = self.ema.update(bar) if bar["closed"] else self.ema.peek(bar)
+        self.buffer.push({"x": bar["Date"] / 1000.0, "o": bar["Open"], "h": bar["High"], "l": bar["Low"],
+                          "c": bar["Close"], "v": bar["Volume"], "ema": ema})
+        if bar["closed"]:
+            self.closed_bars += 1
+            if self.strategy is not None:
+                for event in self.strategy.on_bar(bar):
+                    log_live_event(self, event)
+        elapsed = time.perf_counter() - t0
+        self.bar_time_sum += elapsed
+        self.bar_time_max = max(self.bar_time_max, elapsed)
+
+
+def log_live_event(session: LiveSession, event: dict):
+    # add_text_status_backtest only buffers, so this is fine from the feed thread
+    state = session.state
+    side = "Long" if event.get("side") == LONG else "Short"
+    if event["kind"] == "setup":
+        add_text_status_backtest(state, f"[LIVE] {'BULLISH' if event['side'] == LONG else 'BEARISH'} FVG FOUND")
+    elif event["kind"] == "trade":
+        when = time.strftime("%Y-%m-%d %H:%M", time.gmtime(event["time"] / 1000)) if event.get("time") else "?"
+        add_text_status_backtest(state, f"[LIVE] Trade {side} closed @ {when} | Δ: {event['pnl']:+.2f} | Bal: {event['balance']:.2f}")
+    elif event["kind"] == "rejected":
+        add_text_status_backtest(state, "[LIVE] Not enough balance to take trade.")
+
+
+def _make_strategy(name: str):
+    if name == "Simple Strategy":
+        return SimpleStrategyLive()
+    if name == "Confluence Based Strategy":
+        return ConfluenceLive(ConfluenceParams())
+    return None
+
+
+def _add_live_series(state: AppState, snap: dict):
+    # The series are created once here, every later update goes through set_value
+    for tag in ("candles", "volume_stem", "EMA_line_series"):
+        if dpg.does_item_exist(tag):
+            dpg.delete_item(tag)
+    dpg.add_candle_series(snap["x"], snap["o"], snap["c"], snap["l"], snap["h"], parent="y_axis", tag="candles",
+                          weight=float(dpg.get_value("weight_slider")), time_unit=dpg.mvTimeUnit_Min, tooltip=False)
+    dpg.add_line_series(snap["x"], snap["ema"], parent="y_axis", label="EMA", tag="EMA_line_series", skip_nan=True)
+    dpg.add_stem_series(snap["x"], snap["v"], parent="y_axis_volume", tag="volume_stem")
+    dpg.show_item("chart")
+    dpg.fit_axis_data("x_axis"); dpg.fit_axis_data("y_axis")
+
+
+def start_live_cb(state: AppState):
+    if state.live is not None:
+        add_text_status(state, "Live mode is already running.")
+        return
+    source = dpg.get_value("live_source")
+    capacity = max(100, int(dpg.get_value("live_capacity")))
+    history = state.csv_data
+    if source == LIVE_SOURCES[0]:
+        if history is None or len(history) < 2:
+            add_text_status(state, "Load a CSV to replay first.")
+            return
+        warmup = min(max(1, int(dpg.get_value("live_warmup"))), len(history) - 1)
+        history, to_replay = history.iloc[:warmup], history.iloc[warmup:]
+        speed = float(dpg.get_value("live_speed"))
+        feed = lambda: replay_feed(to_replay, speed)
+    else:
+        symbol, interval = dpg.get_value("live_symbol").strip(), dpg.get_value("live_interval").strip()
+        feed = lambda: binance_kline_feed(symbol, interval)
+        # Only bars of the same market and timeframe can stand in for the feed's past
+        reason = seed_mismatch(history, symbol, interval, (state.store_query or {}).get("symbol"),
+                               state.csv_path.name if state.csv_path is not None else "")
+        if reason is not None:
+            if history is not None:
+                add_text_status(state, f"[LIVE] Starting cold: the loaded data {reason}.")
+            history = None
+
+    # Seed the EMA, the strategy and the ring buffer with the history we already have
+    session = LiveSession(state=state, buffer=RingBuffer(capacity), ema=EMA(state.ema_period),
+                          strategy=_make_strategy(dpg.get_value("live_strategy")))
+    if history is not None and len(history):
+        ema = indicator_series(history, session.ema).to_numpy(dtype=float)
+        x = history["Date"].to_numpy(dtype="datetime64[ns]").view("int64") / 1e9
+        session.buffer.extend({"x": x, "o": history["Open"].to_numpy(float), "h": history["High"].to_numpy(float),
+                               "l": history["Low"].to_numpy(float), "c": history["Close"].to_numpy(float),
+                               "v": history["Volume"].to_numpy(float), "ema": ema})
+        if session.strategy is not None:
+            ms = history["Date"].to_numpy(dtype="datetime64[ns]").view("int64") // 10**6
+            for bar, t in zip(history[["Open", "High", "Low", "Close"]].to_dict("records"), ms):
+                bar["Date"] = int(t)
+                session.strategy.on_bar(bar)  # warm-up, events from the past aren't logged
+            add_text_status_backtest(state, f"[LIVE] Strategy warmed up on {len(history)} bars | Bal: {session.strategy.account.balance:.2f}")
+
+    state.chart_arrays = None  # level of detail stays out of the way, the ring buffer is small
+    state.chart_view = None
+    _add_live_series(state, session.buffer.snapshot())
+    session.drawn_version = session.buffer.version
+
+    session.feed = LiveFeed(feed, session.on_bar)
+    state.live = session
+    session.feed.start()
+    add_text_status(state, f"Live mode started: {source}")
+
+
+def stop_live_cb(state: AppState):
+    session = state.live
+    if session is None:
+        add_text_status(state, "Live mode is not running.")
+        return
+    session.feed.stop()
+    state.live = None
+    add_text_status(state, f"Live mode stopped after {session.feed.bars} updates.")
+
+
+def poll_live(state: AppState):
+    # Main thread, once per frame: redraw only when the ring buffer changed
+    session = state.live
+    if session is None:
+        return
+    if session.buffer.version != session.drawn_version and dpg.does_item_exist("candles"):
+        version = session.buffer.version
+        snap = session.buffer.snapshot()
+        dpg.set_value("candles", [snap["x"], snap["o"], snap["c"], snap["l"], snap["h"]])
+        dpg.set_value("volume_stem", [snap["x"], snap["v"]])
+        dpg.set_value("EMA_line_series", [snap["x"], snap["ema"]])
+        if dpg.get_value("live_follow"):
+            dpg.fit_axis_data("x_axis"); dpg.fit_axis_data("y_axis")
+        session.drawn_version = version
+
+    updates = session.feed.bars
+    avg_us = session.bar_time_sum / updates * 1e6 if updates else 0.0
+    dpg.set_value("live_status", f"Updates: {updates} | Closed bars: {session.closed_bars} | "
+                                 f"per bar: {avg_us:.0f}µs avg, {session.bar_time_max * 1e6:.0f}µs max")
+    if session.feed.finished:
+        state.live = None
+        if session.feed.error:
+            add_text_status(state, f"Live feed stopped: {session.feed.error}")
+        else:
+            add_text_status(state, "Live feed finished.")
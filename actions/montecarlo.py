@@ -0,0 +1,55 @@
+# actions/montecarlo.py
+# "Monte Carlo" section of the Backtesting Config window: resample the trades of the run on
+# screen (state.backtest_results) and draw the percentile bands as a fan on the equity plot.
+import numpy as np
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status, add_text_status_backtest
+from actions.worker import submit_job
+from STRATEGIES.montecarlo import monte_carlo, trade_pnl
+
+MC_SERIES = ("mc_band_outer", "mc_band_inner", "mc_median")
+
+
+def run_monte_carlo_cb(state: AppState):
+    results = state.backtest_results
+    if results is None or results.empty:
+        add_text_status(state, "Run a backtest with some trades first, Monte Carlo resamples its trades.")
+        return
+    paths = int(dpg.get_value("mc_paths"))
+    method = str(dpg.get_value("mc_method"))
+    if paths < 1:
+        add_text_status(state, "Monte Carlo needs at least one path.")
+        return
+    starting_balance, pnl = trade_pnl(results)
+    dates = results["Date"].to_numpy(dtype="datetime64[ns]")
+    add_text_status_backtest(state, f"Running Monte Carlo: {paths:,} {method} paths of {len(pnl):,} trades...")
+
+    def work(job):
+        return monte_carlo(pnl, starting_balance, paths, method, progress=job.progress), dates
+
+    submit_job(state, "Monte Carlo", work, on_done=show_monte_carlo, unit="paths")
+
+
+def show_monte_carlo(state: AppState, result):
+    # Main thread: percentile table in the backtest log, fan chart behind the equity line
+    mc, dates = result
+    state.montecarlo = mc
+    for row in mc.summary().to_dict("records"):
+        add_text_status_backtest(
+            state,
+            f"P{row['Percentile']:g}: final {row['Final Balance']:,.2f} ({row['Return %']:+.2f}%) | max drawdown {row['Max Drawdown %']:.2f}%"
+        )
+    add_text_status_backtest(state, f"Monte Carlo completed: {mc.paths:,} paths, {mc.loss_probability():.1f}% end below the starting balance.")
+
+    # Band point k is the balance after k trades, drawn at the k-th exit in time (overlapping trades
+    # can close out of the order they are listed in)
+    x = (np.sort(dates)[np.maximum(mc.steps - 1, 0)].view("int64") / 1e9).tolist()
+    pct = {q: ((band / mc.starting_balance - 1.0) * 100.0).tolist() for q, band in mc.bands.items()}
+    for tag in MC_SERIES:
+        if dpg.does_item_exist(tag):
+            dpg.delete_item(tag)
+    dpg.show_item("equity_plot")
+    dpg.add_shade_series(x, pct[5], y2=pct[95], parent="y_axis_equity", tag="mc_band_outer", label="MC 5-95%")
+    dpg.add_shade_series(x, pct[25], y2=pct[75], parent="y_axis_equity", tag="mc_band_inner", label="MC 25-75%")
+    dpg.add_line_series(x, pct[50], parent="y_axis_equity", tag="mc_median", label="MC median")
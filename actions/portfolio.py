@@ -0,0 +1,82 @@
+# actions/portfolio.py
+# Portfolio window: several store symbols on one aligned panel (data/panel.py), one strategy over
+# all of them with shared capital (STRATEGIES/portfolio.py). The panel stays in state.portfolio,
+# so running again on the same symbols and range doesn't reload it.
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import UIReporter, add_text_status
+from data import store
+from data.panel import load_panel
+from actions.worker import submit_job
+from actions.backtest import equity_plot, show_metrics_table
+from actions.timing import RunMetrics
+from actions.history import record_run
+from STRATEGIES.metrics import results_metrics
+from STRATEGIES.portfolio import run_portfolio
+
+
+def open_portfolio_window(state: AppState):
+    if not dpg.get_value("portfolio_symbols"):
+        dpg.set_value("portfolio_symbols", ", ".join(store.symbols()))
+    dpg.show_item("portfolio_window")
+
+
+def _portfolio_query(state: AppState) -> dict:
+    symbols = [s.strip().upper() for s in dpg.get_value("portfolio_symbols").replace(" ", ",").split(",") if s.strip()]
+    return {"symbols": tuple(dict.fromkeys(symbols)), "interval": dpg.get_value("portfolio_interval").strip(),
+            "start": dpg.get_value("portfolio_start") or None, "end": dpg.get_value("portfolio_end") or None}
+
+
+def run_portfolio_cb(state: AppState):
+    query = _portfolio_query(state)
+    if not query["symbols"] or not query["interval"]:
+        add_text_status(state, "Enter the symbols and the interval of the portfolio.")
+        return
+    strategy = dpg.get_value("portfolio_strategy")
+    cached = state.portfolio if state.portfolio is not None and state.portfolio[0] == query else None
+    run = RunMetrics(name=f"Portfolio {strategy}", profile=state.profile_runs)
+
+    # Worker thread: loading 50 symbols from the store takes a while too
+    def work(job):
+        if cached is not None:
+            panel = cached[1]
+        else:
+            with run.phase("load panel"):
+                panel = load_panel(query["symbols"], query["interval"], query["start"], query["end"])
+        run.rows = len(panel)
+        with run.phase("strategy"):
+            results = run_portfolio(panel, strategy, reporter=UIReporter(state), progress=job.progress)
+        run.trades = len(results) if results is not None else 0
+        return panel, results
+
+    def done(state: AppState, result):
+        panel, results = result
+        state.portfolio = (query, panel)
+        show_portfolio_results(state, results)
+        record_run(state, results, f"Portfolio {strategy}", ",".join(panel.symbols), query["interval"],
+                   {"start": query["start"], "end": query["end"]})
+
+    submit_job(state, f"Portfolio ({len(query['symbols'])} symbols)", work, on_done=done, unit="symbols",
+               metrics=run)
+
+
+def show_portfolio_results(state: AppState, results):
+    # Main thread: combined equity in the equity plot, per-symbol rows in the portfolio window
+    if results is None:
+        return
+    state.backtest_results = results
+    show_metrics_table(results_metrics(results))
+
+    assets = results.attrs["assets"]
+    dpg.delete_item("portfolio_assets_table", children_only=True)
+    for col in assets.columns:
+        dpg.add_table_column(label=col, parent="portfolio_assets_table")
+    for row in assets.itertuples(index=False):
+        with dpg.table_row(parent="portfolio_assets_table"):
+            for value in row:
+                dpg.add_text(f"{value:,.2f}" if isinstance(value, float) else str(value))
+
+    query, panel = state.portfolio
+    dpg.set_value("portfolio_status", f"{len(panel.symbols)} symbols x {len(panel):,} bars "
+                                      f"({panel.nbytes / 2**20:,.1f} MB) | {len(results):,} trades")
+    equity_plot(state, label=f"Portfolio {dpg.get_value('portfolio_strategy')} Equity")
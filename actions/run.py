@@ -0,0 +1,25 @@
+# actions/run.py
+# "Run Backtest" button and the mode selector in the Backtesting Config window
+import dearpygui.dearpygui as dpg
+from state import AppState
+from actions.backtest import backtest_strategy
+from actions.sweep import run_parameter_sweep
+from actions.walkforward import run_walk_forward
+
+BACKTEST_MODES = ("Single Run", "Parameter Sweep", "Walk-Forward")
+
+
+def backtest_mode_cb(state: AppState, sender, app_data):
+    # Sweep ranges are used by both the sweep and walk-forward modes
+    dpg.configure_item("sweep_group", show=app_data in ("Parameter Sweep", "Walk-Forward"))
+    dpg.configure_item("walkforward_group", show=app_data == "Walk-Forward")
+
+
+def run_backtest_cb(state: AppState):
+    mode = dpg.get_value("backtest_mode_combo")
+    if mode == "Parameter Sweep":
+        run_parameter_sweep(state)
+    elif mode == "Walk-Forward":
+        run_walk_forward(state)
+    else:
+        backtest_strategy(state, str(dpg.get_value("strategy_combo")))
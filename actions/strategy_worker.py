@@ -0,0 +1,97 @@
+# actions/strategy_worker.py
+# Client side of the persistent strats.py worker.
+# The worker process is started on first use and reused for every run, so the interpreter,
+# pandas and the loaded CSVs stay warm; jobs and results go over a multiprocessing pipe.
+# The worker is spawned, not forked: forking the app would copy DearPyGui's and the render/tooltip
+# threads' state mid-flight into the child.
+import atexit
+import multiprocessing as mp
+import threading
+from typing import Callable, Optional
+import strats
+from STRATEGIES.progress import BacktestCancelled
+
+JOB_TIMEOUT = 120.0  # seconds to wait for a response before the worker is considered stuck
+
+_mp = mp.get_context("spawn")
+
+
+class StrategyWorker:
+    def __init__(self):
+        self._proc = None
+        self._conn = None
+        self._lock = threading.Lock()  # one job in flight at a time, callers may be on different threads
+
+    def _start(self):
+        parent_conn, child_conn = _mp.Pipe()
+        self._proc = _mp.Process(target=strats.serve, args=(child_conn,), daemon=True, name="strategy-worker")
+        self._proc.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def _stop(self):
+        if self._conn is not None:
+            try:
+                self._conn.send({"op": "shutdown"})
+            except (OSError, ValueError):
+                pass
+            self._conn.close()
+            self._conn = None
+        if self._proc is not None:
+            self._proc.join(timeout=2)
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc = None
+
+    def request(self, job: dict, timeout: float = JOB_TIMEOUT,
+                on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        # Send one job and wait for its result; (re)starts the worker if it isn't running.
+        # Progress messages sent ahead of the result go to on_event; if it raises BacktestCancelled
+        # the worker is told to stop and the result is {"cancelled": True}.
+        # timeout is the longest silence allowed: a running backtest reports several times a second,
+        # and the worker sends a heartbeat while it is busy without reporting (loading a large CSV)
+        with self._lock:
+            if self._proc is None or not self._proc.is_alive():
+                self._stop()
+                self._start()
+            cancelled = False
+            try:
+                self._conn.send(job)
+                while True:
+                    if not self._conn.poll(timeout):
+                        self._stop()
+                        return {"error": f"Strategy worker timed out after {timeout:.0f}s"}
+                    msg = self._conn.recv()
+                    if "event" not in msg:
+                        return {"cancelled": True} if cancelled else msg
+                    if on_event is None or cancelled or msg["event"] == "heartbeat":
+                        continue
+                    try:
+                        on_event(msg)
+                    except BacktestCancelled:
+                        cancelled = True
+                        self._conn.send({"op": "cancel"})
+            except (EOFError, OSError) as e:
+                self._stop()
+                return {"error": f"Strategy worker died: {e}"}
+
+    def preload(self, source):
+        # Warm the worker's dataset cache without blocking the caller; source is a CSV path or a
+        # job's data fields ({"store": {...}})
+        job = {"op": "load", **source} if isinstance(source, dict) else {"op": "load", "csv_path": source}
+        threading.Thread(target=self.request, args=(job,), daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            self._stop()
+
+
+_worker: Optional[StrategyWorker] = None
+
+
+def get_worker() -> StrategyWorker:
+    global _worker
+    if _worker is None:
+        _worker = StrategyWorker()
+        atexit.register(_worker.shutdown)
+    return _worker
@@ -0,0 +1,69 @@
+# actions/sweep.py
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status, add_text_status_backtest
+from STRATEGIES.sweep import parse_range, parameter_grid, sweep_confluence
+from actions.worker import submit_job
+
+# sweep parameter -> (input tag, type)
+SWEEP_INPUTS = {
+    "leverage":         ("sweep_leverage", float),
+    "starting_balance": ("sweep_starting_balance", float),
+    "trade_risk_cash":  ("sweep_trade_risk_cash", float),
+    "ema_period":       ("sweep_ema_period", int),
+    "reward_ratio":     ("sweep_reward_ratio", float),
+}
+SWEEP_TABLE_ROWS = 200  # only the best rows are drawn, the full table stays in state.sweep_results
+
+
+def read_sweep_grid(state: AppState, mode: str = "Parameter sweep"):
+    # Parameter grid from the sweep inputs, or None (with a status message) if it can't be used
+    if state.csv_data is None:
+        add_text_status(state, f"No CSV loaded for {mode.lower()}.")
+        return None
+    if dpg.get_value("strategy_combo") != "Confluence Based Strategy":
+        add_text_status(state, f"{mode} is only available for the Confluence Based Strategy.")
+        return None
+
+    try:
+        ranges = {name: parse_range(str(dpg.get_value(tag)), cast) for name, (tag, cast) in SWEEP_INPUTS.items()}
+    except ValueError as e:
+        add_text_status(state, f"Invalid sweep range: {e}")
+        return None
+
+    grid = parameter_grid(ranges)
+    if not grid:
+        add_text_status(state, f"{mode} has no parameter combinations to run.")
+        return None
+    return grid
+
+
+def run_parameter_sweep(state: AppState):
+    grid = read_sweep_grid(state)
+    if grid is None:
+        return
+    add_text_status_backtest(state, f"Running parameter sweep over {len(grid)} combinations...")
+
+    rank_by = str(dpg.get_value("sweep_rank_combo"))
+    df = state.csv_data
+
+    def work(job):
+        return sweep_confluence(df, grid, rank_by=rank_by, progress=job.progress)
+
+    def done(state: AppState, table):
+        state.sweep_results = table
+        add_text_status_backtest(state, f"Sweep completed. Best {rank_by}: {table.iloc[0][rank_by]:.2f}")
+        show_sweep_table(table)
+
+    submit_job(state, "Parameter Sweep", work, on_done=done, unit="runs")
+
+
+def show_sweep_table(table):
+    dpg.delete_item("sweep_results_table", children_only=True)
+    for col in table.columns:
+        dpg.add_table_column(label=str(col), parent="sweep_results_table")
+    for row in table.head(SWEEP_TABLE_ROWS).itertuples(index=False):
+        with dpg.table_row(parent="sweep_results_table"):
+            for value in row:
+                dpg.add_text(f"{value:.2f}" if isinstance(value, float) else str(value))
+    dpg.show_item("sweep_results_window")
@@ -0,0 +1,196 @@
+# actions/timing.py
+# Where the time of a backtest goes: a RunMetrics record per run, filled phase by phase
+# ("worker: load" and "worker: strategy" for a backtest, timed inside the strats.py worker, and
+# "strats.py worker" for the rest of that round trip: the pipe, pickling the results and replaying
+# the log; "strategy" for a portfolio run; "chart", "equity_plot", and the per-frame
+# "ui log flush" while it runs).
+# Phases are timed with RunMetrics.phase (context manager) or @timed (decorator); with profiling
+# switched on each phase also runs under cProfile. Phases timed in another process come in
+# through add_worker, their profiles as text. The Run Metrics window lists the records and
+# exports them as JSON.
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, Optional
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status
+
+PROFILE_LINES = 30      # functions kept per phase profile, by cumulative time
+RUN_HISTORY = 50        # records kept in state.run_metrics
+
+
+@dataclass
+class RunMetrics:
+    name: str
+    rows: int = 0
+    profile: bool = False
+    started: str = field(default_factory=lambda: time.strftime("%Y-%m-%d %H:%M:%S"))
+    status: str = "running"
+    trades: int = 0
+    wall: float = 0.0                                     # submit to finished, seconds
+    phases: Dict[str, float] = field(default_factory=dict)  # seconds per phase, a phase entered again adds up
+    calls: Dict[str, int] = field(default_factory=dict)
+    _stats: Dict[str, pstats.Stats] = field(default_factory=dict, repr=False)
+    _texts: Dict[str, str] = field(default_factory=dict, repr=False)  # profiles that arrived as text
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, seconds: float, profiler: Optional[cProfile.Profile] = None):
+        # Phases run on the worker thread and on the main thread
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if profiler is not None:
+                if name in self._stats:
+                    self._stats[name].add(profiler)
+                else:
+                    self._stats[name] = pstats.Stats(profiler)
+
+    def add_worker(self, phase: str, seconds: float, timings: Dict[str, float], profiles: Dict[str, str]):
+        # A job timed inside the strats.py worker: its own parts become "worker: <name>" phases and
+        # phase keeps what is left of the seconds the round trip took
+        with self._lock:
+            for name, text in profiles.items():
+                key = f"worker: {name}"
+                self._texts[key] = self._texts.get(key, "") + text
+        for name, worker_seconds in timings.items():
+            self.add(f"worker: {name}", worker_seconds)
+        self.add(phase, max(0.0, seconds - sum(timings.values())))
+
+    def profiled(self) -> list:
+        return list(self._stats) + [name for name in self._texts if name not in self._stats]
+
+    @contextmanager
+    def phase(self, name: str, profile: Optional[bool] = None):
+        profiler = cProfile.Profile() if (self.profile if profile is None else profile) else None
+        t0 = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.add(name, time.perf_counter() - t0, profiler)
+
+    def finish(self, status: str):
+        self.status = status
+        self.wall = time.perf_counter() - self._t0
+
+    def profile_text(self, name: str) -> str:
+        stats = self._stats.get(name)
+        if stats is None:
+            return self._texts.get(name, "")
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+        return out.getvalue()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "started": self.started, "status": self.status, "rows": self.rows,
+                    "trades": self.trades, "wall_seconds": self.wall,
+                    "phases": [{"phase": k, "seconds": v, "calls": self.calls[k]} for k, v in self.phases.items()],
+                    "profiles": {k: self.profile_text(k) for k in self.profiled()}}
+
+
+def phase_timer(metrics: Optional[RunMetrics], name: str, profile: Optional[bool] = None):
+    # metrics may be None (nothing running), then this times nothing
+    return nullcontext() if metrics is None else metrics.phase(name, profile)
+
+
+def timed(name: str):
+    # Decorator for fn(state, ...): counted as a phase of the run in progress, if any
+    def wrap(fn):
+        @wraps(fn)
+        def inner(state: AppState, *args, **kwargs):
+            with phase_timer(state.current_run, name):
+                return fn(state, *args, **kwargs)
+        return inner
+    return wrap
+
+
+def finish_run(state: AppState, metrics: RunMetrics, status: str):
+    # Main thread, once the job's results are on screen (or it failed / was cancelled)
+    metrics.finish(status)
+    state.current_run = None
+    state.run_metrics.append(metrics)
+    del state.run_metrics[:-RUN_HISTORY]
+    refresh_run_metrics(state)
+
+
+# ----- Run Metrics window -----
+
+def _run_label(i: int, m: RunMetrics) -> str:
+    return f"#{i + 1} {m.name} ({m.started}, {m.status})"
+
+
+def refresh_run_metrics(state: AppState, selected: Optional[int] = None):
+    if not dpg.does_item_exist("run_metrics_table"):
+        return
+    labels = [_run_label(i, m) for i, m in enumerate(state.run_metrics)]
+    dpg.configure_item("run_metrics_combo", items=labels)
+    if not labels:
+        return
+    if selected is None or not 0 <= selected < len(labels):
+        selected = len(labels) - 1
+    dpg.set_value("run_metrics_combo", labels[selected])
+    m = state.run_metrics[selected]
+    dpg.set_value("run_metrics_summary", f"{m.rows:,} bars | {m.trades:,} trades | wall {m.wall:.3f}s")
+
+    dpg.delete_item("run_metrics_table", children_only=True)
+    for col in ("Phase", "Seconds", "% of wall", "Calls"):
+        dpg.add_table_column(label=col, parent="run_metrics_table")
+    for name, seconds in m.phases.items():
+        with dpg.table_row(parent="run_metrics_table"):
+            dpg.add_text(name)
+            dpg.add_text(f"{seconds:.4f}")
+            dpg.add_text(f"{seconds / m.wall * 100:.1f}" if m.wall else "")
+            dpg.add_text(str(m.calls[name]))
+
+    profiled = m.profiled()
+    dpg.configure_item("run_metrics_phase", items=profiled)
+    if profiled and dpg.get_value("run_metrics_phase") not in profiled:
+        dpg.set_value("run_metrics_phase", profiled[0])
+    phase = dpg.get_value("run_metrics_phase")
+    dpg.set_value("run_metrics_profile", m.profile_text(phase) if phase in profiled
+                  else "Switch on profiling to capture cProfile output for the next run.")
+
+
+def run_metrics_select_cb(state: AppState, sender, app_data):
+    labels = [_run_label(i, m) for i, m in enumerate(state.run_metrics)]
+    refresh_run_metrics(state, labels.index(app_data) if app_data in labels else None)
+
+
+def run_metrics_phase_cb(state: AppState, sender, app_data):
+    labels = [_run_label(i, m) for i, m in enumerate(state.run_metrics)]
+    current = dpg.get_value("run_metrics_combo")
+    refresh_run_metrics(state, labels.index(current) if current in labels else None)
+
+
+def profile_runs_cb(state: AppState, sender, app_data):
+    state.profile_runs = bool(app_data)
+
+
+def show_run_metrics(state: AppState):
+    refresh_run_metrics(state)
+    dpg.show_item("run_metrics_window")
+
+
+def export_run_metrics_cb(state: AppState):
+    if not state.run_metrics:
+        add_text_status(state, "No backtest runs recorded yet.")
+        return
+    try:
+        state.run_metrics_path.write_text(json.dumps([m.to_dict() for m in state.run_metrics], indent=2))
+    except OSError as e:
+        add_text_status(state, f"Could not write {state.run_metrics_path}: {e}")
+        return
+    add_text_status(state, f"Run metrics saved to {state.run_metrics_path}")
@@ -0,0 +1,56 @@
+# actions/walkforward.py
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status, add_text_status_backtest
+from actions.sweep import read_sweep_grid
+from actions.backtest import equity_plot, show_metrics_table
+from actions.history import record_run
+from STRATEGIES.metrics import results_metrics
+from actions.worker import submit_job
+from STRATEGIES.walkforward import walk_forward_confluence
+
+
+def run_walk_forward(state: AppState):
+    grid = read_sweep_grid(state, mode="Walk-forward")
+    if grid is None:
+        return
+    train_bars = int(dpg.get_value("wf_train_bars"))
+    test_bars = int(dpg.get_value("wf_test_bars"))
+    if train_bars <= 0 or test_bars <= 0:
+        add_text_status(state, "Walk-forward train and test windows must be positive.")
+        return
+    if train_bars >= len(state.csv_data):
+        add_text_status(state, f"Train window ({train_bars} bars) is longer than the loaded data ({len(state.csv_data)} bars).")
+        return
+
+    rank_by = str(dpg.get_value("sweep_rank_combo"))
+    add_text_status_backtest(state, f"Running walk-forward: {train_bars} train / {test_bars} test bars, {len(grid)} combinations per window...")
+    df = state.csv_data
+
+    def work(job):
+        return walk_forward_confluence(df, grid, train_bars, test_bars, rank_by=rank_by, progress=job.progress)
+
+    params = {"train_bars": train_bars, "test_bars": test_bars, "rank_by": rank_by, "combinations": len(grid)}
+    submit_job(state, "Walk-Forward", work, unit="windows",
+               on_done=lambda state, result: show_walk_forward(state, result, params))
+
+
+def show_walk_forward(state: AppState, result, params: dict = None):
+    # Main thread, once the worker has finished
+    oos, windows = result
+    state.backtest_results = oos
+    state.walkforward_results = windows
+    show_metrics_table(results_metrics(oos))
+    record_run(state, oos, "Walk-Forward", params=params)
+
+    for w in windows.to_dict("records"):
+        add_text_status_backtest(
+            state,
+            f"Test {w['Test Start']} → {w['Test End']} | EMA {w['ema_period']} RR {w['reward_ratio']} | OOS trades: {w['OOS Trades']} | OOS return: {w['OOS Return %']:.2f}%"
+        )
+    if oos.empty:
+        add_text_status_backtest(state, "Walk-forward completed. No out-of-sample trades.")
+    else:
+        add_text_status_backtest(state, f"Walk-forward completed. Final balance: {oos['Account Balance'].iloc[-1]:.2f}")
+
+    equity_plot(state)
@@ -0,0 +1,110 @@
+# actions/worker.py
+# Runs backtests, sweeps and walk-forwards on a background thread so the UI keeps drawing.
+# The worker only fills in the BacktestJob; poll_backtest_job (called every frame from the
+# event loop) updates the progress bar and hands the result back on the main thread.
+import threading
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+import dearpygui.dearpygui as dpg
+from state import AppState
+from ui.statusbar import add_text_status, add_text_status_backtest
+from STRATEGIES.progress import BacktestCancelled
+from actions.timing import RunMetrics, finish_run
+
+
+@dataclass
+class BacktestJob:
+    name: str
+    unit: str = "bars"              # what done/total count: bars for a backtest, runs for a sweep
+    on_done: Optional[Callable[[AppState, Any], None]] = None
+    done: int = 0
+    total: int = 0
+    trades: int = 0
+    result: Any = None
+    error: Optional[str] = None
+    cancelled: bool = False
+    finished: bool = False
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    metrics: Optional[RunMetrics] = None
+
+    def progress(self, done: int, total: int, trades: int = 0):
+        # Passed to the strategies as their ProgressFn, also where cancellation takes effect
+        if self.cancel_event.is_set():
+            raise BacktestCancelled()
+        self.done, self.total, self.trades = done, total, trades
+
+    def fraction(self) -> float:
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def overlay(self) -> str:
+        text = f"{self.name}: {self.done:,}/{self.total:,} {self.unit}"
+        if self.unit == "bars":
+            text += f" | {self.trades:,} trades"
+        return text
+
+
+def _run(job: BacktestJob, work: Callable[[BacktestJob], Any]):
+    try:
+        job.result = work(job)
+    except BacktestCancelled:
+        job.cancelled = True
+    except Exception as e:
+        job.error = f"{e}"
+        traceback.print_exc()
+    finally:
+        job.finished = True
+
+
+def submit_job(state: AppState, name: str, work: Callable[[BacktestJob], Any],
+               on_done: Optional[Callable[[AppState, Any], None]] = None, unit: str = "bars",
+               metrics: Optional[RunMetrics] = None) -> Optional[BacktestJob]:
+    # work(job) runs on the worker thread and must not touch state.backtest_results or the plots,
+    # on_done(state, result) runs on the main thread once it finishes.
+    # metrics: timing record of the run, stays state.current_run until on_done has returned
+    if state.backtest_job is not None:
+        add_text_status(state, f"{state.backtest_job.name} is still running, cancel it first.")
+        return None
+    job = BacktestJob(name=name, unit=unit, on_done=on_done, metrics=metrics)
+    state.backtest_job = job
+    state.current_run = metrics
+    dpg.configure_item("backtest_progress", overlay=f"{name}: starting...")
+    dpg.set_value("backtest_progress", 0.0)
+    threading.Thread(target=_run, args=(job, work), daemon=True).start()
+    return job
+
+
+def poll_backtest_job(state: AppState):
+    # Main thread, once per frame
+    job = state.backtest_job
+    if job is None:
+        return
+    dpg.set_value("backtest_progress", job.fraction())
+    dpg.configure_item("backtest_progress", overlay=job.overlay())
+    if not job.finished:
+        return
+
+    state.backtest_job = None
+    if job.cancelled:
+        status = "cancelled"
+        add_text_status_backtest(state, f"{job.name} cancelled.")
+        dpg.configure_item("backtest_progress", overlay=f"{job.name}: cancelled")
+    elif job.error is not None:
+        status = "failed"
+        add_text_status(state, f"{job.name} failed: {job.error}")
+        dpg.configure_item("backtest_progress", overlay=f"{job.name}: failed")
+    else:
+        status = "done"
+        dpg.set_value("backtest_progress", 1.0)
+        dpg.configure_item("backtest_progress", overlay=f"{job.name}: done")
+        if job.on_done is not None:
+            job.on_done(state, job.result)
+    if job.metrics is not None:
+        finish_run(state, job.metrics, status)
+
+
+def cancel_backtest_cb(state: AppState):
+    if state.backtest_job is None:
+        add_text_status(state, "No backtest running.")
+        return
+    state.backtest_job.cancel_event.set()
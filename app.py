@@ -4,11 +4,30 @@ import dearpygui.dearpygui as dpg
 from state import AppState
 from ui.charts import (
     generate_chart, tooltip_loop, weight_slider_cb, crosshair_cb,
-    configure_main_plot_cb, sync_on_zoom_cb, chart_fullsize, settings_window
+    configure_main_plot_cb, sync_on_zoom_cb, chart_fullsize, settings_window, refresh_chart_lod,
+    change_interval_cb
 )
-from ui.statusbar import configure_status_bar_cb, add_text_status, bottom_status_backtest
-from actions.dataflow import on_load_csv, file_dialog_download_cb
-from actions.backtest import backtest_strategy, reload_equity_plot
+from ui.statusbar import (
+    configure_status_bar_cb, add_text_status, bottom_status_backtest, clear_status_backtest,
+    flush_backtest_log, flush_status, spill_backtest_log_cb
+)
+from actions.dataflow import (
+    on_load_csv, file_dialog_download_cb, open_store_window, store_symbol_cb, store_interval_cb, on_load_store
+)
+from actions.backtest import reload_equity_plot, show_rolling_metric
+from actions.run import BACKTEST_MODES, backtest_mode_cb, run_backtest_cb
+from actions.worker import poll_backtest_job, cancel_backtest_cb
+from actions.timing import (
+    show_run_metrics, run_metrics_select_cb, run_metrics_phase_cb, profile_runs_cb, export_run_metrics_cb, phase_timer
+)
+from actions.live import LIVE_SOURCES, LIVE_STRATEGIES, start_live_cb, stop_live_cb, poll_live
+from actions.portfolio import open_portfolio_window, run_portfolio_cb
+from actions.montecarlo import run_monte_carlo_cb
+from actions.history import show_run_history, refresh_run_history, clear_run_overlays_cb
+from STRATEGIES.sweep import RANK_COLUMNS
+from STRATEGIES.metrics import ROLLING_COLUMNS
+from STRATEGIES.portfolio import PORTFOLIO_STRATEGIES
+from STRATEGIES.montecarlo import MC_METHODS
 
 def build_ui(state: AppState):
     dpg.create_context()
@@ -33,6 +52,9 @@ def build_ui(state: AppState):
                                      callback=weight_slider_cb, label="Weight")
                 # Add a button to open a settings window for crosshair and indicators
                 dpg.add_button(label="Settings", callback=lambda s, a: settings_window(state, s, a)) # Create a seperate script
+                # Intervals derived locally from the loaded CSV (filled in when a CSV is loaded)
+                dpg.add_combo((), tag="chart_interval_combo", label="Interval", width=80,
+                              callback=lambda s, a: change_interval_cb(state, s, a))
                 
                 #dpg.add_checkbox(label="Crosshair", tag="crosshair_checkbox", source="crosshair_value",
                                  #callback=lambda *a: crosshair_cb())
@@ -79,18 +101,60 @@ def build_ui(state: AppState):
         dpg.add_input_text(label="Number of days needed:", tag="days_input")
         dpg.add_button(label="Re-download data", callback=lambda: dpg.show_item("file_dialog_py"))
 
+    # Market-data store window: load a date range instead of a whole file
+    with dpg.window(label="Load from Store", tag="store_window", width=420, height=200, show=False):
+        dpg.add_combo((), label="Symbol", tag="store_symbol", width=150, callback=lambda s, a: store_symbol_cb(state, s, a))
+        dpg.add_combo((), label="Interval", tag="store_interval", width=150, callback=lambda s, a: store_interval_cb(state, s, a))
+        dpg.add_text("Stored: nothing", tag="store_range_text")
+        dpg.add_input_text(label="Start (YYYY-MM-DD, empty = first bar)", tag="store_start", width=150)
+        dpg.add_input_text(label="End (YYYY-MM-DD, inclusive, empty = last bar)", tag="store_end", width=150)
+        dpg.add_button(label="Load", callback=lambda: on_load_store(state))
+
+    # Live mode window: streams klines into the chart and runs a strategy bar by bar
+    with dpg.window(label="Live Mode", tag="live_window", width=460, height=300, show=False):
+        dpg.add_combo(LIVE_SOURCES, label="Source", tag="live_source", default_value=LIVE_SOURCES[0], width=200)
+        dpg.add_input_text(label="Symbol", tag="live_symbol", default_value="ETHUSDT", width=200)
+        dpg.add_input_text(label="Interval", tag="live_interval", default_value="5m", width=200)
+        dpg.add_combo(LIVE_STRATEGIES, label="Strategy", tag="live_strategy", default_value=LIVE_STRATEGIES[0], width=200)
+        dpg.add_input_float(label="Replay bars/sec", tag="live_speed", default_value=20.0, width=200)
+        dpg.add_input_int(label="Warm-up bars (replay)", tag="live_warmup", default_value=500, width=200)
+        dpg.add_input_int(label="Bars kept", tag="live_capacity", default_value=5000, width=200)
+        dpg.add_checkbox(label="Follow newest bar", tag="live_follow", default_value=True)
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="Start", callback=lambda: start_live_cb(state))
+            dpg.add_button(label="Stop", callback=lambda: stop_live_cb(state))
+        dpg.add_text("Not running", tag="live_status")
+
+    # Portfolio window: one strategy over several store symbols with shared capital
+    with dpg.window(label="Portfolio", tag="portfolio_window", width=560, height=400, show=False):
+        dpg.add_input_text(label="Symbols (comma separated)", tag="portfolio_symbols", width=250)
+        dpg.add_input_text(label="Interval", tag="portfolio_interval", default_value="5m", width=250)
+        dpg.add_input_text(label="Start (YYYY-MM-DD, empty = first bar)", tag="portfolio_start", width=150)
+        dpg.add_input_text(label="End (YYYY-MM-DD, inclusive, empty = last bar)", tag="portfolio_end", width=150)
+        dpg.add_combo(PORTFOLIO_STRATEGIES, label="Strategy", tag="portfolio_strategy", default_value="confluence", width=150)
+        dpg.add_button(label="Run Portfolio", callback=lambda: run_portfolio_cb(state))
+        dpg.add_text("Not run yet", tag="portfolio_status")
+        with dpg.table(tag="portfolio_assets_table", header_row=True, resizable=True, scrollY=True,
+                       borders_innerH=True, borders_outerH=True, borders_innerV=True, borders_outerV=True):
+            pass
+
     # Menu bar
     with dpg.viewport_menu_bar():
         with dpg.menu(label="BACKTESTING STRATEGY"):
             dpg.add_menu_item(label="BACKTEST", callback=lambda: dpg.show_item("backtest_config")) # EDIT
+            dpg.add_menu_item(label="PORTFOLIO", callback=lambda: open_portfolio_window(state))
+            dpg.add_menu_item(label="RUN HISTORY", callback=lambda: show_run_history(state))
         with dpg.menu(label="CSV VIEWER"):
             dpg.add_menu_item(label="Load CSV", callback=lambda: dpg.show_item("file_dialog_csv"))
+            dpg.add_menu_item(label="Load from Store", callback=lambda: open_store_window(state))
             dpg.add_menu_item(label="Generate Chart", callback=lambda: generate_chart(state))
+            dpg.add_menu_item(label="Live Mode", callback=lambda: dpg.show_item("live_window"))
         with dpg.menu(label="Download"):
             dpg.add_menu_item(label="Download Data", callback=lambda: dpg.show_item("data_entry"))
         dpg.add_menu_item(label="Status Bar", callback=lambda: (dpg.show_item("status_bar"), configure_status_bar_cb(state)))
         with dpg.menu(label="Settings"):
             dpg.add_menu_item(label="Show Metrics", callback=lambda: dpg.show_metrics())
+            dpg.add_menu_item(label="Run Metrics", callback=lambda: show_run_metrics(state))
             dpg.add_menu_item(label="Toggle Fullscreen", callback=lambda: (dpg.toggle_viewport_fullscreen(), configure_status_bar_cb(state)))
     
 
@@ -104,24 +168,97 @@ def build_ui(state: AppState):
             with dpg.group(horizontal=False):
                 with dpg.group(horizontal = True):
                     dpg.add_combo(("Please Select", "Simple Strategy", "Confluence Based Strategy"), default_value="Please Select", tag="strategy_combo", label = "Strategy Selection", width = 150)
+                    dpg.add_combo(BACKTEST_MODES, default_value="Single Run", tag="backtest_mode_combo", label = "Mode", width = 120,
+                                  callback=lambda s, a: backtest_mode_cb(state, s, a))
                 with dpg.group(horizontal = True):
                     dpg.add_button(label= "Load CSV", callback = lambda: dpg.show_item("file_dialog_csv")) 
                     dpg.add_text(f"Current CSV: {str(state.csv_path)}", tag = "CSV_CURRENT") # ADD NECESSARY VARIABLE WHICH CHANGES WHEN CSV IS LOADED
                 dpg.add_button(label = "Re-load equity plot", tag = "equity_plot_reload", callback = lambda: reload_equity_plot(state)) # ADD NECESSARY CALLBACK                                   
                 dpg.add_text("")
-                dpg.add_button(label= "Run Backtest", callback=lambda: backtest_strategy(state, str(dpg.get_value("strategy_combo")))) # ADD ARGUMENTS FOR THE SELECTED STRATEGY BASED OFF OF THE COMBO
+                with dpg.group(horizontal = True):
+                    dpg.add_button(label= "Run Backtest", callback=lambda: run_backtest_cb(state)) # Runs the selected strategy, sweep or walk-forward depending on the mode
+                    dpg.add_button(label= "Cancel", tag = "cancel_backtest", callback=lambda: cancel_backtest_cb(state))
+                # Filled in every frame from the background job (bars processed, trades so far)
+                dpg.add_progress_bar(tag = "backtest_progress", default_value = 0.0, overlay = "Idle", width = -1)
                 
-        
+        # Parameter sweep ranges: single value, "a,b,c" list or "start:stop:step"
+        with dpg.collapsing_header(label = "Parameter Sweep", tag = "sweep_group", show = False, default_open = True):
+            dpg.add_input_text(label = "Leverage", tag = "sweep_leverage", default_value = "10", width = 150)
+            dpg.add_input_text(label = "Starting Balance", tag = "sweep_starting_balance", default_value = "100000", width = 150)
+            dpg.add_input_text(label = "Risk per Trade (cash)", tag = "sweep_trade_risk_cash", default_value = "1000", width = 150)
+            dpg.add_input_text(label = "EMA Period", tag = "sweep_ema_period", default_value = "100:300:50", width = 150)
+            dpg.add_input_text(label = "Reward Ratio (1:x)", tag = "sweep_reward_ratio", default_value = "1.5,2,3", width = 150)
+            dpg.add_combo(RANK_COLUMNS, default_value = RANK_COLUMNS[0], tag = "sweep_rank_combo", label = "Rank By", width = 150)
+        # Walk-forward windows, in bars of the loaded CSV
+        with dpg.collapsing_header(label = "Walk-Forward", tag = "walkforward_group", show = False, default_open = True):
+            dpg.add_input_int(label = "Train Bars", tag = "wf_train_bars", default_value = 5000, width = 150)
+            dpg.add_input_int(label = "Test Bars", tag = "wf_test_bars", default_value = 1000, width = 150)
+        # Resamples the trades of the last run, the bands are drawn on the equity plot
+        with dpg.collapsing_header(label = "Monte Carlo", tag = "montecarlo_group", default_open = False):
+            dpg.add_input_int(label = "Paths", tag = "mc_paths", default_value = 10000, width = 150)
+            dpg.add_combo(MC_METHODS, default_value = MC_METHODS[0], tag = "mc_method", label = "Method", width = 150)
+            dpg.add_button(label = "Run Monte Carlo", callback=lambda: run_monte_carlo_cb(state))
+        # Filled in when a run finishes (STRATEGIES/metrics.py, from results.attrs["metrics"])
+        with dpg.collapsing_header(label = "Performance Metrics", tag = "metrics_group", default_open = True):
+            with dpg.table(tag = "metrics_table", header_row = True, resizable = True, borders_innerH = True,
+                           borders_outerH = True, borders_innerV = True, borders_outerV = True):
+                pass
+            # One metric over a moving window (results.attrs["rolling"]), picked here
+            dpg.add_combo(ROLLING_COLUMNS, default_value = ROLLING_COLUMNS[0], tag = "rolling_metric_combo", label = "Rolling Metric",
+                          width = 150, callback=lambda s, a: show_rolling_metric(state, s, a))
+            with dpg.plot(label = "Rolling Metric", tag = "rolling_plot", height = 200, width = -1, no_menus = True, crosshairs = True):
+                dpg.add_plot_axis(dpg.mvXAxis, label = "Date", tag = "x_axis_rolling", scale = dpg.mvPlotScale_Time)
+                dpg.add_plot_axis(dpg.mvYAxis, label = ROLLING_COLUMNS[0], tag = "y_axis_rolling")
+
 
         # Create a child window for another status bar for backtesting
         with dpg.group(horizontal = True):
             dpg.add_button(label = "Scroll to botton", tag = "status_backtest_bottom", callback=lambda: bottom_status_backtest(state)) # Add callback
             dpg.add_checkbox(label = "Auto Scroll", tag = "autoscroll_checkbox_bactest", source = "auto_scroll_value_backtest")
-        with dpg.child_window(label = "Backtest Status", tag = "backtest_status", height = -1, width = -1):
-            dpg.add_text("Backtest Status: Ready")
+            dpg.add_button(label = "Clear", callback=lambda: clear_status_backtest(state))
+            dpg.add_checkbox(label = "Save Log to File", tag = "spill_log_checkbox", callback=lambda s, a: spill_backtest_log_cb(state, s, a))
+        with dpg.child_window(label = "Backtest Status", tag = "backtest_status", height = -1, width = -1, horizontal_scrollbar = True):
+            # Single text item for the whole log, filled from state.backtest_log once per frame
+            dpg.add_text("Backtest Status: Ready", tag = "backtest_log_text")
         # Create function for auto scroll and adding text to the status bar
 
 
+    # Parameter sweep results window
+    with dpg.window(label="Parameter Sweep Results", tag="sweep_results_window", show=False, width=900, height=400):
+        with dpg.table(tag="sweep_results_table", header_row=True, resizable=True, scrollY=True,
+                       borders_innerH=True, borders_outerH=True, borders_innerV=True, borders_outerV=True):
+            pass
+
+    # Run metrics window: time per phase of each backtest, optional cProfile output
+    with dpg.window(label="Run Metrics", tag="run_metrics_window", show=False, width=700, height=500):
+        with dpg.group(horizontal=True):
+            dpg.add_combo((), tag="run_metrics_combo", label="Run", width=350, callback=lambda s, a: run_metrics_select_cb(state, s, a))
+            dpg.add_button(label="Export JSON", callback=lambda: export_run_metrics_cb(state))
+        dpg.add_checkbox(label="Profile phases (cProfile, slower)", tag="profile_runs_checkbox", callback=lambda s, a: profile_runs_cb(state, s, a))
+        dpg.add_text("No runs yet", tag="run_metrics_summary")
+        with dpg.table(tag="run_metrics_table", header_row=True, resizable=True, height=150,
+                       borders_innerH=True, borders_outerH=True, borders_innerV=True, borders_outerV=True):
+            pass
+        dpg.add_combo((), tag="run_metrics_phase", label="Profile of phase", width=200, callback=lambda s, a: run_metrics_phase_cb(state, s, a))
+        dpg.add_input_text(tag="run_metrics_profile", multiline=True, readonly=True, width=-1, height=-1)
+
+    # Run history window: stored runs (data/runs.py), filtered in SQLite, overlaid on the equity plot
+    with dpg.window(label="Run History", tag="run_history_window", show=False, width=900, height=450):
+        with dpg.group(horizontal=True):
+            dpg.add_combo(("All",), default_value="All", tag="history_strategy", label="Strategy", width=160,
+                          callback=lambda s, a: refresh_run_history(state, s, a))
+            dpg.add_combo(("All",), default_value="All", tag="history_dataset", label="Dataset", width=160,
+                          callback=lambda s, a: refresh_run_history(state, s, a))
+        with dpg.group(horizontal=True):
+            dpg.add_input_text(label="From", tag="history_start", hint="YYYY-MM-DD", width=110)
+            dpg.add_input_text(label="To", tag="history_end", hint="YYYY-MM-DD", width=110)
+            dpg.add_button(label="Refresh", callback=lambda: refresh_run_history(state))
+            dpg.add_button(label="Clear Overlays", callback=lambda: clear_run_overlays_cb(state))
+            dpg.add_text("", tag="history_count")
+        with dpg.table(tag="run_history_table", header_row=True, resizable=True, scrollY=True,
+                       borders_innerH=True, borders_outerH=True, borders_innerV=True, borders_outerV=True):
+            pass
+
     # Equity plot window
     with dpg.window(label="equity_plot", tag="equity_plot", show=False, width=800, height=600):
         with dpg.plot(label="Equity Plot", tag="equity_plot_graph", height=-1, width=-1, no_menus=True, crosshairs=True):
@@ -148,16 +285,22 @@ def build_ui(state: AppState):
     t = threading.Thread(target=tooltip_loop, args=(state,), daemon=True)
     t.start()
 
-def run_event_loop():
+def run_event_loop(state: AppState):
     while dpg.is_dearpygui_running():
+        poll_backtest_job(state)
+        with phase_timer(state.current_run, "ui log flush", profile=False):
+            flush_backtest_log(state)
+        flush_status(state)
+        poll_live(state)
         if dpg.is_item_shown("chart"):
             if dpg.does_item_exist("x_axis") and dpg.does_item_exist("x_axis_volume"):
                 x_min, x_max = dpg.get_axis_limits("x_axis")
                 dpg.set_axis_limits("x_axis_volume", x_min, x_max)
+                refresh_chart_lod(state)
         dpg.render_dearpygui_frame()
     dpg.destroy_context()
 
 if __name__ == "__main__":
     state = AppState()
     build_ui(state)
-    run_event_loop()
+    run_event_loop(state)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Headless batch backtests: run the strategies over many CSV files and/or market-data store series
+in parallel processes and write everything to disk. Nothing here imports DearPyGui, so it runs on
+a server without a display (e.g. a nightly cron job).
+
+    python batch.py eth_5m.csv eth_15m.csv --strategy simple confluence --out batch_results
+    python batch.py data_dir/ --store ETHUSDT/5m BTCUSDT/5m --start 2024-01-01 --interval 1H --workers 4
+
+For every dataset x strategy the results frame goes to <out>/<dataset>__<strategy>.csv and what the
+app would show in its status bar and backtest log to the matching .log file. summary.csv (and
+summary.json) has one row per job with its performance metrics; the exit code is 1 if any job failed.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+import strats
+from STRATEGIES.reporting import StreamReporter
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")
+
+
+def collect_jobs(args) -> List[dict]:
+    # One job per dataset (CSV file or store series) and strategy
+    datasets = []
+    for item in args.inputs:
+        path = Path(item)
+        files = sorted(path.glob("*.csv")) if path.is_dir() else [path]
+        for f in files:
+            datasets.append(({"csv_path": str(f)}, f.stem))
+    for spec in args.store or []:
+        symbol, _, interval = spec.partition("/")
+        if not interval:
+            raise SystemExit(f"--store expects SYMBOL/INTERVAL, got '{spec}'")
+        query = {"symbol": symbol, "interval": interval, "start": args.start, "end": args.end}
+        datasets.append(({"store": query}, f"{symbol}_{interval}"))
+
+    params = {k: v for k, v in {"ema_period": args.ema_period, "reward_ratio": args.reward_ratio,
+                                "leverage": args.leverage, "trade_risk_cash": args.trade_risk_cash,
+                                "starting_balance": args.starting_balance}.items() if v is not None}
+    jobs = []
+    for data, name in datasets:
+        label = f"{name}@{args.interval}" if args.interval else name
+        for strategy in args.strategy:
+            jobs.append({"op": "backtest", **data, "interval": args.interval, "strategy": strategy,
+                         "params": params, "name": _slug(label)})
+    return jobs
+
+
+def run_job(job: dict, out_dir: str) -> dict:
+    # Runs in a pool process; datasets stay cached in strats for the next job on the same file
+    stem = Path(out_dir) / f"{job['name']}__{job['strategy']}"
+    row = {"dataset": job["name"], "strategy": job["strategy"],
+           "source": job.get("csv_path") or json.dumps(job.get("store")), "error": ""}
+    t0 = time.perf_counter()
+    try:
+        with open(f"{stem}.log", "w", encoding="utf-8") as log:
+            result = strats.backtest(job, StreamReporter(log))
+        results = result.pop("results")
+        if results is not None:
+            results.to_csv(f"{stem}.csv", index=False)
+        result.pop("params", None)
+        result.pop("profiles", None)
+        row.update({f"{name}_seconds": seconds for name, seconds in result.pop("timings").items()})
+        row.update(result.pop("metrics"))
+        row.update(result)
+        if results is None:
+            row["error"] = "no results (not enough data for the strategy, see the log)"
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = time.perf_counter() - t0
+    return row
+
+
+def main():
+    p = ArgumentParser(description="Run backtests over many datasets without the UI.")
+    p.add_argument("inputs", nargs="*", help="CSV files, or directories of CSV files.")
+    p.add_argument("--store", nargs="+", metavar="SYMBOL/INTERVAL", help="Series from the market-data store.")
+    p.add_argument("--start", help="Store range start (YYYY-MM-DD), default first bar.")
+    p.add_argument("--end", help="Store range end (YYYY-MM-DD), default last bar.")
+    p.add_argument("--interval", help="Resample every dataset to this interval first (e.g. 1H).")
+    p.add_argument("--strategy", nargs="+", default=["confluence"], choices=strats.STRATEGY_NAMES)
+    p.add_argument("--ema-period", type=int)
+    p.add_argument("--reward-ratio", type=float)
+    p.add_argument("--leverage", type=float)
+    p.add_argument("--trade-risk-cash", type=float)
+    p.add_argument("--starting-balance", type=float)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel processes.")
+    p.add_argument("--out", default="batch_results", help="Output directory.")
+    args = p.parse_args()
+
+    jobs = collect_jobs(args)
+    if not jobs:
+        p.error("nothing to run, give CSV files/directories or --store series")
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+        futures = [pool.submit(run_job, job, str(out)) for job in jobs]
+        for n, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            outcome = f"FAILED {row['error']}" if row["error"] else \
+                f"{row['Trades']} trades, {row['Total Return %']:+.2f}%, Sharpe {row['Sharpe']:.2f}"
+            print(f"[{n}/{len(jobs)}] {row['dataset']} {row['strategy']}: {outcome} ({row['seconds']:.2f}s)", flush=True)
+
+    summary = pd.DataFrame(rows).sort_values(["dataset", "strategy"])
+    for col in ("rows", "Trades", "Max DD Duration (bars)"):
+        if col in summary:
+            summary[col] = summary[col].astype("Int64")  # failed jobs have none
+    summary.to_csv(out / "summary.csv", index=False)
+    (out / "summary.json").write_text(summary.to_json(orient="records", indent=2))
+    failed = int((summary["error"] != "").sum())
+    print(f"{len(rows)} jobs in {time.perf_counter() - t0:.1f}s, {failed} failed -> {out / 'summary.csv'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# data/benchmarks.py
+# Benchmark series to compare a run against, on the run's own time grid.
+# A benchmark is a sorted (time, close) pair of arrays. File benchmarks are parsed once per version
+# of the file (data/cache.py fingerprint) and kept in memory; buy-and-hold is built from the traded
+# data itself. on(grid) is a vectorized as-of join: each grid time gets the last close known at
+# that time, NaN before the benchmark starts.
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple, Union
+import numpy as np
+import pandas as pd
+from data.cache import fingerprint, read_csv_cached
+
+DAY_NS = 86_400 * 10**9
+
+# name -> (CSV with Date and Close, delay before a bar's close is known). Daily files are stamped
+# at midnight but close later that day, so their close counts from the end of the day
+BENCHMARK_FILES: Dict[str, Tuple[Path, int]] = {"S&P 500": (Path("sp500.csv"), DAY_NS)}
+BUY_AND_HOLD = "Buy & Hold"
+
+_loaded: Dict[str, "Benchmark"] = {}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    times: np.ndarray   # int64 epoch ns, sorted
+    close: np.ndarray   # float64
+
+    def on(self, grid: np.ndarray) -> np.ndarray:
+        return asof(self.times, self.close, grid)
+
+
+def asof(times: np.ndarray, values: np.ndarray, grid: np.ndarray, fill: float = np.nan) -> np.ndarray:
+    # values[last i with times[i] <= t] for every t in grid (times sorted), fill before the first
+    idx = np.searchsorted(times, grid, side="right") - 1
+    out = np.asarray(values, dtype=np.float64)[np.maximum(idx, 0)] if len(times) else np.empty(len(grid))
+    out[idx < 0] = fill
+    return out
+
+
+def from_frame(name: str, df: pd.DataFrame, delay_ns: int = 0) -> Benchmark:
+    times = pd.to_datetime(df["Date"], errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+    close = df["Close"].to_numpy(dtype=np.float64)
+    ok = (times != np.iinfo(np.int64).min) & np.isfinite(close)
+    times, close = times[ok], close[ok]
+    if len(times) > 1 and (np.diff(times) < 0).any():
+        order = np.argsort(times, kind="stable")
+        times, close = times[order], close[order]
+    return Benchmark(name, times + delay_ns, close)
+
+
+def load_benchmark(name: str) -> Benchmark:
+    # One of BENCHMARK_FILES, parsed again only when the file changes
+    path, delay_ns = BENCHMARK_FILES[name]
+    key = f"{name}|{fingerprint(path)}"
+    if key not in _loaded:
+        for old in [k for k in _loaded if k.startswith(f"{name}|")]:
+            del _loaded[old]
+        _loaded[key] = from_frame(name, read_csv_cached(path), delay_ns)
+    return _loaded[key]
+
+
+def buy_and_hold(df: pd.DataFrame) -> Benchmark:
+    return from_frame(BUY_AND_HOLD, df)
+
+
+def equal_weight(times: np.ndarray, closes: np.ndarray, name: str = BUY_AND_HOLD) -> Benchmark:
+    # Buy-and-hold of several assets, the same cash in each: closes is (time x asset) with NaN
+    # where an asset has no bar (carried forward from its last close, 1.0 before its first)
+    n = len(times)
+    valid = ~np.isnan(closes)
+    last = np.maximum.accumulate(np.where(valid, np.arange(n)[:, None], -1), axis=0)
+    filled = np.take_along_axis(closes, np.maximum(last, 0), axis=0)
+    first = np.where(valid.any(axis=0), closes[valid.argmax(axis=0), np.arange(closes.shape[1])], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(last >= 0, filled / first, 1.0)
+    return Benchmark(name, np.asarray(times, dtype=np.int64), np.nanmean(growth, axis=1))
+
+
+def align(benchmarks: Dict[str, Union[Benchmark, None]], grid: np.ndarray) -> Dict[str, np.ndarray]:
+    # Every benchmark as-of joined onto grid in one call, missing ones left out
+    return {name: b.on(grid) for name, b in benchmarks.items() if b is not None}
@@ -0,0 +1,132 @@
+# data/cache.py
+# Transparent binary cache for OHLCV CSVs.
+# The first read of a CSV writes a typed copy (one .npy per column, time columns as int64 epoch ns)
+# keyed on path + size + mtime; later reads memory-map that copy (copy-on-write, so the frames are
+# writable like any other) instead of parsing text.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(".cache") / "ohlcv"
+TIME_COLUMNS = ("Date", "Time")
+CACHE_VERSION = 1
+
+
+def fingerprint(path: Union[str, Path]) -> str:
+    # Changes whenever the file is rewritten (new size or mtime), or a different file is used
+    path = Path(path).resolve()
+    st = path.stat()
+    key = f"{path}|{st.st_size}|{st.st_mtime_ns}|v{CACHE_VERSION}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def dataset_key(df: pd.DataFrame) -> Optional[str]:
+    # Fingerprint of the data behind df, or None if unknown. attrs survive pandas copies and
+    # slices, so the row count recorded with the fingerprint has to match too
+    fp = df.attrs.get("fingerprint")
+    if fp is None or df.attrs.get("rows") != len(df):
+        return None
+    return fp
+
+
+def tag_dataset(df: pd.DataFrame, fingerprint: str) -> pd.DataFrame:
+    df.attrs["fingerprint"] = fingerprint
+    df.attrs["rows"] = len(df)
+    return df
+
+
+def _entry_dir(path: Path, cache_dir: Path) -> Path:
+    return cache_dir / f"{path.stem}-{fingerprint(path)}"
+
+
+def _to_columns(df: pd.DataFrame) -> Optional[dict]:
+    # Typed numpy column per CSV column, or None if the frame has columns we can't store
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        if name in TIME_COLUMNS:
+            parsed = pd.to_datetime(col, errors="coerce")
+            if getattr(parsed.dt, "tz", None) is not None or (parsed.isna().all() and len(col)):
+                return None
+            columns[name] = parsed.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        elif pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+            columns[name] = col.to_numpy()
+        else:
+            return None
+    return columns
+
+
+def write_cache(df: pd.DataFrame, path: Union[str, Path], cache_dir: Path = CACHE_DIR) -> bool:
+    path = Path(path)
+    columns = _to_columns(df)
+    if columns is None:
+        return False
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = _entry_dir(path, cache_dir)
+
+    # Write into a temp folder and rename, so a half-written entry is never picked up
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir))
+    try:
+        meta = {"source": str(path.resolve()), "columns": [], "version": CACHE_VERSION}
+        for i, (name, values) in enumerate(columns.items()):
+            np.save(tmp / f"{i}.npy", np.ascontiguousarray(values))
+            meta["columns"].append({"name": name, "file": f"{i}.npy", "time": name in TIME_COLUMNS})
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    # Old copies of the same file are stale now
+    for old in cache_dir.glob(f"{path.stem}-*"):
+        if old != target and (old / "meta.json").exists():
+            try:
+                if json.loads((old / "meta.json").read_text()).get("source") == meta["source"]:
+                    shutil.rmtree(old, ignore_errors=True)
+            except (OSError, ValueError):
+                pass
+    return True
+
+
+def read_cache(path: Union[str, Path], cache_dir: Path = CACHE_DIR) -> Optional[pd.DataFrame]:
+    entry = _entry_dir(Path(path), cache_dir)
+    meta_file = entry / "meta.json"
+    if not meta_file.exists():
+        return None
+    try:
+        meta = json.loads(meta_file.read_text())
+        data = {}
+        for col in meta["columns"]:
+            # copy-on-write: pages are shared with the file until written to, and writes never reach it
+            values = np.load(entry / col["file"], mmap_mode="c")
+            data[col["name"]] = values.view("datetime64[ns]") if col["time"] else values
+        return pd.DataFrame(data, copy=False)
+    except (OSError, ValueError, KeyError):
+        # Corrupt or partial entry: drop it and fall back to the CSV
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+
+def read_csv_cached(path: Union[str, Path], cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    # Drop-in for pd.read_csv(path) on OHLCV files: time columns come back as datetime64.
+    # df.attrs carries the file's fingerprint so derived data (indicators etc) can be cached against it
+    df = read_cache(path, cache_dir)
+    if df is not None:
+        return tag_dataset(df, fingerprint(path))
+    df = pd.read_csv(path)
+    try:
+        if write_cache(df, path, cache_dir):
+            cached = read_cache(path, cache_dir)
+            if cached is not None:
+                return tag_dataset(cached, fingerprint(path))
+    except OSError:
+        pass  # read-only location etc, the cache is only an optimisation
+    return tag_dataset(df, fingerprint(path))
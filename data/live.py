@@ -0,0 +1,165 @@
+# data/live.py
+# Streaming klines for live mode.
+# A feed is an async iterator of bars ({"Date": epoch ms, "Open".., "Volume", "closed": bool});
+# LiveFeed runs one on a background asyncio loop, the bars end up in a fixed-size RingBuffer.
+# Bars with the same open time as the newest one replace it (the exchange re-sends the open
+# candle until it closes), anything newer is appended, dropping the oldest once full.
+import asyncio
+import json
+import re
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+from data.resample import infer_interval, interval_label
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443/ws"
+RING_COLUMNS = ("x", "o", "h", "l", "c", "v", "ema")  # x in epoch seconds, like the chart
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, columns=RING_COLUMNS):
+        self.capacity = capacity
+        self.columns = columns
+        self._data = {k: np.full(capacity, np.nan) for k in columns}
+        self._start = 0      # slot of the oldest bar
+        self._size = 0
+        self.version = 0     # bumped on every change, the UI redraws when it moves
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _slot(self, i: int) -> int:
+        return (self._start + i) % self.capacity
+
+    def push(self, bar: Dict[str, float]) -> bool:
+        # bar has a value per column, keyed like RING_COLUMNS. Returns True if it was appended,
+        # False if it replaced the newest bar (or was older than it and ignored)
+        with self._lock:
+            x = bar["x"]
+            last = self._data["x"][self._slot(self._size - 1)] if self._size else None
+            if last is not None and x < last:
+                return False
+            appended = True
+            if last is not None and x == last:
+                slot = self._slot(self._size - 1)
+                appended = False
+            elif self._size < self.capacity:
+                slot = self._slot(self._size)
+                self._size += 1
+            else:
+                slot = self._start
+                self._start = (self._start + 1) % self.capacity
+            for k in self.columns:
+                self._data[k][slot] = bar.get(k, np.nan)
+            self.version += 1
+            return appended
+
+    def extend(self, arrays: Dict[str, np.ndarray]):
+        # Bulk load of closed history (the newest capacity bars of it)
+        n = min(len(arrays["x"]), self.capacity)
+        with self._lock:
+            for k in self.columns:
+                self._data[k][:n] = np.asarray(arrays[k][-n:], dtype=np.float64) if n and k in arrays else np.nan
+            self._start, self._size = 0, n
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        # Copies in time order; at most two slices per column
+        with self._lock:
+            end = self._start + self._size
+            if end <= self.capacity:
+                return {k: v[self._start:end].copy() for k, v in self._data.items()}
+            wrap = end - self.capacity
+            return {k: np.concatenate((v[self._start:], v[:wrap])) for k, v in self._data.items()}
+
+
+async def replay_feed(df: pd.DataFrame, bars_per_second: float = 10.0) -> AsyncIterator[dict]:
+    # Stand-in for the exchange: plays back closed bars from a frame at a fixed rate
+    ms = df["Date"].to_numpy(dtype="datetime64[ns]").view("int64") // 10**6
+    cols = [df[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close", "Volume")]
+    delay = 1.0 / bars_per_second if bars_per_second > 0 else 0.0
+    for i in range(len(ms)):
+        yield {"Date": int(ms[i]), "Open": cols[0][i], "High": cols[1][i], "Low": cols[2][i],
+               "Close": cols[3][i], "Volume": cols[4][i], "closed": True}
+        await asyncio.sleep(delay)
+
+
+async def binance_kline_feed(symbol: str, interval: str, url: str = BINANCE_WS_URL) -> AsyncIterator[dict]:
+    # Binance kline stream: an update for the open candle every second or two, "x" marks it closed
+    try:
+        import websockets
+    except ImportError as e:
+        raise RuntimeError("Live data needs the websockets package (pip install websockets)") from e
+    async with websockets.connect(f"{url}/{symbol.lower()}@kline_{interval}") as ws:
+        async for message in ws:
+            k = json.loads(message).get("k")
+            if k is None:
+                continue
+            yield {"Date": int(k["t"]), "Open": float(k["o"]), "High": float(k["h"]), "Low": float(k["l"]),
+                   "Close": float(k["c"]), "Volume": float(k["v"]), "closed": bool(k["x"])}
+
+
+def seed_mismatch(df: Optional[pd.DataFrame], symbol: str, interval: str, dataset_symbol: Optional[str] = None,
+                  file_name: str = "") -> Optional[str]:
+    # Why the loaded bars can't seed a live feed of symbol at interval (Binance form, "5m"), or None
+    # if they can. The symbol is the store's when the data came from there; a CSV has to name it
+    # in its file name, base asset is enough ("eth_5m.csv" for ETHUSDT)
+    if df is None or not len(df):
+        return "is empty"
+    bar = interval_label(infer_interval(df))
+    if bar.lower() != interval:  # UI labels are "1H", Binance's "1h"; "1M" (month) never matches
+        return f"has {bar} bars, not {interval}"
+    if dataset_symbol is not None:
+        same = dataset_symbol.upper() == symbol.upper()
+    else:
+        tokens = [t for t in re.split(r"[^A-Z0-9]+", Path(file_name).stem.upper()) if len(t) >= 3]
+        same = any(symbol.upper().startswith(t) for t in tokens)
+    return None if same else f"is not {symbol.upper()}"
+
+
+class LiveFeed:
+    # Runs feed() on its own asyncio loop in a daemon thread and calls on_bar(bar) there for every
+    # bar (the caller pushes it into its RingBuffer, updates indicators etc); errors end up in .error
+    def __init__(self, feed: Callable[[], AsyncIterator[dict]], on_bar: Callable[[dict], None]):
+        self._feed = feed
+        self._on_bar = on_bar
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self.bars = 0
+        self.error: Optional[str] = None
+        self.finished = False
+
+    async def _consume(self):
+        async for bar in self._feed():
+            self.bars += 1
+            self._on_bar(bar)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._consume())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = f"{e}"
+        finally:
+            self.finished = True
+            self._loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="live-feed")
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is not None and self._task is not None and not self.finished:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # loop already closed, the feed ended on its own
+        if self._thread is not None:
+            self._thread.join(timeout=2)
@@ -0,0 +1,94 @@
+# data/panel.py
+# Several symbols on one time axis: a dense (time x asset x field) array of OHLCV bars.
+# The time axis is the union of every symbol's bar times; a symbol with no bar at a time (not
+# listed yet, exchange gap) has NaN there. Prices are float32 by default, so 50 symbols of 5m
+# bars for a year (~105k bars) take about 105 MB; ask for float64 to trade memory for precision.
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from data import store
+from data.cache import read_csv_cached
+from data.store import STORE_DIR, TimeLike
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(FIELDS))
+
+
+@dataclass
+class Panel:
+    times: np.ndarray      # int64 epoch ns, sorted, one entry per row of data
+    symbols: List[str]
+    data: np.ndarray       # (len(times), len(symbols), len(FIELDS)), NaN where a symbol has no bar
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.data.nbytes
+
+    def field(self, name: str) -> np.ndarray:
+        # (time x asset) view of one field
+        return self.data[:, :, FIELDS.index(name)]
+
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.times.view("datetime64[ns]"))
+
+    def asset(self, i: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        # (rows, columns) of one symbol: the panel rows it has a bar on, and its float64
+        # "open"/"high"/"low"/"close"/"volume" arrays over just those rows (what the strategy cores take)
+        rows = np.flatnonzero(~np.isnan(self.data[:, i, CLOSE]))
+        bars = self.data[rows, i, :].astype(np.float64)
+        return rows, {name.lower(): np.ascontiguousarray(bars[:, k]) for k, name in enumerate(FIELDS)}
+
+    def frame(self, i: int) -> pd.DataFrame:
+        # One symbol back as an ordinary OHLCV frame (only the rows it has a bar on)
+        rows, cols = self.asset(i)
+        return pd.DataFrame({"Date": self.times[rows].view("datetime64[ns]"),
+                             **{name: cols[name.lower()] for name in FIELDS}})
+
+
+def _frame_times(df: pd.DataFrame) -> np.ndarray:
+    return pd.to_datetime(df["Date"], errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def build_panel(frames: Dict[str, pd.DataFrame], dtype=np.float32) -> Panel:
+    # Align OHLCV frames (symbol -> frame with Date + FIELDS) on the union of their bar times.
+    # Rows whose date didn't parse are dropped; if a time repeats within a symbol the later bar wins.
+    if not frames:
+        raise ValueError("No symbols to build a panel from")
+    nat = np.iinfo(np.int64).min
+    stamps = {sym: _frame_times(df) for sym, df in frames.items()}
+    times = np.unique(np.concatenate([t[t != nat] for t in stamps.values()]))
+
+    data = np.full((len(times), len(frames), len(FIELDS)), np.nan, dtype=dtype)
+    for i, (sym, df) in enumerate(frames.items()):
+        t = stamps[sym]
+        ok = t != nat
+        missing = [name for name in FIELDS if name not in df.columns]
+        if missing:
+            raise ValueError(f"{sym}: missing column(s) {', '.join(missing)}")
+        pos = np.searchsorted(times, t[ok])
+        for k, name in enumerate(FIELDS):
+            data[pos, i, k] = df[name].to_numpy(dtype=np.float64)[ok]
+    return Panel(times=times, symbols=list(frames), data=data)
+
+
+def load_panel(symbols: Iterable[str], interval: str, start: TimeLike = None, end: TimeLike = None,
+               root: Path = STORE_DIR, dtype=np.float32) -> Panel:
+    # Panel of store series (data/store.py), all at the same interval and date range
+    frames = {}
+    for sym in symbols:
+        df = store.load(sym, interval, start, end, root=root)
+        if df.empty:
+            raise ValueError(f"No {sym.upper()} {interval} bars in the store for that range")
+        frames[sym.upper()] = df
+    return build_panel(frames, dtype)
+
+
+def read_panel_csvs(paths: Iterable[Union[str, Path]], dtype=np.float32) -> Panel:
+    # Panel of CSV files, each named after its symbol (btc_5m.csv -> BTC_5M)
+    frames = {Path(p).stem.upper(): read_csv_cached(p) for p in paths}
+    return build_panel(frames, dtype)
@@ -0,0 +1,112 @@
+# data/resample.py
+# Builds coarser candles from the finest loaded series, so switching timeframe needs no download.
+# Buckets are aligned to the epoch (UTC), the same boundaries Binance uses for its klines.
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from data.cache import dataset_key, tag_dataset
+
+# Interval labels as used in the UI -> length in seconds
+INTERVAL_SECONDS = {"1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+                    "1H": 3600, "2H": 7200, "4H": 14400, "6H": 21600, "12H": 43200, "1D": 86400}
+
+OHLCV = ("Open", "High", "Low", "Close", "Volume")
+
+
+def time_column(df: pd.DataFrame) -> str:
+    # Same rule as the strategies: "Date", or "Time" for files that use that name
+    return "Date" if "Date" in df.columns else "Time"
+
+
+def _date_ns(df: pd.DataFrame) -> np.ndarray:
+    # Bar times as int64 epoch ns, NaT for rows whose date didn't parse
+    return pd.to_datetime(df[time_column(df)], errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def infer_interval(df: pd.DataFrame) -> Optional[int]:
+    # Bar length in seconds, from the most common gap between consecutive bars
+    if df is None or len(df) < 2:
+        return None
+    ns = _date_ns(df)
+    gaps = np.diff(ns[ns != np.iinfo(np.int64).min])
+    gaps = gaps[gaps > 0]
+    if not len(gaps):
+        return None
+    values, counts = np.unique(gaps, return_counts=True)
+    return int(values[np.argmax(counts)] // 10**9)
+
+
+def interval_label(seconds: Optional[int]) -> str:
+    for label, length in INTERVAL_SECONDS.items():
+        if length == seconds:
+            return label
+    return f"{seconds}s" if seconds else "?"
+
+
+def derivable_intervals(base_seconds: Optional[int]) -> List[str]:
+    # Intervals that are a whole multiple of the base bar (the base interval itself included)
+    if not base_seconds:
+        return []
+    return [label for label, length in INTERVAL_SECONDS.items()
+            if length >= base_seconds and length % base_seconds == 0]
+
+
+def resample_ohlcv(df: pd.DataFrame, seconds: int) -> pd.DataFrame:
+    # First open, highest high, lowest low, last close and summed volume per bucket;
+    # NaNs inside a bucket are skipped, buckets with no bars are not created
+    time_col = time_column(df)
+    ns = _date_ns(df)
+    valid = ns != np.iinfo(np.int64).min
+    if not valid.all():
+        df, ns = df[valid], ns[valid]
+    if len(ns) > 1 and not np.all(ns[1:] >= ns[:-1]):
+        order = np.argsort(ns, kind="stable")
+        df, ns = df.iloc[order], ns[order]
+    if not len(ns):
+        return pd.DataFrame({c: [] for c in (time_col,) + OHLCV})
+
+    step = seconds * 10**9
+    bucket = np.floor_divide(ns, step)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ns)] - 1
+
+    out = {time_col: (bucket[starts] * step).view("datetime64[ns]")}
+    if "Open" in df:
+        out["Open"] = df["Open"].to_numpy(dtype=float)[starts]
+    if "High" in df:
+        out["High"] = np.fmax.reduceat(df["High"].to_numpy(dtype=float), starts)
+    if "Low" in df:
+        out["Low"] = np.fmin.reduceat(df["Low"].to_numpy(dtype=float), starts)
+    if "Close" in df:
+        out["Close"] = df["Close"].to_numpy(dtype=float)[ends]
+    if "Volume" in df:
+        out["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=float)), starts)
+    return pd.DataFrame(out)
+
+
+class IntervalCache:
+    # Derived frames for one base series, built on first use and kept until the base changes
+    def __init__(self, base: Optional[pd.DataFrame] = None):
+        self.base = base
+        self.base_seconds = infer_interval(base)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        if base is not None and self.base_seconds:
+            self._frames[interval_label(self.base_seconds)] = base
+
+    def intervals(self) -> List[str]:
+        return derivable_intervals(self.base_seconds)
+
+    def get(self, label: str) -> pd.DataFrame:
+        if self.base is None:
+            raise ValueError("No data loaded")
+        frame = self._frames.get(label)
+        if frame is None:
+            seconds = INTERVAL_SECONDS.get(label)
+            if seconds is None or label not in self.intervals():
+                raise ValueError(f"Cannot build {label} candles from {interval_label(self.base_seconds)} data")
+            frame = resample_ohlcv(self.base, seconds)
+            fp = dataset_key(self.base)
+            if fp is not None:
+                tag_dataset(frame, f"{fp}@{label}")
+            self._frames[label] = frame
+        return frame
@@ -0,0 +1,183 @@
+# data/runs.py
+# Run history: every finished backtest, kept on disk so past runs can be listed and overlaid
+# without running them again. RUNS_DIR/runs.db (SQLite) has one row per run with what it ran on,
+# its parameters and headline metrics, indexed by strategy, dataset and date range. The results
+# frame itself is stored column by column in RUNS_DIR/<id>/<n>.npy, n the column's position (text
+# columns as int32 codes, names and labels in the row), and memory-mapped when a run is loaded.
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from data.store import TimeLike, end_bound
+
+RUNS_DIR = Path("runs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    interval TEXT NOT NULL DEFAULT '',
+    start_ns INTEGER,
+    end_ns INTEGER,
+    trades INTEGER NOT NULL,
+    total_return REAL,
+    sharpe REAL,
+    max_drawdown REAL,
+    params TEXT NOT NULL DEFAULT '{}',
+    metrics TEXT NOT NULL DEFAULT '{}',
+    columns TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS runs_strategy ON runs (strategy, id);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset, id);
+CREATE INDEX IF NOT EXISTS runs_range ON runs (start_ns, end_ns);
+"""
+
+# What list() returns, as column name -> SQL
+LIST_COLUMNS = {"ID": "id", "Created": "created", "Strategy": "strategy", "Dataset": "dataset",
+                "Interval": "interval", "Start": "start_ns", "End": "end_ns", "Trades": "trades",
+                "Total Return %": "total_return", "Sharpe": "sharpe", "Max Drawdown %": "max_drawdown"}
+
+
+def _time_ns(t: TimeLike) -> Optional[int]:
+    return None if t is None else int(pd.Timestamp(t).value)
+
+
+def _encode(results: pd.DataFrame) -> Dict[str, tuple]:
+    # column -> (kind, array to store, labels): dates as int64 ns, text as codes into labels
+    out = {}
+    for name in results.columns:
+        col = results[name]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            out[name] = ("datetime", col.to_numpy(dtype="datetime64[ns]").view("int64"), None)
+        elif pd.api.types.is_numeric_dtype(col):
+            out[name] = ("number", col.to_numpy(), None)
+        else:
+            codes, labels = pd.factorize(col.astype(str))
+            out[name] = ("text", codes.astype(np.int32), [str(v) for v in labels])
+    return out
+
+
+class RunStore:
+    # Nothing is created on disk until the first run is saved
+    def __init__(self, root: Path = RUNS_DIR):
+        self.root = Path(root)
+
+    @property
+    def db_path(self) -> Path:
+        return self.root / "runs.db"
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per call: runs are saved from the main thread, listed from anywhere
+        self.root.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_path, timeout=10)
+        con.executescript(SCHEMA)
+        return con
+
+    def save(self, results: pd.DataFrame, strategy: str, dataset: str, interval: str = "",
+             params: Optional[dict] = None) -> int:
+        # Store a results frame (usual backtest columns, metrics in attrs) and return its run id.
+        # The columns are in place before the row is committed, a failed write leaves no run behind.
+        metrics = results.attrs.get("metrics") or {}
+        dates = pd.to_datetime(results["Date"], errors="coerce").dropna()
+        columns = _encode(results)
+        with closing(self._connect()) as con:
+            cur = con.execute(
+                "INSERT INTO runs (created, strategy, dataset, interval, start_ns, end_ns, trades, total_return,"
+                " sharpe, max_drawdown, params, metrics, columns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.strftime("%Y-%m-%d %H:%M:%S"), strategy, dataset, interval or "",
+                 int(dates.min().value) if len(dates) else None, int(dates.max().value) if len(dates) else None,
+                 len(results), metrics.get("Total Return %"), metrics.get("Sharpe"), metrics.get("Max Drawdown %"),
+                 json.dumps(params or {}, default=str), json.dumps(metrics, default=float),
+                 json.dumps({name: [kind, labels] for name, (kind, _, labels) in columns.items()})))
+            run_id = int(cur.lastrowid)
+            tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+            try:
+                for i, (name, (_, values, _)) in enumerate(columns.items()):
+                    np.save(tmp / f"{i}.npy", np.ascontiguousarray(values))
+                folder = self.root / str(run_id)
+                if folder.exists():  # left over from a database that was deleted
+                    shutil.rmtree(folder)
+                os.replace(tmp, folder)
+                con.commit()
+            finally:
+                if tmp.exists():
+                    shutil.rmtree(tmp, ignore_errors=True)
+        return run_id
+
+    def list(self, strategy: Optional[str] = None, dataset: Optional[str] = None, start: TimeLike = None,
+             end: TimeLike = None, limit: int = 500) -> pd.DataFrame:
+        # Newest first. start/end keep the runs whose trades overlap that range
+        where, args = [], []
+        if strategy:
+            where.append("strategy = ?")
+            args.append(strategy)
+        if dataset:
+            where.append("dataset = ?")
+            args.append(dataset)
+        if start is not None:
+            where.append("end_ns >= ?")
+            args.append(_time_ns(start))
+        if end is not None:
+            where.append("start_ns <= ?")
+            args.append(end_bound(end, 0))  # a date-only end is the whole day
+        sql = "SELECT " + ", ".join(LIST_COLUMNS.values()) + " FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        if not self.db_path.exists():
+            rows = []
+        else:
+            with closing(self._connect()) as con:
+                rows = con.execute(sql, args + [int(limit)]).fetchall()
+        table = pd.DataFrame(rows, columns=list(LIST_COLUMNS))
+        for col in ("Start", "End"):
+            table[col] = pd.to_datetime(table[col], unit="ns")
+        return table
+
+    def _distinct(self, column: str) -> List[str]:
+        if not self.db_path.exists():
+            return []
+        with closing(self._connect()) as con:
+            return [r[0] for r in con.execute(f"SELECT DISTINCT {column} FROM runs ORDER BY {column}")]
+
+    def strategies(self) -> List[str]:
+        return self._distinct("strategy")
+
+    def datasets(self) -> List[str]:
+        return self._distinct("dataset")
+
+    def load(self, run_id: int) -> pd.DataFrame:
+        # The stored results frame, with attrs["metrics"], attrs["params"] and attrs["run_id"]
+        with closing(self._connect()) as con:
+            row = con.execute("SELECT params, metrics, columns FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        if row is None:
+            raise KeyError(f"No run {run_id}")
+        params, metrics, columns = (json.loads(v) for v in row)
+        folder = self.root / str(int(run_id))
+        data = {}
+        for i, (name, (kind, labels)) in enumerate(columns.items()):
+            values = np.load(folder / f"{i}.npy", mmap_mode="r")
+            if kind == "datetime":
+                data[name] = values.view("datetime64[ns]")
+            elif kind == "text":
+                data[name] = np.asarray(labels, dtype=object)[values]
+            else:
+                data[name] = values
+        results = pd.DataFrame(data, copy=False)
+        results.attrs.update({"metrics": metrics, "params": params, "run_id": int(run_id)})
+        return results
+
+    def delete(self, run_id: int):
+        with closing(self._connect()) as con:
+            con.execute("DELETE FROM runs WHERE id = ?", (int(run_id),))
+            con.commit()
+        shutil.rmtree(self.root / str(int(run_id)), ignore_errors=True)
@@ -0,0 +1,198 @@
+# data/store.py
+# Local market-data store: STORE_DIR/<symbol>/<interval>/<YYYY-MM-DD>/<column>.bin
+# Every day partition holds one raw little-endian file per column (Date as int64 epoch ns, the rest
+# float64) and a "rows" file with the committed row count. New bars are appended to the column
+# files and the count is written last, so a crash mid-append never exposes half a row.
+# load() memory-maps only the days that overlap the requested range.
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+import numpy as np
+import pandas as pd
+from data.cache import read_csv_cached, tag_dataset
+
+STORE_DIR = Path("market_data")
+COLUMNS = {"Date": "<i8", "Open": "<f8", "High": "<f8", "Low": "<f8", "Close": "<f8", "Volume": "<f8"}
+DAY_NS = 86_400 * 10**9
+DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+TimeLike = Union[str, pd.Timestamp, None]
+
+
+def _series_dir(symbol: str, interval: str, root: Path) -> Path:
+    return root / symbol.upper() / interval
+
+
+def _day_name(day: int) -> str:
+    return str(np.datetime64(day, "D"))
+
+
+def _committed_rows(day_dir: Path) -> int:
+    try:
+        return int((day_dir / "rows").read_text())
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_rows(day_dir: Path, rows: int):
+    tmp = day_dir / ".rows.tmp"
+    tmp.write_text(str(rows))
+    os.replace(tmp, day_dir / "rows")
+
+
+def _read_day(day_dir: Path) -> dict:
+    rows = _committed_rows(day_dir)
+    out = {}
+    for name, dtype in COLUMNS.items():
+        path = day_dir / f"{name}.bin"
+        if rows == 0 or not path.exists():
+            out[name] = np.empty(0, dtype=dtype)
+        else:
+            out[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+    return out
+
+
+def _dedupe(cols: dict) -> dict:
+    # Sorted by time with one row per timestamp, the later one wins (a bar re-fetched after it closed)
+    order = np.argsort(cols["Date"], kind="stable")
+    cols = {k: v[order] for k, v in cols.items()}
+    last = np.r_[cols["Date"][1:] != cols["Date"][:-1], True]
+    return {k: v[last] for k, v in cols.items()}
+
+
+def _to_columns(df: pd.DataFrame) -> dict:
+    cols = {"Date": pd.to_datetime(df["Date"]).to_numpy(dtype="datetime64[ns]").view("int64")}
+    for name, dtype in COLUMNS.items():
+        if name != "Date":
+            cols[name] = df[name].to_numpy(dtype=dtype)
+    return _dedupe(cols)
+
+
+def _rewrite_day(day_dir: Path, cols: dict):
+    # Replace a whole partition (new bars in the middle of a day, or corrected ones)
+    day_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=day_dir.parent))
+    try:
+        for name, dtype in COLUMNS.items():
+            np.ascontiguousarray(cols[name], dtype=dtype).tofile(tmp / f"{name}.bin")
+        (tmp / "rows").write_text(str(len(cols["Date"])))
+        if day_dir.exists():
+            shutil.rmtree(day_dir)
+        os.replace(tmp, day_dir)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def append(symbol: str, interval: str, df: pd.DataFrame, root: Path = STORE_DIR) -> int:
+    # Add bars to the store; returns how many rows were new. Bars after a day's last stored bar are
+    # appended in place, anything that lands inside already-stored data rewrites that one day
+    cols = _to_columns(df)
+    if not len(cols["Date"]):
+        return 0
+    series = _series_dir(symbol, interval, root)
+    days = cols["Date"] // DAY_NS
+    bounds = np.flatnonzero(np.r_[True, days[1:] != days[:-1], True])
+    added = 0
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        day_dir = series / _day_name(int(days[a]))
+        new = {k: v[a:b] for k, v in cols.items()}
+        stored = _read_day(day_dir)
+        rows = len(stored["Date"])
+        if rows and new["Date"][0] <= stored["Date"][-1]:
+            merged = _dedupe({k: np.r_[stored[k], new[k]] for k in COLUMNS})
+            added += len(merged["Date"]) - rows
+            _rewrite_day(day_dir, merged)
+            continue
+        day_dir.mkdir(parents=True, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            path = day_dir / f"{name}.bin"
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                f.seek(rows * np.dtype(dtype).itemsize)  # drop anything past the committed rows
+                f.truncate()
+                f.write(np.ascontiguousarray(new[name], dtype=dtype).tobytes())
+        _write_rows(day_dir, rows + (b - a))
+        added += b - a
+    return added
+
+
+def _day_bound(t: TimeLike, default: int) -> int:
+    return default if t is None else int(pd.Timestamp(t).value)
+
+
+def _is_date_only(t: TimeLike) -> bool:
+    if isinstance(t, str):
+        return DATE_ONLY.fullmatch(t.strip()) is not None
+    return isinstance(t, date) and not isinstance(t, datetime)
+
+
+def end_bound(t: TimeLike, default: int) -> int:
+    # Inclusive upper bound in epoch ns. A date with no time of day ("2025-07-17") is the whole
+    # day, not its midnight, so an End typed as a date keeps every bar of that day
+    if t is None:
+        return default
+    value = int(pd.Timestamp(t).value)
+    return value + DAY_NS - 1 if _is_date_only(t) else value
+
+
+def load(symbol: str, interval: str, start: TimeLike = None, end: TimeLike = None,
+         root: Path = STORE_DIR) -> pd.DataFrame:
+    # Bars with start <= Date <= end (either side open if None), a date-only end taking in that whole
+    # day. Only the day partitions in range are opened; a single-day result is a view on the
+    # memory-mapped files
+    series = _series_dir(symbol, interval, root)
+    lo = _day_bound(start, np.iinfo(np.int64).min)
+    hi = end_bound(end, np.iinfo(np.int64).max)
+    parts = []
+    version = []
+    for day_dir in sorted(series.glob("????-??-??")) if series.exists() else []:
+        day = int(np.datetime64(day_dir.name, "D").astype("int64"))
+        if (day + 1) * DAY_NS <= lo or day * DAY_NS > hi:
+            continue
+        cols = _read_day(day_dir)
+        if len(cols["Date"]):
+            parts.append(cols)
+            version.append(f"{day_dir.name}:{len(cols['Date'])}:{(day_dir / 'rows').stat().st_mtime_ns}")
+
+    if not parts:
+        data = {k: np.empty(0, dtype=v) for k, v in COLUMNS.items()}
+    elif len(parts) == 1:
+        data = parts[0]
+    else:
+        data = {k: np.concatenate([p[k] for p in parts]) for k in COLUMNS}
+    i = int(np.searchsorted(data["Date"], lo, side="left"))
+    j = int(np.searchsorted(data["Date"], hi, side="right"))
+    data = {k: v[i:j] for k, v in data.items()}
+    data["Date"] = data["Date"].view("datetime64[ns]")
+    df = pd.DataFrame(data, copy=False)
+    # Fingerprint for the indicator cache: which series, which range, and the state of the days read
+    key = hashlib.sha1("|".join([symbol.upper(), interval, str(lo), str(hi)] + version).encode()).hexdigest()[:20]
+    return tag_dataset(df, f"store-{key}")
+
+
+def symbols(root: Path = STORE_DIR) -> List[str]:
+    return sorted(p.name for p in root.iterdir() if p.is_dir()) if root.exists() else []
+
+
+def intervals(symbol: str, root: Path = STORE_DIR) -> List[str]:
+    path = root / symbol.upper()
+    return sorted(p.name for p in path.iterdir() if p.is_dir()) if path.exists() else []
+
+
+def date_range(symbol: str, interval: str, root: Path = STORE_DIR) -> Optional[tuple]:
+    # (first, last) bar time stored, or None if the series is empty
+    days = sorted(_series_dir(symbol, interval, root).glob("????-??-??"))
+    days = [d for d in days if _committed_rows(d)]
+    if not days:
+        return None
+    first, last = _read_day(days[0])["Date"], _read_day(days[-1])["Date"]
+    return pd.Timestamp(int(first[0])), pd.Timestamp(int(last[-1]))
+
+
+def import_csv(path: Union[str, Path], symbol: str, interval: str, root: Path = STORE_DIR) -> int:
+    return append(symbol, interval, read_csv_cached(path), root)
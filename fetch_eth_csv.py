@@ -1,90 +1,229 @@
 #!/usr/bin/env python3
 """
-Download OHLCV data for Ethereum (ETHUSDT) from Binance
+Download OHLCV data for Ethereum (ETHUSDT, or any other pair with --symbol) from Binance
 and save it as a CSV that chart_viewer.py can read.
+
+With --incremental an existing CSV is extended instead of rewritten: only the bars after its
+last timestamp, before its first one (if --days reaches further back) and inside any gaps are
+requested. Chunks are fetched concurrently over one pooled session, under a token-bucket rate
+limit, with retries; every finished chunk is checkpointed next to the output file so an
+interrupted download picks up where it stopped.
+
+--store also appends the bars to the partitioned market-data store (data/store.py), which
+--incremental then reads from when the CSV doesn't exist yet.
+
+--base-url points the script at another server with the same klines endpoint
+(e.g. tools/klines_server.py for testing without the network).
 """
 
+import json
+import os
 import pathlib
+import random
+import shutil
+import threading
 import time
 from argparse import ArgumentParser
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
 import requests
 import pandas as pd
-from pandas_datareader import data as pdr
 
 
-BINANCE_SPOT_KLINES = "https://api.binance.com/api/v3/klines"
-SYMBOL = "ETHUSDT"
-LIMIT  = 10000   # Binance max per request
+BINANCE_BASE_URL = "https://api.binance.com"
+KLINES_PATH = "/api/v3/klines"
+SYMBOL = "ETHUSDT"  # default for --symbol
+LIMIT  = 1000    # Binance max per request
+KLINE_COLUMNS = [
+    "OpenTime","Open","High","Low","Close","Volume",
+    "CloseTime","QuoteAssetVolume","NumberOfTrades",
+    "TakerBuyBase","TakerBuyQuote","Ignore"
+]
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+INTERVAL_UNITS_MS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def interval_ms(interval: str) -> int:
+    # "15m" -> 900000. Units are case-sensitive as on Binance: "1M" is a month, which has no fixed length
+    count, unit = interval[:-1], interval[-1:]
+    if unit == "M":
+        raise ValueError(f"Monthly interval {interval!r} has no fixed bar length; use days or weeks instead")
+    if unit not in INTERVAL_UNITS_MS or not count.isdigit() or int(count) == 0:
+        raise ValueError(f"Unknown interval {interval!r}; expected e.g. 1m, 15m, 1h, 1d or 1w")
+    return int(count) * INTERVAL_UNITS_MS[unit]
+
+
+class TokenBucket:
+    # rate requests per second on average, up to burst back to back
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
-def fetch_chunk(start_ms: int, interval: str) -> List[list]:  ## ← edited
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_chunk(session: requests.Session, base_url: str, start_ms: int, end_ms: int, interval: str,
+                bucket: TokenBucket, retries: int = 5, symbol: str = SYMBOL) -> List[list]:  ## ← edited
     params = {
-        "symbol":    SYMBOL,
+        "symbol":    symbol,
         "interval":  interval,       ## ← edited
         "startTime": start_ms,
+        "endTime":   end_ms,
         "limit":     LIMIT,
     }
-    r = requests.get(BINANCE_SPOT_KLINES, params=params, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            r = session.get(base_url.rstrip("/") + KLINES_PATH, params=params, timeout=10)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(0.5 * 2 ** attempt + random.random() * 0.25)
+            continue
+        if r.status_code in RETRY_STATUS and attempt < retries:
+            # 429/418 come with Retry-After, honour it; otherwise back off exponentially
+            retry_after = r.headers.get("Retry-After")
+            time.sleep(float(retry_after) if retry_after else 0.5 * 2 ** attempt + random.random() * 0.25)
+            continue
+        r.raise_for_status()
+        return r.json()
+    return []
 
-def main():
-    p = ArgumentParser()
-    p.add_argument(
-        "--days", "-d",
-        type=int,
-        default=20,
-        help="Number of past days to fetch."
-    )
-    p.add_argument(
-        "--interval", "-i",           ## ← edited
-        default="15m",                ## ← edited
-        help="Kline interval (e.g. 1m, 5m, 15m, 1h, 1d)."
-    )
-    p.add_argument(
-        "--out", "-o",
-        type=pathlib.Path,
-        default=pathlib.Path("eth_15m.csv"),
-        help="Output CSV filename"
-    )
-    args = p.parse_args()
 
-    # compute ms timestamps
-    end_ts_ms   = int(time.time() * 1000)
-    start_ts_ms = end_ts_ms - args.days * 24 * 60 * 60 * 1000
+def plan_chunks(ranges: List[Tuple[int, int]], step_ms: int) -> List[Tuple[int, int]]:
+    # Split [start, end) ranges into request windows of at most LIMIT bars. Windows sit on a fixed
+    # grid (multiples of LIMIT bars since the epoch), so a resumed run asks for the same chunks
+    chunks = []
+    span = step_ms * LIMIT
+    for start, end in ranges:
+        s = start
+        while s < end:
+            stop = min((s // span + 1) * span, end)
+            chunks.append((s, stop - 1))
+            s = stop
+    return chunks
 
-    # fetch in chunks
-    all_rows   = []
-    fetch_from = start_ts_ms
-    while fetch_from < end_ts_ms:
-        chunk = fetch_chunk(fetch_from, args.interval)  ## ← edited
-        if not chunk:
-            break
-        all_rows.extend(chunk)
-        fetch_from = chunk[-1][6] + 1
-        time.sleep(0.35)
-
-    # to DataFrame
-    df = pd.DataFrame(
-        all_rows,
-        columns=[
-            "OpenTime","Open","High","Low","Close","Volume",
-            "CloseTime","QuoteAssetVolume","NumberOfTrades",
-            "TakerBuyBase","TakerBuyQuote","Ignore"
-        ],
-    )
+
+def missing_ranges(existing: Optional[pd.DataFrame], start_ms: int, end_ms: int, step_ms: int) -> List[Tuple[int, int]]:
+    # What the CSV doesn't have in [start_ms, end_ms): before its first bar, inside gaps, and after its
+    # last bar (the last bar itself is refetched, it may have been written while still open)
+    if existing is None or existing.empty:
+        return [(start_ms, end_ms)]
+    times = existing["Date"].to_numpy(dtype="datetime64[ms]").view("int64")
+    ranges = []
+    if times[0] > start_ms:
+        ranges.append((start_ms, int(times[0])))
+    gaps = (times[1:] - times[:-1]) > step_ms
+    for prev, nxt in zip(times[:-1][gaps], times[1:][gaps]):
+        ranges.append((int(prev) + step_ms, int(nxt)))
+    ranges.append((int(times[-1]), end_ms))
+    return [(a, b) for a, b in ranges if a < b]
+
+
+def read_existing(path: pathlib.Path) -> Optional[pd.DataFrame]:
+    if not path.is_file():
+        return None
+    df = pd.read_csv(path)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    return df.dropna(subset=["Date"]).sort_values("Date").reset_index(drop=True)
+
+
+class Checkpoint:
+    # One JSON file per finished chunk in <out>.parts/<interval>/, removed once the CSV is written
+    def __init__(self, out: pathlib.Path, interval: str):
+        self.dir = out.with_name(out.name + ".parts") / interval
+
+    def load(self, start_ms: int, end_ms: int) -> Optional[List[list]]:
+        path = self.dir / f"{start_ms}.json"
+        try:
+            saved = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        # a chunk saved by an earlier run may stop short of this run's end (the tail chunk)
+        return saved["rows"] if saved["end"] >= end_ms or len(saved["rows"]) >= LIMIT else None
+
+    def save(self, start_ms: int, end_ms: int, rows: List[list]):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f".{start_ms}.tmp"
+        tmp.write_text(json.dumps({"end": end_ms, "rows": rows}))
+        os.replace(tmp, self.dir / f"{start_ms}.json")
+
+    def clear(self):
+        shutil.rmtree(self.dir.parent, ignore_errors=True)
+
+
+def fetch_ranges(ranges: List[Tuple[int, int]], interval: str, base_url: str, workers: int,
+                 rate: float, retries: int, checkpoint: Checkpoint, symbol: str = SYMBOL) -> List[list]:
+    chunks = plan_chunks(ranges, interval_ms(interval))
+    all_rows = []
+    todo = []
+    for start, end in chunks:
+        rows = checkpoint.load(start, end)
+        if rows is None:
+            todo.append((start, end))
+        else:
+            all_rows.extend(rows)
+    if len(todo) < len(chunks):
+        print(f"Resuming: {len(chunks) - len(todo)}/{len(chunks)} chunks already downloaded")
+    if not todo:
+        return all_rows
+
+    bucket = TokenBucket(rate, burst=workers)
+    session = make_session(workers)
+
+    def fetch_and_save(start: int, end: int) -> List[list]:
+        rows = fetch_chunk(session, base_url, start, end, interval, bucket, retries, symbol)
+        checkpoint.save(start, end, rows)
+        return rows
+
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fetch_and_save, start, end) for start, end in todo]
+            for future in as_completed(futures):
+                rows = future.result()  # raises once a chunk has used up its retries; finished chunks stay checkpointed
+                all_rows.extend(rows)
+                done += 1
+                print(f"Chunk {done}/{len(todo)}: {len(rows)} bars")
+    finally:
+        session.close()
+    return all_rows
+
+
+def to_frame(rows: List[list]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=KLINE_COLUMNS)
     df["Date"] = pd.to_datetime(df["OpenTime"], unit="ms")
     # Select columns and convert only numerical values to float
     df = df[["Date","Open","High","Low","Close","Volume"]]
     num_cols = ["Open","High","Low","Close","Volume"]
     df[num_cols] = df[num_cols].astype(float)
+    return df
 
-     # save ETH data
-    df.to_csv(args.out, index=False)
-    print(f"Saved {len(df)} rows → {args.out}")
 
-    # Fetch S&P 500
-   # Fetch S&P 500
+def fetch_sp500(df: pd.DataFrame):
+    from pandas_datareader import data as pdr
+
     start_date = df["Date"].iloc[0].strftime("%Y-%m-%d")
     end_date = df["Date"].iloc[-1].strftime("%Y-%m-%d")
 
@@ -100,13 +239,13 @@ def main():
 
         # Reset index to make Date a column
         sp500 = sp500.reset_index()
-        
+
         # Select only the columns we need
         sp500 = sp500[['Date', 'Close']]
-        
+
         # Ensure numeric type for Close
         sp500['Close'] = sp500['Close'].astype(float)
-        
+
         # Calculate returns
         # Calculate cumulative percentage return (equity curve)
         first_close = sp500['Close'].iloc[0]
@@ -120,7 +259,83 @@ def main():
         print("❌ Failed to fetch S&P 500 data.")
 
 
+def main():
+    p = ArgumentParser()
+    p.add_argument(
+        "--days", "-d",
+        type=int,
+        default=20,
+        help="Number of past days to fetch."
+    )
+    p.add_argument(
+        "--interval", "-i",           ## ← edited
+        default="15m",                ## ← edited
+        help="Kline interval (e.g. 1m, 5m, 15m, 1h, 1d)."
+    )
+    p.add_argument(
+        "--out", "-o",
+        type=pathlib.Path,
+        default=pathlib.Path("eth_15m.csv"),
+        help="Output CSV filename"
+    )
+    p.add_argument("--symbol", "-s", default=SYMBOL, help="Trading pair, e.g. BTCUSDT (one file / store series per pair).")
+    p.add_argument("--incremental", action="store_true",
+                   help="Extend the existing output file, fetching only missing bars and gaps.")
+    p.add_argument("--base-url", default=BINANCE_BASE_URL, help="Server with a Binance-compatible klines endpoint.")
+    p.add_argument("--workers", type=int, default=4, help="Concurrent chunk requests.")
+    p.add_argument("--rate", type=float, default=5.0, help="Max requests per second.")
+    p.add_argument("--retries", type=int, default=5, help="Retries per chunk on errors and rate limiting.")
+    p.add_argument("--skip-sp500", action="store_true", help="Don't refresh sp500.csv.")
+    p.add_argument("--store", type=pathlib.Path, default=None, help="Also append the bars to this market-data store.")
+    args = p.parse_args()
+
+    # compute ms timestamps
+    end_ts_ms   = int(time.time() * 1000)
+    start_ts_ms = end_ts_ms - args.days * 24 * 60 * 60 * 1000
+    try:
+        step_ms = interval_ms(args.interval)
+    except ValueError as e:
+        p.error(str(e))
+    start_ts_ms -= start_ts_ms % step_ms  # bar boundary, so chunks and checkpoints line up between runs
+
+    existing = read_existing(args.out) if args.incremental else None
+    if args.incremental and existing is None and args.store is not None:
+        from data.store import load
+        existing = load(args.symbol, args.interval, root=args.store).copy()
+    ranges = missing_ranges(existing, start_ts_ms, end_ts_ms, step_ms)
+    print(f"Fetching {sum((b - a) // step_ms for a, b in ranges)} bars in {len(ranges)} range(s)")
+
+    # fetch in chunks
+    checkpoint = Checkpoint(args.out, args.interval)
+    all_rows = fetch_ranges(ranges, args.interval, args.base_url, args.workers, args.rate, args.retries, checkpoint,
+                            args.symbol.upper())
+
+    # to DataFrame, newly fetched bars replace the stored ones (the last stored bar may have been open)
+    fetched = to_frame(all_rows)
+    df = fetched
+    if existing is not None:
+        df = pd.concat([existing[fetched.columns], fetched], ignore_index=True)
+    df = df.drop_duplicates(subset="Date", keep="last").sort_values("Date").reset_index(drop=True)
+    if df.empty:
+        print("No data returned.")
+        return
+
+     # save ETH data
+    tmp = args.out.with_name(args.out.name + ".tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, args.out)
+    checkpoint.clear()
+    print(f"Saved {len(df)} rows → {args.out}")
+    if args.store is not None:
+        from data.store import append
+        added = append(args.symbol, args.interval, fetched, root=args.store)  # only the fetched bars, stored days stay as they are
+        print(f"Store: {added} new bars → {args.store / args.symbol.upper() / args.interval}")
+
+    # Fetch S&P 500
+    if not args.skip_sp500:
+        fetch_sp500(df)
+
+
 
 if __name__ == "__main__":
     main()
-
@@ -1,16 +1,25 @@
 # state.py
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
 import pandas as pd
-from typing import Optional
+from typing import Any, Optional
+from ui.logbuffer import LogBuffer
+from data.runs import RunStore
+from STRATEGIES.indicator_cache import DEFAULT_BUDGET_MB, get_indicator_cache
 
 @dataclass
 class AppState:
     csv_path: Optional[Path] = None
-    csv_data: Optional[pd.DataFrame] = None
+    csv_data: Optional[pd.DataFrame] = None   # series at the selected chart interval, what the chart and strategies use
+    base_data: Optional[pd.DataFrame] = None  # finest series as loaded from the CSV
+    intervals: Optional[Any] = None           # data.resample.IntervalCache for base_data
+    chart_interval: str = ""
+    store_query: Optional[dict] = None        # set instead of csv_path when the data came from data/store.py
     sp500_data: Optional[pd.DataFrame] = None
     selected_interval: str = ""
     status_height: int = 200
+    status_queue: deque = field(default_factory=deque)  # status bar lines not on screen yet, see ui/statusbar.py
     ui_ready: bool = False
 
     
@@ -20,11 +29,39 @@ class AppState:
 
     backtest_csv: Optional[Path] = None
     backtest_results: Optional[pd.DataFrame] = None
-    backtest_results_list = []
+    run_store: RunStore = field(default_factory=RunStore)  # every finished run, on disk (runs/)
+    run_overlays: list = field(default_factory=list)  # ids of stored runs drawn on the equity plot
+    backtest_job: Optional[Any] = None  # actions.worker.BacktestJob while a backtest runs in the background
+    current_run: Optional[Any] = None  # actions.timing.RunMetrics of that job, until its results are shown
+    run_metrics: list = field(default_factory=list)  # finished RunMetrics, newest last
+    run_metrics_path: Path = Path("run_metrics.json")
+    profile_runs: bool = False  # capture cProfile output per phase
+    backtest_log_cap: int = 5000  # lines kept in memory for the backtest status window
+    backtest_log: LogBuffer = field(default_factory=LogBuffer)
+    backtest_log_path: Path = Path("backtest_log.txt")
+    sweep_results: Optional[pd.DataFrame] = None
+    walkforward_results: Optional[pd.DataFrame] = None
+    montecarlo: Optional[Any] = None  # STRATEGIES.montecarlo.MonteCarloResult of the run on screen
 
 
     # Indicators
 
     ema_data_values: Optional[pd.Series] = None
+    ema_indicator: Optional[Any] = None  # STRATEGIES.indicators.EMA that produced ema_data_values
+    indicator_cache_mb: int = DEFAULT_BUDGET_MB  # memory budget of the shared indicator cache
     ema_period: int = 200
-    
+
+    # Chart level of detail (ui/charts.py): full-resolution arrays and the slice currently uploaded
+    chart_arrays: Optional[dict] = None
+    chart_view: Optional[dict] = None
+
+    # Live mode (actions/live.py): the running LiveSession, None when stopped
+    live: Optional[Any] = None
+
+    # Portfolio (actions/portfolio.py): (query, data.panel.Panel) of the last portfolio run
+    portfolio: Optional[Any] = None
+
+    def __post_init__(self):
+        self.backtest_log.set_cap(self.backtest_log_cap)
+        get_indicator_cache().set_budget(self.indicator_cache_mb * 2**20)
+
@@ -1,32 +1,253 @@
+"""
+Strategy worker.
+
+Run as a long-lived process by actions/strategy_worker.py: jobs arrive over a pipe and the
+loaded datasets stay in memory between jobs, so a run only pays for the work itself.
+Running the script directly keeps the old one-shot protocol (JSON job on stdin, JSON result on stdout).
+The "backtest" job runs a strategy on the dataset without any UI; batch.py uses the same code.
+While a backtest runs under serve() its status/log lines and progress come back over the pipe as
+{"event": "progress", ...} messages ahead of the result, and a {"op": "cancel"} from the app stops it.
+Any job that takes a while without reporting (the first load of a large CSV) sends {"event": "heartbeat"}.
+A backtest times its own dataset load and strategy run ("timings", seconds) and, when the job has
+"profile": true, returns their cProfile output as text ("profiles"), so the app can tell them apart
+from the round trip over the pipe.
+"""
+import cProfile
+import io
+import pstats
 import sys
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Optional
 import pandas as pd
-from STRATEGIES.strategy_pt import simple_strategy
-# Read the input JSON from stdin
-try:
-    input_data = json.load(sys.stdin)
-    csv_path = input_data["csv_path"]
-except Exception as e:
-    print(json.dumps({"error": f"Failed to read input: {str(e)}"}))
-    sys.exit(1)
-
-# Load CSV
-try:
-    df = pd.read_csv(csv_path)
-except Exception as e:
-    print(json.dumps({"error": f"Failed to load CSV: {str(e)}"}))
-    sys.exit(1)
-
-# Run dummy backtest logic
-try:
-    result = {
+from data.cache import read_csv_cached
+from data.resample import IntervalCache
+from data import store
+from STRATEGIES.progress import BacktestCancelled, ProgressFn
+from STRATEGIES.reporting import Reporter
+from STRATEGIES.strategy_pt import ConfluenceParams, confluence_based_strategy, simple_strategy
+
+STRATEGY_NAMES = ("simple", "confluence")
+
+MAX_DATASETS = 4  # datasets kept warm, least recently used is dropped first
+EVENT_INTERVAL = 0.1  # seconds between progress messages sent back while a job runs
+HEARTBEAT_INTERVAL = 5.0  # seconds between keep-alive messages while a job is busy, well under the app's timeout
+PROFILE_LINES = 30  # functions kept per profiled phase, by cumulative time (as in actions/timing.py)
+
+# path -> ((size, mtime_ns), IntervalCache) - derived intervals stay warm with their dataset
+_datasets: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def load_dataset(csv_path: str, interval: Optional[str] = None) -> pd.DataFrame:
+    # Cached read, re-read only when the file on disk changes; interval resamples the file locally
+    st = os.stat(csv_path)
+    fingerprint = (st.st_size, st.st_mtime_ns)
+    cached = _datasets.get(csv_path)
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, IntervalCache(read_csv_cached(csv_path)))
+        _datasets[csv_path] = cached
+    _datasets.move_to_end(csv_path)
+    while len(_datasets) > MAX_DATASETS:
+        _datasets.popitem(last=False)
+    intervals = cached[1]
+    return intervals.get(interval) if interval else intervals.base
+
+
+def load_store(query: dict, interval: Optional[str] = None) -> pd.DataFrame:
+    # Range from the market-data store; the memory-mapped read is cheap, the fingerprint
+    # decides whether the derived intervals cached for it are still valid
+    df = store.load(query["symbol"], query["interval"], query.get("start"), query.get("end"))
+    key = "store:" + json.dumps(query, sort_keys=True)
+    cached = _datasets.get(key)
+    if cached is None or cached[0] != df.attrs["fingerprint"]:
+        cached = (df.attrs["fingerprint"], IntervalCache(df))
+        _datasets[key] = cached
+    _datasets.move_to_end(key)
+    while len(_datasets) > MAX_DATASETS:
+        _datasets.popitem(last=False)
+    intervals = cached[1]
+    return intervals.get(interval) if interval else intervals.base
+
+
+def job_dataset(job: dict) -> pd.DataFrame:
+    # A job names its data either by CSV path or by a store query
+    if "store" in job:
+        return load_store(job["store"], job.get("interval"))
+    return load_dataset(job["csv_path"], job.get("interval"))
+
+
+def summary(df: pd.DataFrame) -> dict:
+    return {
         "row_count": len(df),
-        "avg_close": df["Close"].mean() if "Close" in df.columns else None
+        "avg_close": float(df["Close"].mean()) if "Close" in df.columns else None
     }
 
-    # Output result to stdout
-    json.dump(result, sys.stdout)
 
-except Exception as e:
-    print(json.dumps({"error": f"Failed during backtest logic: {str(e)}"}))
-    sys.exit(1)
+@contextmanager
+def job_phase(name: str, timings: dict, profiles: dict, profile: bool = False):
+    # Seconds of one part of a job into timings[name], its cProfile report into profiles[name]
+    profiler = cProfile.Profile() if profile else None
+    t0 = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        timings[name] = time.perf_counter() - t0
+        if profiler is not None:
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            profiles[name] = text.getvalue()
+
+
+def backtest(job: dict, reporter: Optional[Reporter] = None, progress: Optional[ProgressFn] = None) -> dict:
+    # {"op": "backtest", "strategy": "simple" | "confluence", "params": {ConfluenceParams fields},
+    #  "profile": bool, + the data fields}
+    name = job.get("strategy", "confluence")
+    if name not in STRATEGY_NAMES:
+        raise ValueError(f"Unknown strategy: {name} (expected one of {', '.join(STRATEGY_NAMES)})")
+    params = ConfluenceParams(**job.get("params", {}))
+    timings, profiles = {}, {}
+    profile = bool(job.get("profile"))
+    with job_phase("load", timings, profiles, profile):
+        df = job_dataset(job)
+    with job_phase("strategy", timings, profiles, profile):
+        if name == "simple":
+            results = simple_strategy(df, reporter, progress)
+        else:
+            results = confluence_based_strategy(df, params, reporter, progress)
+    # results is None when the data is too short for the strategy, the reporter says why
+    metrics = results.attrs.get("metrics", {}) if results is not None else {}
+    out = {"strategy": name, "rows": len(df), "results": results, "metrics": metrics,
+           "timings": timings, "profiles": profiles}
+    if name == "confluence":
+        out["params"] = asdict(params)
+    return out
+
+
+def handle(job: dict, reporter: Optional[Reporter] = None, progress: Optional[ProgressFn] = None) -> dict:
+    op = job.get("op", "summary")
+    if op == "ping":
+        return {"ok": True, "pid": os.getpid()}
+    if op == "load":
+        df = job_dataset(job)
+        return {"row_count": len(df)}
+    if op == "summary":
+        return summary(job_dataset(job))
+    if op == "backtest":
+        return backtest(job, reporter, progress)
+    return {"error": f"Unknown job: {op}"}
+
+
+class PipeReporter(Reporter):
+    # What a job reports while it runs, sent back over the worker pipe. Lines are batched with the
+    # latest progress at most every EVENT_INTERVAL, a trade per bar doesn't become a message per bar
+    def __init__(self, conn):
+        self.conn = conn
+        self.status_lines, self.log_lines = [], []
+        self.last = None
+        self.sent = time.perf_counter()
+        self.lock = threading.Lock()  # the heartbeat thread sends on the same pipe
+
+    def status(self, text: str):
+        self.status_lines.append(text)
+
+    def log(self, text: str):
+        self.log_lines.append(text)
+
+    def progress(self, done: int, total: int, trades: int = 0):
+        # ProgressFn of the job, also where a cancel from the app takes effect
+        self.last = (done, total, trades)
+        if time.perf_counter() - self.sent < EVENT_INTERVAL:
+            return
+        if self.conn.poll() and self.conn.recv().get("op") == "cancel":
+            raise BacktestCancelled()
+        self.flush()
+
+    def send(self, msg: dict):
+        with self.lock:
+            self.conn.send(msg)
+
+    def flush(self):
+        if self.status_lines or self.log_lines or self.last is not None:
+            self.send({"event": "progress", "progress": self.last,
+                       "status": self.status_lines, "log": self.log_lines})
+        self.status_lines, self.log_lines = [], []
+        self.sent = time.perf_counter()
+
+    @contextmanager
+    def heartbeat(self):
+        # Keep-alive from a side thread for as long as the job runs
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                self.send({"event": "heartbeat"})
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def serve(conn):
+    # Worker loop: one response per job until a shutdown job or the pipe closes
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job.get("op") == "shutdown":
+            break
+        if job.get("op") == "cancel":
+            continue  # arrived after its job had already finished
+        channel = PipeReporter(conn)
+        try:
+            with channel.heartbeat():
+                result = handle(job, channel, channel.progress)
+        except BacktestCancelled:
+            result = {"cancelled": True}
+        except Exception as e:
+            result = {"error": f"Failed during {job.get('op', 'job')}: {str(e)}"}
+        channel.flush()
+        conn.send(result)
+    conn.close()
+
+
+def main():
+    # Read the input JSON from stdin
+    try:
+        input_data = json.load(sys.stdin)
+        csv_path = input_data["csv_path"]
+    except Exception as e:
+        print(json.dumps({"error": f"Failed to read input: {str(e)}"}))
+        sys.exit(1)
+
+    # Load CSV
+    try:
+        df = load_dataset(csv_path)
+    except Exception as e:
+        print(json.dumps({"error": f"Failed to load CSV: {str(e)}"}))
+        sys.exit(1)
+
+    # Run dummy backtest logic
+    try:
+        # Output result to stdout
+        json.dump(summary(df), sys.stdout)
+    except Exception as e:
+        print(json.dumps({"error": f"Failed during backtest logic: {str(e)}"}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# tests/conftest.py
+# Shared data for the tests: the ETH files that ship with the repo and seeded synthetic random walks.
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+ETH_FILES = ("eth_5m.csv", "eth_15m.csv")
+
+
+def random_walk(length: int, seed: int = 0, start: str = "2024-01-01", freq: str = "5min") -> pd.DataFrame:
+    # OHLCV bars around a geometric random walk, trending enough for the confluence setups to show up
+    rng = np.random.default_rng(seed)
+    close = 2000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, length)))
+    open_ = np.r_[close[:1], close[:-1]] * (1.0 + rng.normal(0.0, 0.0005, length))
+    wick = np.abs(rng.normal(0.0, 0.002, (2, length))) * close
+    return pd.DataFrame({
+        "Date": pd.date_range(start, periods=length, freq=freq),
+        "Open": open_,
+        "High": np.maximum(open_, close) + wick[0],
+        "Low": np.minimum(open_, close) - wick[1],
+        "Close": close,
+        "Volume": rng.uniform(100.0, 1000.0, length),
+    })
+
+
+def read_eth(name: str) -> pd.DataFrame:
+    return pd.read_csv(ROOT / name, parse_dates=["Date"])
+
+
+def assert_same_results(results: pd.DataFrame, expected: pd.DataFrame):
+    assert list(results.columns) == list(expected.columns)
+    assert len(results) == len(expected)
+    np.testing.assert_array_equal(results["Date"].to_numpy(dtype="datetime64[ns]"),
+                                  expected["Date"].to_numpy(dtype="datetime64[ns]"))
+    for col in ("Cumulative Percentage Returns", "Account Balance"):
+        np.testing.assert_allclose(results[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                                   rtol=1e-12, atol=1e-9)
+    assert results["Short/Long"].tolist() == expected["Short/Long"].tolist()
+    for col in ("Cumulative Percentage Returns", "Account Balance", "Short/Long"):
+        assert results[col].dtype == expected[col].dtype, col
+
+
+@pytest.fixture(params=ETH_FILES)
+def eth(request) -> pd.DataFrame:
+    return read_eth(request.param)
@@ -0,0 +1,15 @@
+# tests/test_benchmark.py
+# tools/benchmark.py's synthetic data: prices stay positive and bounded at every benchmark size.
+import numpy as np
+import pytest
+from tools.benchmark import synthetic_ohlcv
+
+
+@pytest.mark.parametrize("n", [10_000, 1_000_000])
+def test_synthetic_prices_stay_in_range(n):
+    df = synthetic_ohlcv(n)
+    prices = df[["Open", "High", "Low", "Close"]].to_numpy()
+    assert np.isfinite(prices).all()
+    assert 100 < prices.min() and prices.max() < 40_000
+    assert (df["High"] >= df[["Open", "Close"]].max(axis=1)).all()
+    assert (df["Low"] <= df[["Open", "Close"]].min(axis=1)).all()
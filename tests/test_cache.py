@@ -0,0 +1,27 @@
+# tests/test_cache.py
+# The binary CSV cache: same frame as pandas, served from the cache once written, writable like a normal frame.
+import numpy as np
+import pandas as pd
+from conftest import random_walk
+from data.cache import read_cache, read_csv_cached
+
+
+def test_cached_frame_matches_the_csv_and_is_writable(tmp_path):
+    path, cache_dir = tmp_path / "walk.csv", tmp_path / "cache"
+    random_walk(500).to_csv(path, index=False)
+    expected = pd.read_csv(path, parse_dates=["Date"])
+
+    first = read_csv_cached(path, cache_dir)
+    assert read_cache(path, cache_dir) is not None
+    second = read_csv_cached(path, cache_dir)
+    for df in (first, second):
+        np.testing.assert_array_equal(df["Date"].to_numpy(dtype="datetime64[ns]"),
+                                      expected["Date"].to_numpy(dtype="datetime64[ns]"))
+        np.testing.assert_array_equal(df["Close"].to_numpy(), expected["Close"].to_numpy())
+
+    second.loc[0, "Close"] = 1.0
+    second["Open"] *= 2
+    assert second.loc[0, "Close"] == 1.0
+    third = read_csv_cached(path, cache_dir)  # the cache on disk is untouched
+    np.testing.assert_array_equal(third["Close"].to_numpy(), expected["Close"].to_numpy())
+    np.testing.assert_array_equal(third["Open"].to_numpy(), expected["Open"].to_numpy())
@@ -0,0 +1,139 @@
+# tests/test_confluence.py
+# confluence_based_strategy (vectorized setup scan + kernels) against the nested j/k/m loop it replaced.
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import assert_same_results, random_walk
+from STRATEGIES.reporting import ListReporter
+from STRATEGIES.strategy_pt import confluence_based_strategy
+
+
+def loop_confluence_strategy(data: pd.DataFrame, log: list):
+    # The original scan, UI calls replaced by log.append; arrays instead of .iloc, same comparisons
+    o, h, l, c = (data[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close"))
+    times = pd.to_datetime(data["Date"], errors="coerce").reset_index(drop=True)
+    length = len(data)
+    leverage, starting_balance, trade_risk_cash, ema_period = 10.0, 100000.0, 1000.0, 200
+    if length < ema_period + 3:
+        return None
+    ema = pd.Series(c).ewm(span=ema_period, adjust=False).mean().to_numpy()
+
+    side_array, balance_array, time_array, cum_pct_array = [], [], [], []
+    balance = starting_balance
+
+    def manage(entry_idx, side, stop_px, tp_px):
+        nonlocal balance
+        entry_px = c[entry_idx]
+        exit_px = exit_time = None
+        for m in range(entry_idx + 1, length):
+            hit_tp = h[m] >= tp_px if side == "Long" else l[m] <= tp_px
+            hit_sl = l[m] <= stop_px if side == "Long" else h[m] >= stop_px
+            if hit_tp or hit_sl:
+                exit_px, exit_time = (tp_px if hit_tp else stop_px), times.iloc[m]
+                break
+        if exit_px is None:
+            exit_px, exit_time = c[length - 1], times.iloc[length - 1]
+        pnl = (trade_risk_cash * leverage) * ((exit_px / entry_px - 1.0) * (100.0 if side == "Long" else -100.0) / 100.0)
+        if balance >= trade_risk_cash:
+            balance += pnl
+            time_array.append(exit_time)
+            side_array.append(side)
+            balance_array.append(balance)
+            cum_pct_array.append((balance - starting_balance) / starting_balance * 100.0)
+            log.append(f"Trade {side} closed @ {exit_time} | Δ: {pnl:+.2f} | Bal: {balance:.2f}")
+        else:
+            log.append("Not enough balance to take trade.")
+
+    i = ema_period
+    while i < length - 2:
+        bull = c[i] < ema[i]
+        gap = (ema[i] / c[i] - 1.0) * 100.0 if bull else (c[i] / ema[i] - 1.0) * 100.0
+        if gap < 1.0:
+            i += 1
+            continue
+        if bull and c[i] > o[i] and c[i + 1] > o[i + 1] and c[i + 2] > o[i + 2] and h[i] < l[i + 2]:
+            log.append("BULLISH FVG FOUND")
+            fvg_low, fvg_high, side = h[i], l[i + 2], "Long"
+        elif not bull and c[i] < o[i] and c[i + 1] < o[i + 1] and c[i + 2] < o[i + 2] and l[i] > h[i + 2]:
+            log.append("BEARISH FVG FOUND")
+            fvg_low, fvg_high, side = h[i + 2], l[i], "Short"
+        else:
+            i += 1
+            continue
+        j = i + 3
+        while j < length:
+            if fvg_low < c[j] < fvg_high:
+                k = j + 1
+                invalid = entered = False
+                while k < length:
+                    if (c[k] <= fvg_low) if side == "Long" else (c[k] >= fvg_high):
+                        invalid = True
+                        break
+                    if (c[k] >= fvg_high) if side == "Long" else (c[k] <= fvg_low):
+                        entry_px = c[k]
+                        if side == "Long":
+                            stop_px = fvg_low
+                            tp_px = entry_px * (1 + 2 * ((entry_px - stop_px) / entry_px))
+                        else:
+                            stop_px = fvg_high
+                            tp_px = entry_px * (1 - 2 * ((stop_px - entry_px) / entry_px))
+                        manage(k, side, stop_px, tp_px)
+                        entered = True
+                        break
+                    k += 1
+                if invalid or entered:
+                    break
+            j += 1
+        i = max(i + 1, j)
+
+    if len(time_array) == 0:
+        log.append("No qualifying trades found.")
+    else:
+        log.append(f"Strategy completed. Final balance: {balance:.2f}")
+    results = pd.DataFrame({
+        "Date": time_array,
+        "Cumulative Percentage Returns": cum_pct_array,
+        "Account Balance": balance_array,
+        "Short/Long": side_array
+    })
+    results["Date"] = pd.to_datetime(results["Date"], errors="coerce")
+    return results
+
+
+def assert_matches_loop(data: pd.DataFrame):
+    reporter, log = ListReporter(), []
+    results = confluence_based_strategy(data, reporter=reporter)
+    expected = loop_confluence_strategy(data, log)
+    assert_same_results(results, expected)
+    assert reporter.log_lines == log
+    return results
+
+
+def test_confluence_matches_loop_on_eth(eth):
+    assert len(assert_matches_loop(eth)) > 0
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_confluence_matches_loop_on_random_walk(seed):
+    assert len(assert_matches_loop(random_walk(20000, seed=seed))) > 0
+
+
+@pytest.mark.parametrize("length", [203, 204, 205, 2001])
+def test_confluence_matches_loop_near_the_ema_warmup(length):
+    assert_matches_loop(random_walk(length, seed=length))
+
+
+def test_confluence_too_short_returns_none():
+    reporter = ListReporter()
+    assert confluence_based_strategy(random_walk(202), reporter=reporter) is None
+    assert reporter.status_lines[-1] == "Not enough rows for EMA(200) and pattern detection."
+
+
+def test_confluence_without_trades_keeps_loop_dtypes():
+    # Straight up with bullish candles only: above the EMA, so no bearish setup ever forms
+    close = np.linspace(100.0, 300.0, 600)
+    data = pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=600, freq="5min"),
+                         "Open": close - 0.5, "High": close + 0.5, "Low": close - 1.0, "Close": close})
+    results = assert_matches_loop(data)
+    assert results.empty
+    assert results.attrs["metrics"]["Trades"] == 0
@@ -0,0 +1,89 @@
+# tests/test_engine.py
+# simple_strategy on the NumPy engine against the row-by-row loop it replaced.
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import assert_same_results, random_walk
+from STRATEGIES.engine import LONG, SHORT, equity_curve, settle_trades, simulate_signals, trades_from_signals
+from STRATEGIES.strategy_pt import simple_strategy
+
+
+def loop_simple_strategy(data: pd.DataFrame) -> pd.DataFrame:
+    # The original per-row loop, UI calls removed. A trailing signal bar without its trade bar
+    # made the columns different lengths there, so it is left off here
+    open_col, close_col, date_col = data["Open"], data["Close"], data["Date"]
+    length = len(data) - len(data) % 2
+    account_balance, trade_size, leverage = 100000.0, 1000.0, 10.0
+    cumulative_percentage_returns, account_balance_array, time, short_long = [], [], [], []
+    count = 0
+    while count < length:
+        bullish = open_col[count] - close_col[count] < 0
+        short_long.append("Long" if bullish else "Short")
+        count += 1
+        percentage_movement = (close_col[count] - open_col[count]) / open_col[count] * 100
+        if not bullish:
+            percentage_movement = 0 - percentage_movement
+        if account_balance >= trade_size:
+            account_balance += (trade_size * leverage) * (percentage_movement / 100)
+            time.append(date_col[count])
+            cumulative_percentage_returns.append((account_balance - 100000.0) / 100000.0 * 100)
+            account_balance_array.append(account_balance)
+        elif bullish:
+            short_long.pop()
+            break
+        else:
+            short_long.pop()
+        count += 1
+    results = pd.DataFrame({
+        "Date": time,
+        "Cumulative Percentage Returns": cumulative_percentage_returns,
+        "Account Balance": account_balance_array,
+        "Short/Long": short_long
+    })
+    results["Date"] = pd.to_datetime(results["Date"], errors="coerce")
+    return results
+
+
+def test_simple_strategy_matches_loop_on_eth(eth):
+    assert_same_results(simple_strategy(eth), loop_simple_strategy(eth))
+
+
+@pytest.mark.parametrize("length", [2, 3, 1001, 4000])
+def test_simple_strategy_matches_loop_on_random_walk(length):
+    data = random_walk(length, seed=length)
+    results = simple_strategy(data)
+    assert_same_results(results, loop_simple_strategy(data))
+    assert len(results) == length // 2  # an odd last bar opens nothing
+
+
+@pytest.mark.parametrize("length", [0, 1])
+def test_simple_strategy_without_trades_keeps_loop_dtypes(length):
+    data = random_walk(length)
+    results = simple_strategy(data)
+    assert results.empty
+    assert_same_results(results, loop_simple_strategy(data))
+    assert results.attrs["metrics"]["Trades"] == 0
+
+
+def test_trades_from_signals_groups_runs():
+    entry, exit_, side = trades_from_signals(np.array([0, 1, 1, -1, 0, 0, 1]))
+    assert entry.tolist() == [1, 3, 6]
+    assert exit_.tolist() == [2, 3, 6]
+    assert side.tolist() == [LONG, SHORT, LONG]
+
+
+def test_settle_trades_halts_at_first_rejection():
+    pct_move = np.array([-50.0, -50.0, 10.0, 10.0])
+    pnl, balance, halted_at = settle_trades(pct_move, trade_size=1000.0, leverage=1.0, starting_balance=1200.0)
+    assert halted_at == 1
+    assert pnl.tolist() == [-500.0]
+    assert balance.tolist() == [700.0]
+
+
+def test_equity_curve_steps_on_exit_bars():
+    signals = np.array([0, 1, 1, 0, -1, 0], dtype=np.int8)
+    open_ = np.array([100.0, 100.0, 101.0, 102.0, 100.0, 99.0])
+    close = np.array([100.0, 101.0, 102.0, 100.0, 99.0, 99.0])
+    result = simulate_signals(signals, open_, close, trade_size=1000.0, leverage=10.0, starting_balance=1000.0)
+    np.testing.assert_allclose(result.equity, [1000.0, 1000.0, 1200.0, 1200.0, 1300.0, 1300.0])
+    np.testing.assert_array_equal(equity_curve(result.trades, 6, 1000.0), result.equity)
@@ -0,0 +1,128 @@
+# tests/test_fetch_eth_csv.py
+# fetch_eth_csv.py against tools/klines_server.py on a local port: gaps, retries, resuming and --incremental.
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import pytest
+import fetch_eth_csv
+from fetch_eth_csv import Checkpoint, fetch_ranges, interval_ms, missing_ranges, plan_chunks, to_frame
+from tools.klines_server import KlinesHandler
+
+INTERVAL = "1m"
+STEP = interval_ms(INTERVAL)
+
+
+class RecordingHandler(KlinesHandler):
+    # Keeps the startTime of every request answered with bars, before the client can see the answer
+    starts = []
+
+    def send_response(self, code, message=None):
+        if code == 200:
+            RecordingHandler.starts.append(int(parse_qs(urlparse(self.path).query)["startTime"][0]))
+        super().send_response(code, message)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(KlinesHandler, "fail_rate", 0.0)
+    monkeypatch.setattr(KlinesHandler, "gap", None)
+    monkeypatch.setattr(KlinesHandler, "requests_seen", 0)
+    monkeypatch.setattr(RecordingHandler, "starts", [])
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def recent_range(bars: int):
+    # [start, end) of the last `bars` closed bars, on bar boundaries
+    end = int(time.time() * 1000) // STEP * STEP
+    return end - bars * STEP, end
+
+
+def fetch(base_url: str, ranges, tmp_path, retries: int = 3):
+    return fetch_ranges(ranges, INTERVAL, base_url, workers=2, rate=100.0, retries=retries,
+                        checkpoint=Checkpoint(tmp_path / "eth.csv", INTERVAL))
+
+
+def test_missing_ranges_finds_the_served_gap(server, tmp_path):
+    start, end = recent_range(3000)
+    gap = (start + 1000 * STEP, start + 1200 * STEP)
+    KlinesHandler.gap = gap
+    df = to_frame(fetch(server, [(start, end)], tmp_path))
+    assert len(df) == 3000 - 200
+    ranges = missing_ranges(df, start, end, STEP)
+    assert gap in ranges
+    assert ranges[-1][0] == int(df["Date"].iloc[-1].value // 10**6)  # the last bar is refetched
+
+
+def test_fetch_ranges_retries_429_and_500(server, tmp_path):
+    start, end = recent_range(3000)
+    expected = fetch(server, [(start, end)], tmp_path / "clean")
+    clean_requests = KlinesHandler.requests_seen
+
+    KlinesHandler.requests_seen = 0
+    KlinesHandler.fail_rate = 0.3
+    random.seed(1)  # the first request draws 0.13, so at least one failure is certain
+    rows = fetch(server, [(start, end)], tmp_path / "flaky", retries=10)
+    assert KlinesHandler.requests_seen > clean_requests
+    assert sorted(rows) == sorted(expected)
+
+
+def test_interrupted_download_resumes_from_checkpoints(server, tmp_path, monkeypatch, capsys):
+    start, end = recent_range(5000)
+    chunks = plan_chunks([(start, end)], STEP)
+    real_fetch_chunk = fetch_eth_csv.fetch_chunk
+    calls = []
+
+    def interrupted(*args, **kwargs):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        calls.append(args[2])
+        return real_fetch_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(fetch_eth_csv, "fetch_chunk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        fetch_ranges([(start, end)], INTERVAL, server, workers=1, rate=100.0, retries=0,
+                     checkpoint=Checkpoint(tmp_path / "eth.csv", INTERVAL))
+    monkeypatch.setattr(fetch_eth_csv, "fetch_chunk", real_fetch_chunk)
+    assert len(list((tmp_path / "eth.csv.parts" / INTERVAL).glob("*.json"))) == 2
+
+    RecordingHandler.starts.clear()
+    rows = fetch(server, [(start, end)], tmp_path)
+    assert "Resuming: 2/" in capsys.readouterr().out
+    assert sorted(RecordingHandler.starts) == sorted(s for s, _ in chunks if s not in calls)
+    assert sorted(rows) == sorted(fetch(server, [(start, end)], tmp_path / "clean"))
+
+
+def test_incremental_run_only_requests_the_tail(server, tmp_path, monkeypatch):
+    out = tmp_path / "eth.csv"
+    argv = ["fetch_eth_csv.py", "--base-url", server, "--days", "3", "--interval", INTERVAL, "--out", str(out),
+            "--incremental", "--skip-sp500", "--rate", "100"]
+    monkeypatch.setattr(sys, "argv", argv)
+    fetch_eth_csv.main()
+    first = pd.read_csv(out, parse_dates=["Date"])
+    assert len(first) >= 3 * 1440
+    last_ms = int(first["Date"].iloc[-1].value // 10**6)
+
+    RecordingHandler.starts.clear()
+    fetch_eth_csv.main()
+    assert RecordingHandler.starts and min(RecordingHandler.starts) >= last_ms
+    second = pd.read_csv(out, parse_dates=["Date"])
+    assert second["Date"].is_unique and second["Date"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(second.iloc[:len(first) - 1], first.iloc[:-1])
+
+
+def test_interval_units_are_case_sensitive():
+    assert interval_ms("15m") == 15 * 60_000
+    assert interval_ms("1h") == 3_600_000
+    assert interval_ms("1w") == 7 * 86_400_000
+    for bad in ("1M", "3M", "1x", "m", "0m", "", "1H"):
+        with pytest.raises(ValueError):
+            interval_ms(bad)
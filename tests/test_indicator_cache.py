@@ -0,0 +1,99 @@
+# tests/test_indicator_cache.py
+# The LRU byte budget of STRATEGIES.indicator_cache and indicator_series hits against a fresh batch().
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_walk
+from data.cache import tag_dataset
+from STRATEGIES import indicator_cache
+from STRATEGIES.indicator_cache import IndicatorCache, indicator_series
+from STRATEGIES.indicators import EMA, RollingHigh
+
+
+def column(length: int) -> np.ndarray:
+    return np.arange(length, dtype=float)  # 8 bytes a value
+
+
+def test_least_recently_used_entries_go_first():
+    cache = IndicatorCache(budget_bytes=3 * 800)
+    for key in "abc":
+        cache.put((key,), column(100), None)
+    assert cache.used_bytes == 2400
+    cache.get(("a",))  # a is now the most recent
+    cache.put(("d",), column(100), None)
+    assert list(cache._entries) == [("c",), ("a",), ("d",)]
+    assert cache.used_bytes == 2400
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get(("b",)) is None and cache.misses == 1
+
+
+def test_budget_counts_bytes_not_entries():
+    cache = IndicatorCache(budget_bytes=1000)
+    cache.put(("small",), column(30), None)
+    cache.put(("big",), column(100), None)
+    assert list(cache._entries) == [("big",)]
+    assert cache.used_bytes == 800
+
+
+def test_replacing_a_key_does_not_count_it_twice():
+    cache = IndicatorCache(budget_bytes=1000)
+    cache.put(("a",), column(100), None)
+    cache.put(("a",), column(50), None)
+    assert cache.used_bytes == 400
+    assert len(cache._entries) == 1
+
+
+def test_column_larger_than_the_budget_is_not_cached():
+    cache = IndicatorCache(budget_bytes=1000)
+    cache.put(("a",), column(50), None)
+    cache.put(("huge",), column(1000), None)
+    assert list(cache._entries) == [("a",)]
+    assert cache.used_bytes == 400
+
+
+def test_shrinking_the_budget_evicts_down_to_it():
+    cache = IndicatorCache(budget_bytes=10_000)
+    for key in range(5):
+        cache.put((key,), column(100), None)
+    cache.set_budget(1700)
+    assert list(cache._entries) == [(3,), (4,)]
+    assert cache.used_bytes == 1600
+    cache.clear()
+    assert cache.used_bytes == 0 and not cache._entries
+
+
+def test_cached_columns_are_read_only():
+    cache = IndicatorCache()
+    cache.put(("a",), column(10), None)
+    values, _ = cache.get(("a",))
+    with pytest.raises(ValueError):
+        values[0] = 1.0
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = IndicatorCache()
+    monkeypatch.setattr(indicator_cache, "_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("make", [lambda: EMA(20), lambda: RollingHigh(20)])
+def test_hit_matches_a_fresh_batch_and_primes_the_indicator(fresh_cache, make):
+    df = tag_dataset(random_walk(500, seed=2), "walk-2")
+    first = indicator_series(df, make())
+    primed = make()
+    second = indicator_series(df, primed)
+    assert (fresh_cache.hits, fresh_cache.misses) == (1, 1)
+    pd.testing.assert_series_equal(second, first, check_names=False)
+
+    bar = random_walk(501, seed=2).iloc[-1].to_dict()
+    expected = make()
+    expected.batch(df)
+    assert primed.update(bar) == expected.update(bar)
+
+
+def test_untagged_or_sliced_frames_skip_the_cache(fresh_cache):
+    df = tag_dataset(random_walk(500, seed=2), "walk-2")
+    indicator_series(random_walk(500, seed=2), EMA(20))
+    indicator_series(df.iloc[:100], EMA(20))  # attrs survive the slice, the row count does not
+    assert (fresh_cache.hits, fresh_cache.misses, fresh_cache.used_bytes) == (0, 0, 0)
@@ -0,0 +1,76 @@
+# tests/test_indicators.py
+# batch() on a prefix followed by update() bar by bar against batch() over the whole series.
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_walk
+from STRATEGIES.indicators import ATR, EMA, RSI, SMA, RollingHigh, RollingLow
+
+INDICATORS = {
+    "EMA": lambda: EMA(20),
+    "SMA": lambda: SMA(20),
+    "RSI": lambda: RSI(14),
+    "ATR": lambda: ATR(14),
+    "RollingHigh": lambda: RollingHigh(20),
+    "RollingLow": lambda: RollingLow(20),
+}
+
+
+def with_nans(df: pd.DataFrame, seed: int, share: float = 0.03) -> pd.DataFrame:
+    # Scattered missing prices plus a run longer than every period
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    for col in ("High", "Low", "Close"):
+        df.loc[rng.random(len(df)) < share, col] = np.nan
+    df.loc[300:340, ["High", "Low", "Close"]] = np.nan
+    return df
+
+
+def batch_then_update(make, df: pd.DataFrame, split: int) -> np.ndarray:
+    indicator = make()
+    head = indicator.batch(df.iloc[:split]).to_numpy(dtype=float)
+    tail = [indicator.update(bar) for bar in df.iloc[split:].to_dict("records")]
+    out = np.r_[head, tail]
+    np.testing.assert_equal(indicator.value, out[-1])  # value is the latest one
+    return out
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("nans", [False, True])
+def test_update_continues_the_batch(name, nans):
+    make = INDICATORS[name]
+    df = random_walk(1200, seed=7)
+    if nans:
+        df = with_nans(df, seed=8)
+    expected = make().batch(df).to_numpy(dtype=float)
+    splits = [0, 1, 5, 19, 20, 21, 320, 341] + np.random.default_rng(9).integers(0, len(df), 6).tolist()
+    for split in splits:
+        np.testing.assert_allclose(batch_then_update(make, df, split), expected, rtol=1e-9, atol=1e-9,
+                                   equal_nan=True, err_msg=f"{name} split at {split}")
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+def test_empty_batch(name):
+    indicator = INDICATORS[name]()
+    out = indicator.batch(random_walk(0))
+    assert out.empty
+    assert np.isnan(indicator.value)
+
+
+def test_batch_matches_the_pandas_expressions():
+    df = with_nans(random_walk(600, seed=3), seed=4)
+    close = df["Close"]
+    pd.testing.assert_series_equal(EMA(20).batch(df), close.ewm(span=20, adjust=False).mean(), check_names=False)
+    pd.testing.assert_series_equal(SMA(20).batch(df), close.rolling(20).mean(), check_names=False)
+    pd.testing.assert_series_equal(RollingHigh(20).batch(df), df["High"].rolling(20).max(), check_names=False)
+    pd.testing.assert_series_equal(RollingLow(20).batch(df), df["Low"].rolling(20).min(), check_names=False)
+
+
+def test_peek_does_not_take_the_bar_in():
+    df = random_walk(100, seed=5)
+    ema = EMA(10)
+    ema.batch(df.iloc[:99])
+    bar = df.iloc[99].to_dict()
+    peeked = ema.peek(dict(bar, Close=bar["Close"] * 1.01))
+    assert ema.update(bar) == pytest.approx(EMA(10).batch(df).iloc[-1], rel=1e-12)
+    assert peeked != ema.value
@@ -0,0 +1,71 @@
+# tests/test_kernels.py
+# The Numba scans against their NumPy fallback, and the confluence strategy on either.
+import os
+import subprocess
+import sys
+from functools import partial
+import numpy as np
+import pytest
+from conftest import ROOT, assert_same_results, random_walk
+from STRATEGIES import kernels, strategy_pt
+from STRATEGIES.kernels import HAVE_NUMBA, as_kernel_array, scan_exit, scan_inside, scan_outside
+from STRATEGIES.strategy_pt import confluence_based_strategy
+
+needs_numba = pytest.mark.skipif(not HAVE_NUMBA, reason="Numba is not installed")
+
+
+def prices(length: int, seed: int, nan_every: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = 100.0 + np.cumsum(rng.normal(0.0, 1.0, length))
+    if nan_every:
+        a[::nan_every] = np.nan
+    return as_kernel_array(a)
+
+
+@needs_numba
+@pytest.mark.parametrize("nan_every", [0, 7])
+def test_inside_and_outside_scans_agree(nan_every):
+    close = prices(5000, seed=nan_every, nan_every=nan_every)
+    for start in (0, 1, 255, 256, 257, 4999, 5000, 6000):
+        for low, high in ((95.0, 105.0), (99.9, 100.1), (-1e9, 1e9), (200.0, 300.0)):
+            assert scan_inside(close, low, high, start, jit=True) == scan_inside(close, low, high, start, jit=False)
+            assert scan_outside(close, low, high, start, jit=True) == scan_outside(close, low, high, start, jit=False)
+
+
+@needs_numba
+@pytest.mark.parametrize("nan_every", [0, 5])
+@pytest.mark.parametrize("is_long", [True, False])
+def test_exit_scans_agree(nan_every, is_long):
+    close = prices(5000, seed=11, nan_every=nan_every)
+    high, low = close + 0.5, close - 0.5
+    for start in (0, 300, 4999, 5000):
+        for distance in (0.5, 2.0, 10.0, 1e6):
+            tp, stop = (100.0 + distance, 100.0 - distance) if is_long else (100.0 - distance, 100.0 + distance)
+            jit = scan_exit(high, low, start, tp, stop, is_long, jit=True)
+            assert jit == scan_exit(high, low, start, tp, stop, is_long, jit=False)
+            assert isinstance(jit[0], int) and isinstance(jit[1], bool)
+
+
+def test_exit_checks_tp_before_sl_on_the_same_bar():
+    high, low = as_kernel_array([100.0, 110.0]), as_kernel_array([100.0, 90.0])
+    for jit in (True, False):
+        assert scan_exit(high, low, 1, 105.0, 95.0, True, jit=jit) == (1, True)
+        assert scan_exit(high, low, 1, 95.0, 105.0, False, jit=jit) == (1, True)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_confluence_is_the_same_on_the_fallback(seed, monkeypatch):
+    data = random_walk(20000, seed=seed)
+    compiled = confluence_based_strategy(data)
+    for name in ("scan_inside", "scan_outside", "scan_exit"):
+        monkeypatch.setattr(strategy_pt, name, partial(getattr(kernels, name), jit=False))
+    fallback = confluence_based_strategy(data)
+    assert len(fallback) > 0
+    assert_same_results(fallback, compiled)
+
+
+def test_no_jit_environment_variable_selects_the_fallback():
+    env = dict(os.environ, BACKTEST_NO_JIT="1")
+    out = subprocess.run([sys.executable, "-c", "from STRATEGIES.kernels import USE_JIT; print(USE_JIT)"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
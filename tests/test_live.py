@@ -0,0 +1,96 @@
+# tests/test_live.py
+# The live state machines fed bar by bar against the batch strategies on the same data.
+import numpy as np
+import pytest
+from conftest import random_walk
+from data.live import seed_mismatch
+from STRATEGIES.engine import LONG
+from STRATEGIES.live import ConfluenceLive, SimpleStrategyLive
+from STRATEGIES.strategy_pt import confluence_based_strategy, simple_strategy
+
+
+def feed(strategy, data):
+    # Bars as live mode hands them over: OHLC plus the open time in epoch ms
+    ms = data["Date"].to_numpy(dtype="datetime64[ms]").view("int64")
+    events = []
+    for bar, t in zip(data[["Open", "High", "Low", "Close"]].to_dict("records"), ms):
+        bar["Date"] = int(t)
+        events.extend(strategy.on_bar(bar))
+    return [e for e in events if e["kind"] == "trade"]
+
+
+def assert_trades_match(trades, results):
+    assert len(trades) > 0
+    expected = results.iloc[:len(trades)]
+    assert [("Long" if t["side"] == LONG else "Short") for t in trades] == expected["Short/Long"].tolist()
+    assert [t["time"] for t in trades] == expected["Date"].to_numpy(dtype="datetime64[ms]").view("int64").tolist()
+    np.testing.assert_allclose([t["balance"] for t in trades], expected["Account Balance"], rtol=1e-12)
+
+
+@pytest.mark.parametrize("length", [1001, 4000])
+def test_simple_live_matches_batch(length):
+    data = random_walk(length, seed=length)
+    results = simple_strategy(data)
+    trades = feed(SimpleStrategyLive(), data)
+    assert len(trades) == len(results)
+    assert_trades_match(trades, results)
+
+
+def test_simple_live_matches_batch_on_eth(eth):
+    results = simple_strategy(eth)
+    trades = feed(SimpleStrategyLive(), eth)
+    assert len(trades) == len(results)
+    assert_trades_match(trades, results)
+
+
+def assert_confluence_matches(data):
+    # Live can't close a trade at "the end of the data" like the batch run does; trades are settled
+    # in setup order, so a trade still open at the end holds back every later one
+    results = confluence_based_strategy(data)
+    strategy = ConfluenceLive()
+    trades = feed(strategy, data)
+    assert_trades_match(trades, results)
+    if len(trades) < len(results):
+        assert results["Date"].iloc[len(trades)] == data["Date"].iloc[-1]
+        assert strategy.open_trades()
+    return trades, results
+
+
+def test_confluence_live_matches_batch_on_eth(eth):
+    assert_confluence_matches(eth)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_confluence_live_matches_batch_on_random_walk(seed):
+    assert_confluence_matches(random_walk(20000, seed=seed))
+
+
+def test_confluence_live_holds_a_trade_open_at_the_end():
+    # Cut just before the 6th trade's exit: batch closes it at the last close, live keeps it open
+    data = random_walk(20000, seed=1)
+    exit_time = confluence_based_strategy(data)["Date"].iloc[5]
+    trades, results = assert_confluence_matches(data[data["Date"] < exit_time].reset_index(drop=True))
+    assert len(trades) == 5 < len(results)
+
+
+@pytest.mark.parametrize("symbol, interval, dataset_symbol, file_name, matches", [
+    ("ETHUSDT", "5m", None, "eth_5m.csv", True),
+    ("ethusdt", "5m", None, "ETHUSDT-5m.csv", True),
+    ("BTCUSDT", "5m", None, "eth_5m.csv", False),
+    ("ETHUSDT", "15m", None, "eth_5m.csv", False),
+    ("ETHUSDT", "5m", None, "prices.csv", False),
+    ("ETHUSDT", "5m", "ETHUSDT", "", True),
+    ("BTCUSDT", "5m", "ETHUSDT", "", False),
+])
+def test_seed_mismatch_needs_the_same_market_and_timeframe(symbol, interval, dataset_symbol, file_name, matches):
+    data = random_walk(50, seed=1, freq="5min")
+    reason = seed_mismatch(data, symbol, interval, dataset_symbol, file_name)
+    assert (reason is None) == matches, reason
+
+
+def test_seed_mismatch_maps_ui_interval_labels():
+    hourly = random_walk(50, seed=1, freq="1h")
+    assert seed_mismatch(hourly, "ETHUSDT", "1h", "ETHUSDT") is None
+    assert seed_mismatch(hourly, "ETHUSDT", "1M", "ETHUSDT") is not None
+    assert seed_mismatch(random_walk(1, seed=1), "ETHUSDT", "5m", "ETHUSDT") is not None
+    assert seed_mismatch(None, "ETHUSDT", "5m", "ETHUSDT") == "is empty"
@@ -0,0 +1,162 @@
+# tests/test_metrics.py
+# The per-bar equity the equity plot rebuilds from a results frame, against engine.equity_curve, and
+# the vectorized metrics against pandas and hand-worked figures on known series.
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_walk
+from data.benchmarks import asof
+from STRATEGIES.engine import LONG, TradeLog, equity_curve
+from STRATEGIES.metrics import (
+    YEAR_SECONDS, exposure, longest_underwater, performance_metrics, relative_metrics, results_equity,
+    rolling_max, rolling_metrics
+)
+from STRATEGIES.strategy_pt import ConfluenceParams, confluence_based_strategy, run_confluence
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_results_equity_matches_the_engine_on_the_bar_grid(seed):
+    data = random_walk(20000, seed=seed)
+    results = confluence_based_strategy(data)
+    params = ConfluenceParams()
+    _, trades = run_confluence(*(data[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close")), params)
+
+    times, balance = results_equity(results)
+    assert (np.diff(times) >= 0).all()
+    grid = data["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+    np.testing.assert_array_equal(asof(times, balance, grid, fill=params.starting_balance),
+                                  equity_curve(trades, len(data), params.starting_balance))
+
+
+def test_overlapping_trades_are_put_in_time_order():
+    # Seed 1 has a trade that closes before the one taken ahead of it
+    results = confluence_based_strategy(random_walk(20000, seed=1))
+    exits = results["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+    assert (np.diff(exits) < 0).any()
+    times, _ = results_equity(results)
+    np.testing.assert_array_equal(times, np.sort(exits))
+
+
+def trade_log(entry, exit_, pnl, starting_balance=1000.0) -> TradeLog:
+    entry, exit_, pnl = (np.asarray(a) for a in (entry, exit_, pnl))
+    zeros = np.zeros(len(pnl))
+    return TradeLog(entry_idx=entry.astype(np.int64), exit_idx=exit_.astype(np.int64),
+                    side=np.full(len(pnl), LONG, dtype=np.int8), entry_px=zeros, exit_px=zeros, pct_move=zeros,
+                    pnl=pnl.astype(float), balance=starting_balance + np.cumsum(pnl, dtype=float))
+
+
+def busy_log(length: int, seed: int) -> TradeLog:
+    # A trade every third bar held for two bars, so no window of the rolling figures is flat
+    rng = np.random.default_rng(seed)
+    entry = np.arange(0, length - 2, 3)
+    return trade_log(entry, entry + 2, rng.normal(5.0, 40.0, len(entry)), starting_balance=10_000.0)
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 7, 50, 299, 300, 301])
+def test_rolling_max_matches_pandas(window):
+    x = np.random.default_rng(window).normal(size=300)
+    np.testing.assert_array_equal(rolling_max(x, window), pd.Series(x).rolling(window).max().to_numpy())
+
+
+def test_longest_underwater_by_hand():
+    #                    peak  under under under peak under peak  under
+    equity = np.array([100.0, 110, 105, 104, 103, 111, 108, 112, 90.0])
+    assert longest_underwater(equity) == 3
+    assert longest_underwater(np.array([100.0, 101, 101, 102])) == 0  # level with the peak is not under
+    assert longest_underwater(np.array([100.0, 99, 98, 97])) == 3   # still under at the end
+
+
+def test_exposure_counts_overlaps_once():
+    assert exposure(np.array([1, 2, 8]), np.array([3, 5, 8]), 10) == pytest.approx(0.6)  # bars 1-5 and 8
+    assert exposure(np.empty(0), np.empty(0), 10) == 0.0
+    assert exposure(np.array([0]), np.array([9]), 10) == 1.0
+
+
+def test_performance_metrics_by_hand_and_against_pandas():
+    bar_secs = 3600.0
+    trades = trade_log([0, 2, 4, 6, 8], [1, 3, 5, 7, 9], [100.0, -50.0, 30.0, -20.0, 0.0])
+    m = performance_metrics(trades, 12, 1000.0, bar_secs)
+    assert m["Profit Factor"] == pytest.approx(130.0 / 70.0)
+    assert m["Win Rate %"] == pytest.approx(40.0)
+    assert m["Expectancy"] == pytest.approx(12.0)
+    assert (m["Avg Win"], m["Avg Loss"]) == (pytest.approx(65.0), pytest.approx(-35.0))
+    assert m["Exposure %"] == pytest.approx(10 / 12 * 100)
+    assert m["Total Return %"] == pytest.approx(6.0)
+    # equity 1000 1100 1100 1050 1050 1080 1080 1060 1060 1060 1060 1060: below 1100 from bar 3 on
+    assert m["Max DD Duration (bars)"] == 9
+    assert m["Max DD Duration (days)"] == pytest.approx(9 / 24)
+
+    equity = pd.Series(equity_curve(trades, 12, 1000.0))
+    r = equity.pct_change().dropna()
+    periods = YEAR_SECONDS / bar_secs
+    assert m["Sharpe"] == pytest.approx(r.mean() / r.std(ddof=0) * np.sqrt(periods), rel=1e-12)
+    assert m["Max Drawdown %"] == pytest.approx(((equity / equity.cummax()).min() - 1) * 100, rel=1e-12)
+    downside = np.sqrt((r.clip(upper=0) ** 2).mean())
+    assert m["Sortino"] == pytest.approx(r.mean() / downside * np.sqrt(periods), rel=1e-12)
+
+
+def test_profit_factor_edge_cases():
+    assert performance_metrics(trade_log([0], [1], [10.0]), 3, 1000.0)["Profit Factor"] == float("inf")
+    assert np.isnan(performance_metrics(trade_log([], [], []), 3, 1000.0)["Profit Factor"])
+
+
+def test_rolling_metrics_match_pandas_rolling():
+    length, w, k, bar_secs = 600, 40, 10, 300.0
+    trades = busy_log(length, seed=5)
+    values = rolling_metrics(trades, length, 10_000.0, bar_secs, window_bars=w, window_trades=k)
+    equity = pd.Series(equity_curve(trades, length, 10_000.0))
+    r = equity.pct_change().fillna(0.0)
+    scale = np.sqrt(YEAR_SECONDS / bar_secs)
+
+    def check(name, expected, rtol=1e-7):
+        np.testing.assert_allclose(values[name], np.asarray(expected, dtype=float), rtol=rtol, atol=1e-9,
+                                   equal_nan=True, err_msg=name)
+
+    check("Sharpe", r.rolling(w).mean() / r.rolling(w).std(ddof=0) * scale, rtol=1e-5)
+    check("Sortino", r.rolling(w).mean() / np.sqrt((r.clip(upper=0) ** 2).rolling(w).mean()) * scale, rtol=1e-5)
+    check("Return %", (equity / equity.shift(w - 1) - 1) * 100)
+    window_dd = equity / equity.rolling(w).max() - 1
+    check("Drawdown %", window_dd * 100)
+    check("Max Drawdown %", window_dd.rolling(w).min() * 100)
+    held = np.zeros(length)
+    for a, b in zip(trades.entry_idx, trades.exit_idx):
+        held[a:b + 1] = 1.0
+    check("Exposure %", pd.Series(held).rolling(w).mean() * 100)
+
+    pnl = pd.Series(trades.pnl)
+    check("Win Rate %", (pnl > 0).astype(float).rolling(k).mean() * 100)
+    check("Profit Factor", pnl.clip(lower=0).rolling(k).sum() / -pnl.clip(upper=0).rolling(k).sum())
+    check("Expectancy", pnl.rolling(k).mean())
+
+
+def test_relative_metrics_on_a_known_series():
+    # The run's returns are 0.5x the benchmark's plus a constant: beta 0.5, correlation 1, tracking
+    # error the standard deviation of -0.5x the benchmark's returns
+    rng = np.random.default_rng(11)
+    rb = rng.normal(0.0002, 0.01, 999)
+    rs = 0.5 * rb + 0.0001
+    bench = 100.0 * np.cumprod(np.r_[1.0, 1.0 + rb])
+    equity = 1000.0 * np.cumprod(np.r_[1.0, 1.0 + rs])
+    late = bench.copy()
+    late[:500] = np.nan  # starts half way through the run
+    bar_secs = 3600.0
+    periods = YEAR_SECONDS / bar_secs
+    table = relative_metrics(equity, {"bench": bench, "late": late, "none": np.full(1000, np.nan)}, bar_secs)
+
+    row = table.loc["bench"]
+    assert row["Beta"] == pytest.approx(0.5, rel=1e-9)
+    assert row["Correlation"] == pytest.approx(1.0, rel=1e-9)
+    assert row["Tracking Error %"] == pytest.approx(np.std(0.5 * rb) * np.sqrt(periods) * 100, rel=1e-9)
+    assert row["Benchmark Return %"] == pytest.approx((bench[-1] / bench[0] - 1) * 100, rel=1e-9)
+    assert row["Excess Return %"] == pytest.approx((equity[-1] / equity[0] - bench[-1] / bench[0]) * 100, rel=1e-9)
+
+    # Only the bars where both have a return count, same as pandas on the overlap
+    s, b = pd.Series(equity).pct_change(), pd.Series(late).pct_change()
+    both = s.notna() & b.notna()
+    s, b = s[both], b[both]
+    row = table.loc["late"]
+    assert row["Beta"] == pytest.approx(s.cov(b, ddof=0) / b.var(ddof=0), rel=1e-9)
+    assert row["Correlation"] == pytest.approx(s.corr(b), rel=1e-9)
+    assert row["Tracking Error %"] == pytest.approx((s - b).std(ddof=0) * np.sqrt(periods) * 100, rel=1e-9)
+    assert row["Benchmark Return %"] == pytest.approx((late[-1] / late[500] - 1) * 100, rel=1e-9)
+    assert table.loc["none"].isna().all()
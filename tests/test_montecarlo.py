@@ -0,0 +1,19 @@
+# tests/test_montecarlo.py
+# Monte Carlo over the spawned process pool against the same seed run in this process.
+import numpy as np
+from STRATEGIES import montecarlo
+from STRATEGIES.montecarlo import monte_carlo
+
+
+def test_pool_is_spawned():
+    assert montecarlo._mp.get_start_method() == "spawn"
+
+
+def test_pool_gives_the_same_paths_as_one_process():
+    pnl = np.random.default_rng(4).normal(2.0, 50.0, 2000)
+    local = monte_carlo(pnl, 10_000.0, paths=5000, method="bootstrap", seed=7, max_workers=1)
+    pooled = monte_carlo(pnl, 10_000.0, paths=5000, method="bootstrap", seed=7, max_workers=2)
+    np.testing.assert_array_equal(pooled.final, local.final)
+    np.testing.assert_array_equal(pooled.max_drawdown, local.max_drawdown)
+    for q in local.bands:
+        np.testing.assert_array_equal(pooled.bands[q], local.bands[q])
@@ -0,0 +1,110 @@
+# tests/test_store.py
+# data/store.py: appends, re-appends over stored bars and range loads; the run history's date filter
+# and the equity line of a stored run.
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_walk
+from data import store
+from data.runs import RunStore
+from STRATEGIES.metrics import results_equity, results_starting_balance
+from STRATEGIES.strategy_pt import ConfluenceParams, confluence_based_strategy
+
+SYMBOL, INTERVAL = "ETHUSDT", "1h"
+
+
+@pytest.fixture
+def bars():
+    return random_walk(24 * 5, seed=3, start="2025-07-15", freq="1h")  # five whole days
+
+
+def load(root, start=None, end=None) -> pd.DataFrame:
+    return store.load(SYMBOL, INTERVAL, start, end, root=root)
+
+
+def same_bars(df: pd.DataFrame, expected: pd.DataFrame):
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_index_type=False)
+
+
+def test_append_in_pieces_matches_one_append(bars, tmp_path):
+    assert store.append(SYMBOL, INTERVAL, bars.iloc[:30], root=tmp_path / "a") == 30
+    assert store.append(SYMBOL, INTERVAL, bars.iloc[30:], root=tmp_path / "a") == len(bars) - 30
+    assert store.append(SYMBOL, INTERVAL, bars, root=tmp_path / "b") == len(bars)
+    same_bars(load(tmp_path / "a"), bars)
+    same_bars(load(tmp_path / "b"), bars)
+    assert store.date_range(SYMBOL, INTERVAL, root=tmp_path / "a") == (bars["Date"].iloc[0], bars["Date"].iloc[-1])
+
+
+def test_re_append_replaces_bars_and_adds_only_new_ones(bars, tmp_path):
+    store.append(SYMBOL, INTERVAL, bars.iloc[:60], root=tmp_path)
+    revised = bars.iloc[50:80].copy()
+    revised["Close"] += 1.0  # the same bars fetched again after they closed
+    assert store.append(SYMBOL, INTERVAL, revised, root=tmp_path) == 20
+    assert store.append(SYMBOL, INTERVAL, bars.iloc[10:20], root=tmp_path) == 0
+
+    expected = pd.concat([bars.iloc[:50], revised])
+    expected.loc[expected.index[10:20], "Close"] = bars["Close"].iloc[10:20].to_numpy()
+    df = load(tmp_path)
+    assert df["Date"].is_unique and df["Date"].is_monotonic_increasing
+    same_bars(df, expected)
+
+
+def test_bytes_past_the_committed_rows_are_ignored_and_overwritten(bars, tmp_path):
+    store.append(SYMBOL, INTERVAL, bars.iloc[:5], root=tmp_path)
+    day_dir = tmp_path / SYMBOL / INTERVAL / "2025-07-15"
+    with open(day_dir / "Close.bin", "ab") as f:  # a crash after writing a column but before "rows"
+        f.write(np.array([1e9, 1e9]).tobytes())
+    same_bars(load(tmp_path), bars.iloc[:5])
+    store.append(SYMBOL, INTERVAL, bars.iloc[5:10], root=tmp_path)
+    same_bars(load(tmp_path), bars.iloc[:10])
+
+
+@pytest.mark.parametrize("start, end, first, last", [
+    ("2025-07-16", "2025-07-17", "2025-07-16 00:00", "2025-07-17 23:00"),  # a date-only end is the whole day
+    ("2025-07-16 05:00", "2025-07-16 09:00", "2025-07-16 05:00", "2025-07-16 09:00"),  # times are inclusive
+    ("2025-07-16 05:30", "2025-07-16 08:59", "2025-07-16 06:00", "2025-07-16 08:00"),
+    (None, "2025-07-15", "2025-07-15 00:00", "2025-07-15 23:00"),
+    ("2025-07-19", None, "2025-07-19 00:00", "2025-07-19 23:00"),
+    (pd.Timestamp("2025-07-17"), pd.Timestamp("2025-07-17"), "2025-07-17 00:00", "2025-07-17 00:00"),
+])
+def test_range_load(bars, tmp_path, start, end, first, last):
+    store.append(SYMBOL, INTERVAL, bars, root=tmp_path)
+    df = load(tmp_path, start, end)
+    expected = bars[(bars["Date"] >= pd.Timestamp(first)) & (bars["Date"] <= pd.Timestamp(last))]
+    assert len(expected)
+    same_bars(df, expected)
+
+
+def test_range_outside_the_store_is_empty(bars, tmp_path):
+    store.append(SYMBOL, INTERVAL, bars, root=tmp_path)
+    df = load(tmp_path, "2026-01-01", "2026-01-31")
+    assert df.empty and list(df.columns) == list(store.COLUMNS)
+    assert load(tmp_path / "missing").empty
+
+
+def test_fingerprint_changes_with_the_range_and_the_data(bars, tmp_path):
+    store.append(SYMBOL, INTERVAL, bars.iloc[:30], root=tmp_path)
+    first = load(tmp_path).attrs["fingerprint"]
+    assert load(tmp_path).attrs["fingerprint"] == first
+    assert load(tmp_path, end="2025-07-15").attrs["fingerprint"] != first
+    store.append(SYMBOL, INTERVAL, bars.iloc[30:40], root=tmp_path)
+    assert load(tmp_path).attrs["fingerprint"] != first
+
+
+def test_run_history_date_only_end_takes_in_that_day(tmp_path):
+    runs = RunStore(tmp_path)
+    results = pd.DataFrame({"Date": pd.to_datetime(["2025-07-17 12:00", "2025-07-18 03:00"]), "Balance": [1.0, 2.0]})
+    runs.save(results, "simple", "walk")
+    assert len(runs.list(end="2025-07-17")) == 1
+    assert len(runs.list(end="2025-07-16")) == 0
+
+
+def test_stored_run_draws_the_same_equity_line(tmp_path):
+    # What the Run History overlay plots, from the run as stored and as it came out of the strategy
+    results = confluence_based_strategy(random_walk(20000, seed=1))  # has trades closing out of row order
+    run_id = RunStore(tmp_path).save(results, "confluence", "walk")
+    loaded = RunStore(tmp_path).load(run_id)
+    for got, expected in zip(results_equity(loaded), results_equity(results)):
+        np.testing.assert_array_equal(got, expected)
+    assert results_starting_balance(loaded) == pytest.approx(ConfluenceParams().starting_balance, rel=1e-12)
@@ -0,0 +1,84 @@
+# tests/test_strats_worker.py
+# The persistent strats.py worker: backtests over the pipe, their progress events and cancellation.
+import multiprocessing as mp
+import threading
+import time
+import pytest
+import strats
+from conftest import assert_same_results, random_walk
+from actions.strategy_worker import StrategyWorker
+from STRATEGIES.progress import BacktestCancelled
+from STRATEGIES.reporting import ListReporter
+from STRATEGIES.strategy_pt import confluence_based_strategy
+
+
+@pytest.fixture
+def worker():
+    worker = StrategyWorker()
+    yield worker
+    worker.shutdown()
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    data = random_walk(20000, seed=1)
+    path = tmp_path / "walk.csv"
+    data.to_csv(path, index=False)
+    return path
+
+
+def test_backtest_job_streams_its_log_and_returns_the_results(worker, csv_path, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # the worker's CSV cache goes under .cache here
+    events = []
+    out = worker.request({"op": "backtest", "csv_path": str(csv_path), "strategy": "confluence", "params": {}},
+                         on_event=events.append)
+    assert "error" not in out, out.get("error")
+
+    reporter = ListReporter()
+    expected = confluence_based_strategy(random_walk(20000, seed=1), reporter=reporter)
+    assert_same_results(out["results"], expected)
+    assert out["metrics"] == expected.attrs["metrics"]
+    assert [line for event in events for line in event["log"]] == reporter.log_lines
+    assert events[-1]["progress"] == (20000, 20000, len(expected))
+
+
+def test_cancelled_backtest_leaves_the_worker_usable(worker, csv_path, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+
+    def cancel(event):
+        raise BacktestCancelled()
+
+    out = worker.request({"op": "backtest", "csv_path": str(csv_path), "strategy": "confluence"}, on_event=cancel)
+    assert out == {"cancelled": True}
+    assert worker.request({"op": "load", "csv_path": str(csv_path)}) == {"row_count": 20000}
+
+
+def test_slow_job_sends_heartbeats(monkeypatch):
+    # serve() on a thread over an in-process pipe, with a dataset load that takes a while
+    monkeypatch.setattr(strats, "HEARTBEAT_INTERVAL", 0.02)
+    monkeypatch.setattr(strats, "job_dataset", lambda job: time.sleep(0.2) or random_walk(10))
+    app_end, worker_end = mp.Pipe()
+    thread = threading.Thread(target=strats.serve, args=(worker_end,), daemon=True)
+    thread.start()
+    app_end.send({"op": "load", "csv_path": "big.csv"})
+    messages = []
+    while not messages or "event" in messages[-1]:
+        messages.append(app_end.recv())
+    app_end.send({"op": "shutdown"})
+    thread.join(timeout=2)
+    assert messages[-1] == {"row_count": 10}
+    assert sum(m.get("event") == "heartbeat" for m in messages) >= 3
+
+
+@pytest.mark.parametrize("profile", [False, True])
+def test_backtest_times_its_load_and_strategy(csv_path, monkeypatch, tmp_path, profile):
+    monkeypatch.chdir(tmp_path)
+    out = strats.backtest({"op": "backtest", "csv_path": str(csv_path), "strategy": "confluence", "profile": profile})
+    assert set(out["timings"]) == {"load", "strategy"}
+    assert all(seconds > 0 for seconds in out["timings"].values())
+    if profile:
+        assert set(out["profiles"]) == {"load", "strategy"}
+        assert "confluence_based_strategy" in out["profiles"]["strategy"]
+        assert "read_csv" in out["profiles"]["load"]
+    else:
+        assert out["profiles"] == {}
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the hot paths: the two strategies, CSV loading, ensure_time_col and the chart
+preparation in generate_chart, on synthetic OHLCV of 10k to 10M bars.
+
+DearPyGui is replaced by a do-nothing module before anything from the app is imported, so the
+numbers are the Python/NumPy side only and no window or GPU context is needed. Every benchmark
+starts with an empty indicator cache. Time is the best of --repeat runs; peak memory comes from
+one extra run under tracemalloc (which is slow, so it is not timed).
+
+    python tools/benchmark.py --sizes 10k 100k --save-baseline tools/benchmark_baseline.json
+    python tools/benchmark.py --sizes 10k 100k --baseline tools/benchmark_baseline.json
+
+With --baseline the run is compared against the saved one, and the exit code is 1 when any
+benchmark got slower by more than --threshold (default 1.25x).
+
+tools/benchmark_baseline.json is a reference run (10k to 1M bars) with the machine and library
+versions it came from. Timings only compare on the same hardware, so CI should not gate on it
+directly: it saves a baseline from the target branch on the runner, then checks the change
+against that one in the same job:
+
+    git checkout origin/main && python tools/benchmark.py --sizes 10k 100k --save-baseline /tmp/base.json
+    git checkout - && python tools/benchmark.py --sizes 10k 100k --baseline /tmp/base.json
+"""
+
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+PLOT_WIDTH = 1600  # pixels the stubbed plot reports, drives the chart's level of detail
+REVERSION_BARS = 2000  # half-life of the synthetic price's pull back to its starting level
+
+
+def _stub_dearpygui():
+    # Every dpg call is a no-op; the few whose return value the app uses get a plausible one
+    values = {"weight_slider": 0.5}
+    dpg = types.ModuleType("dearpygui.dearpygui")
+    dpg.mvTimeUnit_Min = 0
+    dpg.get_value = lambda tag, *a, **k: values.get(tag)
+    dpg.does_item_exist = lambda *a, **k: False
+    dpg.is_item_shown = lambda *a, **k: False
+    dpg.get_item_rect_size = lambda *a, **k: [PLOT_WIDTH, 600]
+    dpg.get_viewport_width = lambda *a, **k: PLOT_WIDTH
+    dpg.__getattr__ = lambda name: (lambda *a, **k: contextlib.nullcontext())
+    package = types.ModuleType("dearpygui")
+    package.dearpygui = dpg
+    sys.modules["dearpygui"] = package
+    sys.modules["dearpygui.dearpygui"] = dpg
+
+
+def synthetic_ohlcv(n: int, seed: int = 0) -> pd.DataFrame:
+    # 5m bars, a random walk with drifting regimes so price strays far enough from the EMA for
+    # the confluence strategy to find setups. The log price is pulled back towards 2000 (the walk
+    # minus its own slow average), so it stays in the same few-x range at every size instead of
+    # running off to 0 or 1e68 over millions of bars
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.0005, n // 500 + 1), 500)[:n]
+    walk = np.cumsum(drift + rng.normal(0, 0.004, n))
+    close = 2000 * np.exp(walk - pd.Series(walk).ewm(halflife=REVERSION_BARS).mean().to_numpy())
+    open_ = np.r_[close[:1], close[:-1]] * (1 + rng.normal(0, 0.001, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    dates = np.datetime64("2020-01-01", "ns") + np.arange(n, dtype=np.int64) * np.timedelta64(5, "m")
+    df = pd.DataFrame({"Date": dates, "Open": open_.round(2), "High": high.round(2), "Low": low.round(2),
+                       "Close": close.round(2), "Volume": np.abs(rng.normal(1000, 300, n)).round(4)})
+    prices = df[["Open", "High", "Low", "Close"]].to_numpy()
+    assert np.isfinite(prices).all() and (prices > 0).all(), "synthetic prices left the positive finite range"
+    return df
+
+
+def _measure(fn, setup, repeat: int) -> dict:
+    # setup() -> args for fn, outside the timed region
+    best = float("inf")
+    for _ in range(repeat):
+        args = setup()
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    args = setup()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2**20}
+
+
+def run(sizes, repeat: int, workdir: Path) -> list:
+    from state import AppState
+    from actions import dataflow
+    from data.cache import tag_dataset
+    from ui.charts import ensure_time_col, generate_chart
+    from STRATEGIES.indicator_cache import get_indicator_cache
+    from STRATEGIES.strategy_pt import confluence_based_strategy, simple_strategy
+
+    class _NoWorker:
+        def preload(self, source):
+            pass
+
+    dataflow.get_worker = lambda: _NoWorker()  # on_load_csv would otherwise start the strategy process
+    cache = get_indicator_cache()
+
+    def loaded_state(df):
+        cache.clear()
+        state = AppState()
+        state.csv_data = df
+        return (state,)
+
+    def strategy_args(df):
+        cache.clear()
+        return df, None  # no reporter: the log lines are still built, just not kept
+
+    results = []
+    for label in sizes:
+        n = SIZES[label]
+        df = tag_dataset(synthetic_ohlcv(n), f"bench-{n}")
+        csv_path = workdir / f"bench_{label}.csv"
+        df.to_csv(csv_path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        text_dates = pd.read_csv(csv_path)
+
+        def fresh_load():
+            cache.clear()
+            shutil.rmtree(workdir / ".cache", ignore_errors=True)
+            return AppState(), None, {"file_path_name": str(csv_path)}
+
+        def warm_load():
+            cache.clear()
+            return AppState(), None, {"file_path_name": str(csv_path)}
+
+        benches = [
+            ("simple_strategy", simple_strategy, lambda: strategy_args(df)),
+            ("confluence_based_strategy", confluence_based_strategy, lambda: strategy_args(df)),
+            ("pd.read_csv", pd.read_csv, lambda: (csv_path,)),
+            ("on_load_csv (cold cache)", dataflow.on_load_csv, fresh_load),
+            ("on_load_csv (warm cache)", dataflow.on_load_csv, warm_load),
+            ("ensure_time_col (text dates)", ensure_time_col, lambda: (text_dates,)),
+            ("generate_chart", generate_chart, lambda: loaded_state(df)),
+        ]
+        for name, fn, setup in benches:
+            if name == "on_load_csv (warm cache)":
+                dataflow.on_load_csv(*fresh_load())  # build the binary copy once
+            r = _measure(fn, setup, repeat)
+            r.update(name=name, size=label, rows=n, bars_per_sec=n / r["seconds"] if r["seconds"] else float("inf"))
+            results.append(r)
+            print(f"{label:>5} {name:<30} {r['seconds'] * 1000:10.1f} ms {r['bars_per_sec'] / 1e6:9.2f} M bars/s"
+                  f" {r['peak_mb']:9.1f} MB peak", flush=True)
+        csv_path.unlink()
+    return results
+
+
+def compare(results: list, baseline: dict, threshold: float) -> bool:
+    # Prints the ratio to the baseline per benchmark, returns True if nothing regressed
+    old = {(r["name"], r["size"]): r for r in baseline["results"]}
+    ok = True
+    print(f"\nCompared with {baseline.get('created', 'baseline')} (slower than {threshold:.2f}x is a regression)")
+    for r in results:
+        b = old.get((r["name"], r["size"]))
+        if b is None:
+            continue
+        ratio = r["seconds"] / b["seconds"] if b["seconds"] else float("inf")
+        mem = r["peak_mb"] / b["peak_mb"] if b["peak_mb"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+        ok &= ratio <= threshold
+        print(f"{r['size']:>5} {r['name']:<30} time {ratio:6.2f}x  memory {mem:6.2f}x  {flag}")
+    return ok
+
+
+def main():
+    p = ArgumentParser()
+    p.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES), help="Rows of synthetic data.")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark, the best one counts.")
+    p.add_argument("--baseline", type=Path, help="Compare with results saved by --save-baseline.")
+    p.add_argument("--threshold", type=float, default=1.25, help="Slowdown against the baseline that fails the run.")
+    p.add_argument("--save-baseline", type=Path, help="Write this run's results as JSON.")
+    args = p.parse_args()
+
+    _stub_dearpygui()
+    sys.path.insert(0, str(ROOT))
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # the CSV cache and log files land in the temp dir
+        try:
+            results = run(args.sizes, max(1, args.repeat), Path(tmp))
+        finally:
+            os.chdir(cwd)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.platform(), "results": results}, indent=2))
+        print(f"\nBaseline saved to {args.save_baseline}")
+    if args.baseline:
+        if not compare(results, json.loads(args.baseline.read_text()), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stand-in for Binance's /api/v3/klines, for trying fetch_eth_csv.py without the network.
+
+Candles are generated from their open time alone, so every request for the same bar returns
+the same numbers. --fail-rate makes a share of requests fail (500 or 429 with Retry-After)
+and --gap drops a range of bars, to exercise retries and gap filling:
+
+    python tools/klines_server.py --port 8900 --fail-rate 0.2 &
+    python fetch_eth_csv.py --base-url http://127.0.0.1:8900 --days 30 --interval 5m --incremental --skip-sp500
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+UNITS_MS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+MAX_LIMIT = 1000
+
+
+def candle(open_ms: int, step_ms: int) -> list:
+    # Smooth deterministic price path plus per-bar noise seeded by the open time
+    rng = random.Random(open_ms)
+    hours = open_ms / 3_600_000
+    base = 3000 + 400 * math.sin(hours / 200) + 60 * math.sin(hours / 7)
+    o = base + rng.uniform(-5, 5)
+    c = base + rng.uniform(-5, 5)
+    h = max(o, c) + rng.uniform(0, 8)
+    l = min(o, c) - rng.uniform(0, 8)
+    v = rng.uniform(100, 5000)
+    return [open_ms, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.4f}",
+            open_ms + step_ms - 1, f"{v * c:.4f}", rng.randint(100, 9000), f"{v / 2:.4f}", f"{v * c / 2:.4f}", "0"]
+
+
+class KlinesHandler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    gap = None          # (start_ms, end_ms) with no bars
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def _reply(self, status: int, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/api/v3/klines":
+            return self._reply(404, {"code": -1, "msg": "Not found"})
+        with self.lock:
+            KlinesHandler.requests_seen += 1
+        if random.random() < self.fail_rate:
+            if random.random() < 0.5:
+                return self._reply(429, {"code": -1003, "msg": "Too many requests"}, {"Retry-After": "0.2"})
+            return self._reply(500, {"code": -1000, "msg": "Internal error"})
+
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            interval = q["interval"]
+            step = int(interval[:-1]) * UNITS_MS[interval[-1]]  # case-sensitive: "1M" (month) is rejected
+            limit = min(int(q.get("limit", 500)), MAX_LIMIT)
+            now = int(time.time() * 1000)
+            end = min(int(q.get("endTime", now)), now)
+            start = int(q.get("startTime", end - limit * step))
+        except (KeyError, ValueError):
+            return self._reply(400, {"code": -1100, "msg": "Illegal parameters"})
+
+        first = -(-start // step) * step  # first bar opening at or after startTime
+        rows = []
+        t = first
+        while t <= end and len(rows) < limit:
+            if not (self.gap and self.gap[0] <= t < self.gap[1]):
+                rows.append(candle(t, step))
+            t += step
+        self._reply(200, rows)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    p = ArgumentParser()
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 500/429.")
+    p.add_argument("--gap", nargs=2, type=int, metavar=("START_MS", "END_MS"), help="Serve no bars in this range.")
+    args = p.parse_args()
+
+    KlinesHandler.fail_rate = args.fail_rate
+    KlinesHandler.gap = tuple(args.gap) if args.gap else None
+    server = ThreadingHTTPServer((args.host, args.port), KlinesHandler)
+    print(f"Serving klines on http://{args.host}:{args.port}/api/v3/klines")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
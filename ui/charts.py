@@ -1,57 +1,107 @@
 # ui/charts.py
 import time
+import numpy as np
 import pandas as pd
 import dearpygui.dearpygui as dpg
 from typing import Optional
 from state import AppState
 from ui.statusbar import add_text_status
 from actions.dataflow import set_ema_values
+from ui.lod import aggregate, covers, plan_view
+from STRATEGIES.indicators import EMA
+from STRATEGIES.indicator_cache import indicator_series
 
 def ensure_time_col(df: pd.DataFrame) -> pd.DataFrame:
+    # Already parsed (e.g. loaded through data.cache) and complete: nothing to do
+    if pd.api.types.is_datetime64_any_dtype(df["Date"]) and not df["Date"].isna().any():
+        return df
     df = df.copy()
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
     df = df.dropna(subset=["Date"])
     return df
 
+def chart_arrays(state: AppState) -> dict:
+    # Full-resolution float64 arrays for the chart, sorted by time (x in epoch seconds)
+    df = ensure_time_col(state.csv_data)
+    arrays = {
+        "x": (df["Date"].to_numpy(dtype="datetime64[ns]").view("int64") // 10**9).astype(float),
+        "o": df["Open"].to_numpy(dtype=float),
+        "h": df["High"].to_numpy(dtype=float),
+        "l": df["Low"].to_numpy(dtype=float),
+        "c": df["Close"].to_numpy(dtype=float),
+        "v": df["Volume"].to_numpy(dtype=float),
+    }
+    if len(state.csv_data) > state.ema_period + 3:
+        # Same cached column the strategies use, only computed if nobody has asked for it yet
+        ema = indicator_series(state.csv_data, EMA(state.ema_period)).to_numpy(dtype=float, copy=True)
+        ema[:state.ema_period - 1] = np.nan  # We need to faze out the first part of the array
+        # rows ensure_time_col dropped are dropped from the EMA too
+        arrays["ema"] = ema[state.csv_data.index.get_indexer(df.index)] if len(df) != len(ema) else ema
+    if len(arrays["x"]) > 1 and not np.all(arrays["x"][1:] >= arrays["x"][:-1]):
+        order = np.argsort(arrays["x"], kind="stable")
+        arrays = {k: v[order] for k, v in arrays.items()}
+    return arrays
+
+def plot_pixels() -> int:
+    width = dpg.get_item_rect_size("plot")[0]
+    return int(width) if width else int(dpg.get_viewport_width())
+
+def upload_chart_view(state: AppState, lo: int, hi: int, bucket: int):
+    arrays = state.chart_arrays
+    view = aggregate(arrays, lo, hi, bucket)
+    dpg.set_value("candles", [view["x"], view["o"], view["c"], view["l"], view["h"]])
+    dpg.set_value("volume_stem", [view["x"], view["v"]])
+    if "ema" in view and dpg.does_item_exist("EMA_line_series"):
+        dpg.set_value("EMA_line_series", [view["x"], view["ema"]])
+    state.chart_view = {"lo": lo, "hi": hi, "bucket": bucket, "data": view}
+
+def refresh_chart_lod(state: AppState):
+    # Called every frame from the event loop: re-plan the uploaded candles when the
+    # visible x range leaves the uploaded slice or needs a different aggregation level
+    if state.chart_arrays is None or state.chart_view is None or not dpg.does_item_exist("candles"):
+        return
+    x = state.chart_arrays["x"]
+    if len(x) == 0:
+        return
+    x_min, x_max = dpg.get_axis_limits("x_axis")
+    if x_max <= x_min:
+        return
+    lo, hi, bucket = plan_view(x, x_min, x_max, plot_pixels())
+    view = state.chart_view
+    if bucket == view["bucket"] and covers(view, x_min, x_max, x):
+        return
+    upload_chart_view(state, lo, hi, bucket)
+
 def generate_chart(state: AppState):
     if state.csv_data is None:
         return
-    df = ensure_time_col(state.csv_data)
-
-    o = df["Open"].tolist()
-    h = df["High"].tolist()
-    l = df["Low"].tolist()
-    c = df["Close"].tolist()
-    x = (df["Date"].astype("int64") // 10**9).tolist()
-    v = df["Volume"].tolist()
+    arrays = chart_arrays(state)
+    state.chart_arrays = arrays
 
-    for tag in ("candles", "volume_stem"):
+    for tag in ("candles", "volume_stem", "EMA_line_series"):
         if dpg.does_item_exist(tag):
             dpg.delete_item(tag)
 
     dpg.show_item("chart")
 
-    dpg.add_candle_series(x, o, c, l, h,
+    # Start from the whole range at the detail level the plot width allows
+    lo, hi, bucket = plan_view(arrays["x"], -np.inf, np.inf, plot_pixels())
+    view = aggregate(arrays, lo, hi, bucket)
+
+    dpg.add_candle_series(view["x"], view["o"], view["c"], view["l"], view["h"],
         parent="y_axis",
         tag="candles",
-        weight=0.5,
+        weight=float(dpg.get_value("weight_slider")),
         time_unit=dpg.mvTimeUnit_Min,
         tooltip=False
     )
     
-    # ADD LINE SERIES HERE WITH THE EMA
-
-    chart_line_series_x = x[199:]
-
-    chart_line_series_y = state.ema_data_values.iloc[199:].tolist()
-     # We need to faze out the first part of the array
+    # EMA line series
+    if "ema" in view:
+        dpg.add_line_series(view["x"], view["ema"], parent = "y_axis", label = "EMA", tag = "EMA_line_series", skip_nan=True)
 
-    dpg.add_line_series(chart_line_series_x, chart_line_series_y, parent = "y_axis", label = "EMA", tag = "EMA_line_series", skip_nan=True)
-
-
-
-
-    dpg.add_stem_series(x, v, parent="y_axis_volume", tag="volume_stem")
+    dpg.add_stem_series(view["x"], view["v"], parent="y_axis_volume", tag="volume_stem")
+    state.chart_view = {"lo": lo, "hi": hi, "bucket": bucket, "data": view}
 
     if not dpg.does_item_exist("candle_tip"):
         with dpg.tooltip("candles", tag="candle_tip"):
@@ -63,37 +113,74 @@ def generate_chart(state: AppState):
 
     dpg.fit_axis_data("x_axis"); dpg.fit_axis_data("y_axis")
 
+def build_tooltip_cache(df: pd.DataFrame) -> dict:
+    # Candle arrays sorted by time, so the hovered candle can be found with a binary search
+    df = ensure_time_col(df)
+    x = df["Date"].to_numpy(dtype="datetime64[ns]").view("int64") // 10**9
+    order = None if np.all(x[1:] >= x[:-1]) else np.argsort(x, kind="stable")
+    cached = {"x": x, "o": df["Open"].to_numpy(), "h": df["High"].to_numpy(),
+              "l": df["Low"].to_numpy(), "c": df["Close"].to_numpy()}
+    if order is not None:
+        cached = {k: v[order] for k, v in cached.items()}
+    return cached
+
+def nearest_index(x: np.ndarray, pos: float) -> int:
+    # Index of the value in sorted x closest to pos (earliest one on a tie), O(log n)
+    i = int(np.searchsorted(x, pos))
+    if i == 0:
+        return 0
+    if i == len(x) or abs(x[i - 1] - pos) <= abs(x[i] - pos):
+        # first of any candles sharing that timestamp
+        return int(np.searchsorted(x, x[i - 1]))
+    return i
+
 def tooltip_loop(state: AppState):
 
     cached = None
+    cached_source = None  # the state.csv_data frame the cache was built from
     while dpg.is_dearpygui_running():
         if dpg.does_item_exist("candles") and dpg.is_item_shown("candles") and state.csv_data is not None:
-            if cached is None:
-                df = ensure_time_col(state.csv_data)
-                cached = {
-                    "x": (df["Date"].astype("int64") // 10**9).tolist(),
-                    "o": df["Open"].tolist(),
-                    "h": df["High"].tolist(),
-                    "l": df["Low"].tolist(),
-                    "c": df["Close"].tolist(),
-                    "dates": df["Date"].dt.strftime("%d %b %H:%M").tolist()
-                }
+            if cached is None or state.csv_data is not cached_source:
+                cached_source = state.csv_data
+                cached = build_tooltip_cache(cached_source)
             if dpg.is_item_hovered("plot"):
                 x_pos, _ = dpg.get_plot_mouse_pos()
-                if cached["x"]:
-                    idx = min(range(len(cached["x"])), key=lambda i: abs(cached["x"][i] - x_pos))
-                    dpg.set_value("tip_date",  f"Date:  {cached['dates'][idx]}")
-                    dpg.set_value("tip_open",  f"Open:  {cached['o'][idx]}")
-                    dpg.set_value("tip_high",  f"High:  {cached['h'][idx]}")
-                    dpg.set_value("tip_low",   f"Low:   {cached['l'][idx]}")
-                    dpg.set_value("tip_close", f"Close: {cached['c'][idx]}")
+                # when zoomed out, describe the aggregated candle that is actually drawn
+                view = state.chart_view
+                shown = view["data"] if view is not None and view["bucket"] > 1 else cached
+                if len(shown["x"]):
+                    idx = nearest_index(shown["x"], x_pos)
+                    date = pd.Timestamp(int(shown["x"][idx]), unit="s").strftime("%d %b %H:%M")
+                    dpg.set_value("tip_date",  f"Date:  {date}")
+                    dpg.set_value("tip_open",  f"Open:  {shown['o'][idx]}")
+                    dpg.set_value("tip_high",  f"High:  {shown['h'][idx]}")
+                    dpg.set_value("tip_low",   f"Low:   {shown['l'][idx]}")
+                    dpg.set_value("tip_close", f"Close: {shown['c'][idx]}")
                 time.sleep(0.05)
             else:
                 time.sleep(0.2)
         else:
             cached = None
+            cached_source = None
             time.sleep(1)
 
+def change_interval_cb(state: AppState, sender, app_data):
+    # Swap the chart (and what the strategies run on) to another interval built from the base series
+    if state.intervals is None:
+        add_text_status(state, "Load a CSV first.")
+        return
+    try:
+        state.csv_data = state.intervals.get(app_data)
+    except ValueError as e:
+        add_text_status(state, f"{e}")
+        dpg.set_value("chart_interval_combo", state.chart_interval)
+        return
+    state.chart_interval = app_data
+    set_ema_values(state, state.csv_data)
+    add_text_status(state, f"Interval: {app_data} ({len(state.csv_data)} bars)")
+    if dpg.is_item_shown("chart"):
+        generate_chart(state)
+
 def weight_slider_cb(sender, app_data):
     if dpg.does_item_exist("candles"):
         dpg.configure_item("candles", weight=float(app_data))
@@ -154,8 +241,7 @@ def settings_window(state, sender, app_data):
         add_text_status(state, f"EMA period set to {ema_period}")
         # Configure the EMA df to reflect the new period
         set_ema_values(state, state.csv_data)
-        dpg.delete_item("EMA_line_series") # Remove old line
-        generate_chart(state)
+        generate_chart(state) # Removes and redraws the old line
         dpg.hide_item("chart_settings")
     else:
         dpg.configure_item("ema_period_input", default_value = state.ema_period) # might not work, read docs
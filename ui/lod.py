@@ -0,0 +1,60 @@
+# ui/lod.py
+# Level of detail for the candle chart: only the visible slice is uploaded, and when more than
+# MAX_CANDLES_PER_PIXEL candles would share a pixel they are re-aggregated into wider candles.
+from typing import Dict, Tuple
+import numpy as np
+
+MAX_CANDLES_PER_PIXEL = 2
+MIN_PIXELS = 200     # used before the plot has been laid out
+SLICE_MARGIN = 0.5   # extra width (as a fraction of the visible range) uploaded each side, so small pans don't re-upload
+
+
+def bucket_size(visible: int, pixels: int) -> int:
+    # Power of two, so zooming only re-aggregates when the level actually changes
+    budget = max(pixels, MIN_PIXELS) * MAX_CANDLES_PER_PIXEL
+    bucket = 1
+    while visible > budget * bucket:
+        bucket *= 2
+    return bucket
+
+
+def plan_view(x: np.ndarray, x_min: float, x_max: float, pixels: int) -> Tuple[int, int, int]:
+    # (lo, hi, bucket): rows [lo, hi) to upload, aggregated bucket candles at a time
+    n = len(x)
+    lo = int(np.searchsorted(x, x_min, side="left"))
+    hi = int(np.searchsorted(x, x_max, side="right"))
+    bucket = bucket_size(max(hi - lo, 1), pixels)
+    margin = int((hi - lo) * SLICE_MARGIN) + 1
+    lo = max(lo - margin, 0)
+    hi = min(hi + margin, n)
+    # buckets are aligned to the start of the data so candles don't shift while panning
+    lo -= lo % bucket
+    return lo, hi, bucket
+
+
+def covers(view: Dict, x_min: float, x_max: float, x: np.ndarray) -> bool:
+    # True if the uploaded slice still contains the whole visible range
+    lo, hi = view["lo"], view["hi"]
+    left_ok = lo == 0 or x[lo] <= x_min
+    right_ok = hi == len(x) or x[hi - 1] >= x_max
+    return left_ok and right_ok
+
+
+def aggregate(arrays: Dict[str, np.ndarray], lo: int, hi: int, bucket: int) -> Dict[str, np.ndarray]:
+    # OHLCV of rows [lo, hi) merged bucket rows at a time:
+    # first open, highest high, lowest low, last close, summed volume, last EMA value
+    if bucket == 1:
+        return {k: v[lo:hi] for k, v in arrays.items()}
+    starts = np.arange(lo, hi, bucket)
+    ends = np.minimum(starts + bucket, hi) - 1
+    out = {
+        "x": arrays["x"][starts],
+        "o": arrays["o"][starts],
+        "h": np.maximum.reduceat(arrays["h"][lo:hi], starts - lo),
+        "l": np.minimum.reduceat(arrays["l"][lo:hi], starts - lo),
+        "c": arrays["c"][ends],
+        "v": np.add.reduceat(arrays["v"][lo:hi], starts - lo),
+    }
+    if "ema" in arrays:
+        out["ema"] = arrays["ema"][ends]
+    return out
@@ -0,0 +1,73 @@
+# ui/logbuffer.py
+# In-memory ring buffer for status logs. Appending is cheap and thread safe,
+# the UI reads a snapshot at most once per frame (see ui/statusbar.py).
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+
+class LogBuffer:
+    def __init__(self, cap: int = 5000, spill_path: Optional[Path] = None):
+        self._lines = deque(maxlen=cap)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._total = 0          # lines appended since the last clear, including the ones pushed out of the buffer
+        self._spill = None
+        self.spill_path: Optional[Path] = None
+        if spill_path is not None:
+            self.set_spill(spill_path)
+
+    @property
+    def cap(self) -> int:
+        return self._lines.maxlen
+
+    def set_cap(self, cap: int):
+        with self._lock:
+            self._lines = deque(self._lines, maxlen=max(1, int(cap)))
+            self._dirty = True
+
+    def set_spill(self, path: Optional[Path]):
+        # Full, uncapped copy of the log written to path (None to stop spilling)
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            self.spill_path = Path(path) if path is not None else None
+            if self.spill_path is not None:
+                self._spill = open(self.spill_path, "a", encoding="utf-8")
+
+    def append(self, text: str):
+        with self._lock:
+            self._lines.append(text)
+            self._total += 1
+            self._dirty = True
+            if self._spill is not None:
+                self._spill.write(text + "\n")
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+            self._total = 0
+            self._dirty = True
+
+    def take_dirty(self) -> bool:
+        # True (once) if lines were added or cleared since the last call
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+            if dirty and self._spill is not None:
+                self._spill.flush()
+            return dirty
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            return list(self._lines)
+
+    def dropped(self) -> int:
+        # lines that fell out of the buffer
+        with self._lock:
+            return self._total - len(self._lines)
+
+    def text(self) -> str:
+        with self._lock:
+            return "\n".join(self._lines)
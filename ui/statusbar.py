@@ -1,13 +1,25 @@
 # ui/statusbar.py
 import dearpygui.dearpygui as dpg
 from state import AppState
+from STRATEGIES.reporting import Reporter
 
 def add_text_status(state: AppState, text: str):
-    if dpg.is_item_shown("status_bar"):
-        dpg.add_text(text, parent="status_child")
-        if dpg.get_value("auto_scroll_value"):
-            max_scroll = dpg.get_y_scroll_max("status_child") + 20
-            dpg.set_y_scroll("status_child", max_scroll)
+    # Only queued here (safe from any thread, the backtest workers report through it too),
+    # flush_status puts it on screen once per frame
+    state.status_queue.append(text)
+
+def flush_status(state: AppState):
+    # Called once per frame from the event loop
+    if not state.status_queue:
+        return
+    shown = dpg.is_item_shown("status_bar")
+    while state.status_queue:
+        text = state.status_queue.popleft()
+        if shown:
+            dpg.add_text(text, parent="status_child")
+    if shown and dpg.get_value("auto_scroll_value"):
+        max_scroll = dpg.get_y_scroll_max("status_child") + 20
+        dpg.set_y_scroll("status_child", max_scroll)
 
 def configure_status_bar_cb(state: AppState):
     if not dpg.is_item_shown("status_bar"):
@@ -21,16 +33,56 @@ def configure_status_bar_cb(state: AppState):
                        height=state.status_height)
 
 def add_text_status_backtest(state: AppState, text: str):
-    if dpg.is_item_shown("backtest_status"):
-        dpg.add_text(text, parent="backtest_status")
+    # Only buffered here (safe from any thread), flush_backtest_log puts it on screen once per frame
+    state.backtest_log.append(text)
+
+
+class UIReporter(Reporter):
+    # What the strategies report goes to the status bar (status) and the backtest log (log)
+    def __init__(self, state: AppState):
+        self.state = state
+
+    def status(self, text: str):
+        add_text_status(self.state, text)
+
+    def log(self, text: str):
+        add_text_status_backtest(self.state, text)
+
+
+# Frames left to keep the backtest log pinned to the bottom.
+# The scroll max only catches up with new text a frame after it is set, so scroll on two frames.
+_backtest_scroll_frames = 0
+
+def flush_backtest_log(state: AppState):
+    # Called once per frame from the event loop: the whole buffer is one text item,
+    # which ImGui clips to the visible lines, instead of one item per message
+    global _backtest_scroll_frames
+    if state.backtest_log.take_dirty():
+        dropped = state.backtest_log.dropped()
+        text = state.backtest_log.text()
+        if dropped:
+            text = f"... {dropped} earlier lines not shown ...\n" + text
+        dpg.set_value("backtest_log_text", text)
         if dpg.get_value("auto_scroll_value_backtest"):
-            max_scroll = dpg.get_y_scroll_max("backtest_status") + 20
-            dpg.set_y_scroll("backtest_status", max_scroll)
+            _backtest_scroll_frames = 2
+    if _backtest_scroll_frames > 0 and dpg.is_item_shown("backtest_status"):
+        dpg.set_y_scroll("backtest_status", dpg.get_y_scroll_max("backtest_status") + 20)
+        _backtest_scroll_frames -= 1
 
 
 def bottom_status_backtest(state: AppState):
-    if dpg.is_item_shown("backtest_status"):
-        max_scroll = dpg.get_y_scroll_max("backtest_status") + 20
-        dpg.set_y_scroll("backtest_status", max_scroll)
+    global _backtest_scroll_frames
+    _backtest_scroll_frames = 2
+
+
+def clear_status_backtest(state: AppState):
+    state.backtest_log.clear()
+
+
+def spill_backtest_log_cb(state: AppState, sender, app_data):
+    # Checkbox: write the full (uncapped) backtest log to state.backtest_log_path
+    state.backtest_log.set_spill(state.backtest_log_path if app_data else None)
+    if app_data:
+        add_text_status(state, f"Backtest log saved to {state.backtest_log_path}")
 
 